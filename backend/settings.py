@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'users',
@@ -58,7 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.middleware.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -176,18 +177,74 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
 }
 
+# Library list page size (?page_size= up to LIBRARY_MAX_PAGE_SIZE)
+
+LIBRARY_PAGE_SIZE = int(os.getenv("LIBRARY_PAGE_SIZE", "50"))
+LIBRARY_MAX_PAGE_SIZE = int(os.getenv("LIBRARY_MAX_PAGE_SIZE", "500"))
+
+# Recent items in GET /api/library/summary/ (?recent= up to 50)
+
+LIBRARY_SUMMARY_RECENT = int(os.getenv("LIBRARY_SUMMARY_RECENT", "5"))
+
+# Max items per POST /api/library/add-from-rawg/bulk/
+
+LIBRARY_BULK_MAX_ITEMS = int(os.getenv("LIBRARY_BULK_MAX_ITEMS", "500"))
+
+# Rows per database round trip for GET /api/library/export/ and POST /api/library/import/
+
+LIBRARY_EXPORT_CHUNK_SIZE = int(os.getenv("LIBRARY_EXPORT_CHUNK_SIZE", "2000"))
+LIBRARY_IMPORT_BATCH_SIZE = int(os.getenv("LIBRARY_IMPORT_BATCH_SIZE", "1000"))
+
+# GET /api/library/changes/: deletions are remembered for LIBRARY_TOMBSTONE_TTL seconds (older cursors
+# get a full resync) and every sync re-reads the last LIBRARY_CHANGES_OVERLAP seconds so rows committed
+# late by a concurrent request are not missed
+
+LIBRARY_TOMBSTONE_TTL = int(os.getenv("LIBRARY_TOMBSTONE_TTL", str(60 * 60 * 24 * 30)))
+LIBRARY_CHANGES_OVERLAP = int(os.getenv("LIBRARY_CHANGES_OVERLAP", "5"))
+
+# GET /api/library/status/?game_ids=... (max ids per request)
+
+LIBRARY_STATUS_MAX_IDS = int(os.getenv("LIBRARY_STATUS_MAX_IDS", "100"))
+
+# Serialized library pages are cached per user in CACHES until the library changes (library/cache.py);
+# LIBRARY_CACHE_TTL bounds how long an unchanged library (and its games' metadata) stays cached
+
+LIBRARY_CACHE_TTL = int(os.getenv("LIBRARY_CACHE_TTL", str(60 * 60 * 24)))
+
+# Similar games / recommendations, precomputed by `manage.py build_game_similarities`
+# (top K neighbours stored per game)
+
+SIMILAR_GAMES_TOP_K = int(os.getenv("SIMILAR_GAMES_TOP_K", "20"))
+
+# GET /api/library/trending/: library activity counts half as much every TRENDING_HALF_LIFE_DAYS days
+
+TRENDING_HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", "7"))
+
+# Shared game snapshots behind library items are re-fetched from RAWG by
+# `manage.py refresh_game_snapshots` once older than LIBRARY_SNAPSHOT_MAX_AGE seconds
+
+LIBRARY_SNAPSHOT_MAX_AGE = int(os.getenv("LIBRARY_SNAPSHOT_MAX_AGE", str(60 * 60 * 24 * 7)))
+LIBRARY_SNAPSHOT_REFRESH_LIMIT = int(os.getenv("LIBRARY_SNAPSHOT_REFRESH_LIMIT", "200"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.VersionedTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.VersionedTokenRefreshSerializer',
 }
 
+# With SHARED_CACHE, authenticated requests read the user from CACHES (users/cache.py) for up to
+# AUTH_USER_CACHE_TTL seconds; otherwise every request loads it (one query, profile included)
+
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "300"))
+
 # Security settings
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -200,6 +257,139 @@ CSRF_COOKIE_SECURE = not DEBUG
 RAWG_API_KEY = os.getenv("RAWG_API_KEY")
 RAWG_BASE_URL = os.getenv("RAWG_BASE_URL", "https://api.rawg.io/api")
 
+# RAWG HTTP client (per-process connection pool, timeouts in seconds, retries on 429/5xx;
+# an upstream Retry-After is honoured for at most RAWG_MAX_RETRY_AFTER seconds)
+
+RAWG_POOL_SIZE = int(os.getenv("RAWG_POOL_SIZE", "20"))
+RAWG_CONNECT_TIMEOUT = float(os.getenv("RAWG_CONNECT_TIMEOUT", "3.05"))
+RAWG_READ_TIMEOUT = float(os.getenv("RAWG_READ_TIMEOUT", "10"))
+RAWG_MAX_RETRIES = int(os.getenv("RAWG_MAX_RETRIES", "2"))
+RAWG_RETRY_BACKOFF = float(os.getenv("RAWG_RETRY_BACKOFF", "0.5"))
+RAWG_MAX_RETRY_AFTER = float(os.getenv("RAWG_MAX_RETRY_AFTER", "5"))
+
+# RAWG call budget shared by all workers through CACHES (games/quota.py), 0 disables a limit
+# Calls wait up to RAWG_RATE_LIMIT_WAIT seconds for a free slot before failing with a 503
+# The circuit breaker opens after RAWG_BREAKER_THRESHOLD consecutive failures for RAWG_BREAKER_COOLDOWN seconds
+
+RAWG_RATE_LIMIT = int(os.getenv("RAWG_RATE_LIMIT", "20"))
+RAWG_RATE_LIMIT_WAIT = float(os.getenv("RAWG_RATE_LIMIT_WAIT", "2"))
+RAWG_MONTHLY_QUOTA = int(os.getenv("RAWG_MONTHLY_QUOTA", "20000"))
+RAWG_BREAKER_THRESHOLD = int(os.getenv("RAWG_BREAKER_THRESHOLD", "5"))
+RAWG_BREAKER_COOLDOWN = int(os.getenv("RAWG_BREAKER_COOLDOWN", "30"))
+
+# Async RAWG client used by the ASGI views (games/async_views.py)
+# GAMES_ASYNC_VIEWS serves /api/games/search/, /<id>/ and /<id>/media/ with the async views
+
+RAWG_ASYNC_MAX_CONNECTIONS = int(os.getenv("RAWG_ASYNC_MAX_CONNECTIONS", "200"))
+GAMES_ASYNC_VIEWS = os.getenv("GAMES_ASYNC_VIEWS", "False") == "True"
+
+# Concurrent RAWG calls (thread pool size, and overall deadline in seconds for the media endpoint)
+
+GAMES_FANOUT_WORKERS = int(os.getenv("GAMES_FANOUT_WORKERS", "16"))
+RAWG_MEDIA_DEADLINE = float(os.getenv("RAWG_MEDIA_DEADLINE", "5"))
+
+# /api/games/batch/?ids=... (max ids per request, pool threads per request, overall deadline in seconds)
+
+GAMES_BATCH_MAX_IDS = int(os.getenv("GAMES_BATCH_MAX_IDS", "50"))
+GAMES_BATCH_WORKERS = int(os.getenv("GAMES_BATCH_WORKERS", "6"))
+GAMES_BATCH_DEADLINE = float(os.getenv("GAMES_BATCH_DEADLINE", "8"))
+
+# Cache settings
+# Uses redis when REDIS_URL is set (shared between gunicorn workers), otherwise local memory
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Whether CACHES is shared by every worker. Per-user state that must be consistent across workers
+# (library versions, cached users) only lives in CACHES when it is, otherwise it is kept in the database
+
+SHARED_CACHE = os.getenv("SHARED_CACHE", "True" if REDIS_URL else "False") == "True"
+
+# Games response cache (in-process LRU in front of CACHES), TTLs in seconds
+# Entries older than the TTL are still served for the STALE_TTL window while they are refreshed
+
+GAMES_CACHE_MAX_ENTRIES = int(os.getenv("GAMES_CACHE_MAX_ENTRIES", "1024"))
+
+GAMES_CACHE_TTL = {
+    "search": int(os.getenv("GAMES_CACHE_SEARCH_TTL", "300")),
+    "detail": int(os.getenv("GAMES_CACHE_DETAIL_TTL", "3600")),
+    "bundle": int(os.getenv("GAMES_CACHE_BUNDLE_TTL", "120")),
+}
+
+GAMES_CACHE_STALE_TTL = {
+    "search": int(os.getenv("GAMES_CACHE_SEARCH_STALE_TTL", "900")),
+    "detail": int(os.getenv("GAMES_CACHE_DETAIL_STALE_TTL", "86400")),
+}
+
+# After the stale window entries are kept this much longer, served only when RAWG is failing
+
+GAMES_CACHE_ERROR_TTL = {
+    "search": int(os.getenv("GAMES_CACHE_SEARCH_ERROR_TTL", "86400")),
+    "detail": int(os.getenv("GAMES_CACHE_DETAIL_ERROR_TTL", "604800")),
+}
+
+# Cache warmer (games/warmer.py, `manage.py warm_games_cache`): category pages 1..GAMES_WARM_PAGES
+# and the GAMES_WARM_TOP best rated game details. With GAMES_WARM_ON_BOOT every web process starts
+# a background thread that re-warms every GAMES_WARM_INTERVAL seconds (0 = once at startup)
+
+GAMES_WARM_ON_BOOT = os.getenv("GAMES_WARM_ON_BOOT", "False") == "True"
+GAMES_WARM_INTERVAL = int(os.getenv("GAMES_WARM_INTERVAL", "240"))
+GAMES_WARM_CATEGORIES = os.getenv("GAMES_WARM_CATEGORIES", "popular,new,average").split(",")
+GAMES_WARM_PAGES = int(os.getenv("GAMES_WARM_PAGES", "3"))
+GAMES_WARM_TOP = int(os.getenv("GAMES_WARM_TOP", "20"))
+
+# Artwork proxy (/api/games/image/...): resized renditions of images from GAMES_IMAGE_HOSTS kept in an
+# on-disk LRU store of GAMES_IMAGE_CACHE_MAX_MB; search/library responses link them as "thumbnail"
+
+GAMES_IMAGE_PROXY = os.getenv("GAMES_IMAGE_PROXY", "True") == "True"
+GAMES_IMAGE_HOSTS = os.getenv("GAMES_IMAGE_HOSTS", "media.rawg.io").split(",")
+GAMES_IMAGE_CACHE_DIR = os.getenv("GAMES_IMAGE_CACHE_DIR", str(BASE_DIR / "image_cache"))
+GAMES_IMAGE_CACHE_MAX_MB = int(os.getenv("GAMES_IMAGE_CACHE_MAX_MB", "512"))
+GAMES_IMAGE_MAX_SOURCE_MB = int(os.getenv("GAMES_IMAGE_MAX_SOURCE_MB", "15"))
+
+# Only source paths under GAMES_IMAGE_PATH_PREFIX are proxied; at most GAMES_IMAGE_MAX_RENDERS images are
+# downloaded and resized at once per process, others wait GAMES_IMAGE_RENDER_WAIT seconds, then get a 503
+
+GAMES_IMAGE_PATH_PREFIX = os.getenv("GAMES_IMAGE_PATH_PREFIX", "/media/")
+GAMES_IMAGE_MAX_RENDERS = int(os.getenv("GAMES_IMAGE_MAX_RENDERS", "2"))
+GAMES_IMAGE_RENDER_WAIT = float(os.getenv("GAMES_IMAGE_RENDER_WAIT", "5"))
+
+# Coalesce identical cache misses across workers with a short-lived lock in CACHES
+# (only useful when CACHES is shared, e.g. redis)
+
+GAMES_CACHE_CROSS_WORKER_LOCK = os.getenv("GAMES_CACHE_CROSS_WORKER_LOCK", str(bool(REDIS_URL))) == "True"
+GAMES_CACHE_LOCK_TIMEOUT = int(os.getenv("GAMES_CACHE_LOCK_TIMEOUT", "10"))
+
+# Local RAWG catalog mirror (games.Game), filled by `manage.py import_rawg_catalog`
+# Game details RAWG returned are served locally for GAMES_MIRROR_MAX_AGE seconds. Category pages and
+# title search read the mirror while the last complete import is younger than GAMES_CATALOG_MAX_AGE:
+# the catalog is ~22k pages of 40 games, more than the whole RAWG_MONTHLY_QUOTA, so a full import is
+# spread over daily `import_rawg_catalog --pages 250` runs (~7.5k calls a month, done in ~90 days)
+# and the next one starts before the 120 day max age runs out
+
+GAMES_MIRROR_ENABLED = os.getenv("GAMES_MIRROR_ENABLED", "True") == "True"
+GAMES_MIRROR_MAX_AGE = int(os.getenv("GAMES_MIRROR_MAX_AGE", str(60 * 60 * 48)))
+GAMES_CATALOG_MAX_AGE = int(os.getenv("GAMES_CATALOG_MAX_AGE", str(60 * 60 * 24 * 120)))
+
+# Search game titles in the local catalog instead of RAWG while the mirror is fresh
+# (min similarity is the typo tolerance threshold, 0..1)
+
+GAMES_LOCAL_SEARCH = os.getenv("GAMES_LOCAL_SEARCH", "True") == "True"
+GAMES_SEARCH_MIN_SIMILARITY = float(os.getenv("GAMES_SEARCH_MIN_SIMILARITY", "0.3"))
+
 # Settings for frontend integration
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# background cache warmer, only when GAMES_WARM_ON_BOOT is set
+from games.warmer import start_warmer  # noqa: E402
+
+start_warmer()
@@ -0,0 +1,22 @@
+import api from "./axios.js";
+
+// Library statuses ({ wishlist, favorite, played } per game id) for the games on screen,
+// instead of downloading the whole library.
+
+// results of games/search/?with_library=1 carry their statuses in "library"
+export function libraryStatusMap(games) {
+  const statusMap = {};
+  games.forEach((game) => {
+    if (game.library) statusMap[game.id] = game.library;
+  });
+  return statusMap;
+}
+
+// GET library/status/?game_ids=1,2,3
+export async function fetchLibraryStatuses(gameIds) {
+  if (gameIds.length === 0) return {};
+  const res = await api.get("library/status/", {
+    params: { game_ids: gameIds.join(",") },
+  });
+  return res.data.results;
+}
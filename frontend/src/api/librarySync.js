@@ -0,0 +1,36 @@
+import api from "./axios.js";
+
+// Local copy of the signed-in user's library, kept current with GET library/changes/?since=<cursor>.
+// After the first sync only created, updated and deleted items are transferred.
+const STORAGE_KEY = "librarySync";
+
+function loadState() {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY)) || { cursor: null, items: {} };
+  } catch {
+    return { cursor: null, items: {} };
+  }
+}
+
+export function clearLibrarySync() {
+  localStorage.removeItem(STORAGE_KEY);
+}
+
+export async function syncLibrary() {
+  const state = loadState();
+  const res = await api.get("library/changes/", {
+    params: state.cursor ? { since: state.cursor } : {},
+  });
+
+  // reset = the server sent the whole library (first sync or an expired cursor)
+  const items = res.data.reset ? {} : { ...state.items };
+  res.data.items.forEach((item) => {
+    items[item.id] = item;
+  });
+  res.data.deleted.forEach((id) => {
+    delete items[id];
+  });
+
+  localStorage.setItem(STORAGE_KEY, JSON.stringify({ cursor: res.data.cursor, items }));
+  return Object.values(items).sort((a, b) => b.created_at.localeCompare(a.created_at));
+}
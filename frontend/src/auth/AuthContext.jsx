@@ -1,5 +1,6 @@
 import { createContext, useContext, useState, useEffect } from "react";
 import api from "../api/axios";
+import { clearLibrarySync } from "../api/librarySync";
 
 const AuthContext = createContext();
 
@@ -26,12 +27,14 @@ export function AuthProvider({ children }) {
   }, [access]);
 
   function login(accessToken, refreshToken) {
+    clearLibrarySync();
     localStorage.setItem("access", accessToken);
     localStorage.setItem("refresh", refreshToken);
     setAccess(accessToken);
   }
 
   function logout() {
+    clearLibrarySync();
     localStorage.removeItem("access");
     localStorage.removeItem("refresh");
     setAccess(null);
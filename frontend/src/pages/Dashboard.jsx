@@ -5,28 +5,18 @@ import LibraryPage from "./LibraryPage.jsx";
 import ProfilePage from "./ProfilePage.jsx";
 
 export default function Dashboard() {
-  const [items, setItems] = useState([]);
+  const [counts, setCounts] = useState({ wishlist: 0, favorite: 0, played: 0 });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
-  const counts = items.reduce(
-  (acc, item) => {
-    const key = item.status?.toLowerCase();
-    if (key === "wishlist") acc.wishlist += 1;
-    if (key === "favorite") acc.favorite += 1;
-    if (key === "played") acc.played += 1;
-    return acc;
-  },
-  { wishlist: 0, favorite: 0, played: 0 }
-);
-
   useEffect(() => {
     async function loadLibrary() {
       setLoading(true);
       setError(null);
       try {
-        const res = await api.get("library/");
-        setItems(res.data);
+        // counts per status only, the lists are loaded by LibraryPage
+        const res = await api.get("library/summary/", { params: { recent: 0 } });
+        setCounts(res.data.counts);
       } catch (err) {
         console.error("Failed to load library:", err);
         setError("Failed to load your library.");
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useParams, Link, useSearchParams, useNavigate } from "react-router-dom";
 import api from "../api/axios.js";
+import { fetchLibraryStatuses } from "../api/libraryStatus.js";
 import { useAuth } from "../auth/AuthContext.jsx";
 import useLibraryActions from "../hooks/useLibraryActions.js";
 
@@ -46,31 +47,16 @@ export default function GameDetail() {
 
   const [message, setMessage] = useState(null); // { type, text }
 
-  // Load game details from backend
+  // Load game details and screenshots / trailers / youtube in one request
   useEffect(() => {
     async function loadGame() {
       setLoading(true);
-      setError(null);
-      try {
-        const res = await api.get(`games/${id}/`);
-        setGame(res.data);
-      } catch (err) {
-        console.error(err);
-        setError("Failed to load game details.");
-      } finally {
-        setLoading(false);
-      }
-    }
-    loadGame();
-  }, [id]);
-
-  // Load screenshots / trailers / youtube
-  useEffect(() => {
-    async function loadMedia() {
       setMediaLoading(true);
+      setError(null);
       setMediaError(null);
       try {
-        const res = await api.get(`games/${id}/media/`);
+        const res = await api.get(`games/${id}/bundle/`);
+        setGame(res.data.game);
         setMedia({
           screenshots: res.data.screenshots || [],
           trailers: res.data.trailers || [],
@@ -78,12 +64,14 @@ export default function GameDetail() {
         });
       } catch (err) {
         console.error(err);
+        setError("Failed to load game details.");
         setMediaError("Failed to load media.");
       } finally {
+        setLoading(false);
         setMediaLoading(false);
       }
     }
-    loadMedia();
+    loadGame();
   }, [id]);
 
   // After game and user are known, check if this game is in user's library
@@ -92,18 +80,8 @@ export default function GameDetail() {
 
     async function loadLibraryStatus() {
       try {
-        const res = await api.get("library/");
-        const thisGameItems = res.data.filter(
-          (item) => item.game_id === game.id
-        );
-        const statuses = { wishlist: false, favorite: false, played: false };
-        thisGameItems.forEach((item) => {
-          const key = item.status?.toLowerCase();
-          if (key && statuses.hasOwnProperty(key)) {
-            statuses[key] = true;
-          }
-        });
-        setLibraryStatuses(statuses);
+        const statuses = await fetchLibraryStatuses([game.id]);
+        setLibraryStatuses(statuses[game.id]);
       } catch (err) {
         console.error("Failed to load library for this game:", err);
       }
@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import { useSearchParams, Link } from "react-router-dom";
 import api from "../api/axios.js";
+import { libraryStatusMap } from "../api/libraryStatus.js";
 import { useAuth } from "../auth/AuthContext.jsx";
 import { filterByRating, filterByPlatform, filterByGenre, buildGenreOptions, buildPlatformOptions } from "../utils/gameFilters.js";
 import useLibraryActions from "../hooks/useLibraryActions.js";
@@ -51,10 +52,13 @@ export default function GameSearch() {
       setError(null);
       setFeedback(null);
       try {
+        // with_library: the backend adds the user's statuses to every result
         const res = await api.get("games/search/", {
-          params: { query, page },
+          params: user ? { query, page, with_library: 1 } : { query, page },
         });
-        setGames(res.data.results || []);
+        const results = res.data.results || [];
+        setGames(results);
+        setLibraryStatuses(libraryStatusMap(results));
         const count = res.data.count || 0;
         setTotalPages(count ? Math.max(1, Math.ceil(count / PAGE_SIZE)) : 1);
       } catch (err) {
@@ -66,42 +70,7 @@ export default function GameSearch() {
     }
 
     fetchGames();
-  }, [query, page]);
-
-  // Load user's library once (or when user changes)
-  useEffect(() => {
-    if (!user) {
-      setLibraryStatuses({});
-      return;
-    }
-
-    async function loadLibrary() {
-      try {
-        const res = await api.get("library/");
-        const statusMap = {};
-
-        res.data.forEach((item) => {
-          if (!statusMap[item.game_id]) {
-            statusMap[item.game_id] = {
-              wishlist: false,
-              favorite: false,
-              played: false,
-            };
-          }
-          const s = item.status?.toLowerCase();
-          if (s && statusMap[item.game_id].hasOwnProperty(s)) {
-            statusMap[item.game_id][s] = true;
-          }
-        });
-
-        setLibraryStatuses(statusMap);
-      } catch (err) {
-        console.error("Failed to load library statuses:", err);
-      }
-    }
-
-    loadLibrary();
-  }, [user]);
+  }, [query, page, user]);
 
   function syncSearchParams(overrides = {}) {
     const params = {};
@@ -261,7 +230,7 @@ export default function GameSearch() {
                   className="game-card-link"
                 >
                   <img
-                    src={g.background_image || "/images/no-image.png"}
+                    src={g.thumbnail || g.background_image || "/images/no-image.png"}
                     alt={g.name}
                   />
                   <div className="game-card-body">
@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import { Link, useSearchParams } from "react-router-dom";
 import api from "../api/axios.js";
+import { libraryStatusMap } from "../api/libraryStatus.js";
 import { useAuth } from "../auth/AuthContext.jsx";
 import { filterByGenre, filterByPlatform, filterByRating, buildPlatformOptions, buildGenreOptions } from "../utils/gameFilters.js";
 import useLibraryActions from "../hooks/useLibraryActions.js";
@@ -64,10 +65,13 @@ export default function Home() {
       setError(null);
       setFeedback(null);
       try {
+        // with_library: the backend adds the user's statuses to every result
         const res = await api.get("games/search/", {
-          params: { page },
+          params: user ? { page, with_library: 1 } : { page },
         });
-        setGames(res.data.results || []);
+        const results = res.data.results || [];
+        setGames(results);
+        setGameStatuses(libraryStatusMap(results));
         const count = res.data.count || 0;
         setTotalPages(count ? Math.max(1, Math.ceil(count / PAGE_SIZE)) : 1);
       } catch (err) {
@@ -79,7 +83,7 @@ export default function Home() {
     }
 
     fetchGames();
-  }, [page, setFeedback]);
+  }, [page, user, setFeedback]);
 
   function updatePage(newPage) {
     const safePage = Math.min(Math.max(newPage, 1), totalPages || 1);
@@ -87,39 +91,6 @@ export default function Home() {
     syncSearchParams({ page: safePage });
   }
 
-  // Load user's library to track game statuses
-  useEffect(() => {
-    async function loadLibraryStatuses() {
-      if (!user) {
-        setGameStatuses({});
-        return;
-      }
-
-      try {
-        const res = await api.get("library/");
-        const statusMap = {};
-        res.data.forEach((item) => {
-          if (!statusMap[item.game_id]) {
-            statusMap[item.game_id] = {
-              wishlist: false,
-              favorite: false,
-              played: false,
-            };
-          }
-          const key = item.status?.toLowerCase();
-          if (key && statusMap[item.game_id].hasOwnProperty(key)) {
-            statusMap[item.game_id][key] = true;
-          }
-        });
-        setGameStatuses(statusMap);
-      } catch (err) {
-        console.error("Failed to load library for Home:", err);
-      }
-    }
-
-    loadLibraryStatuses();
-  }, [user]);
-
   // Build filter options for platforms and genres
   const platformOptions = buildPlatformOptions(games);
   const genreOptions = buildGenreOptions(games);
@@ -244,7 +215,7 @@ export default function Home() {
             return (
               <div key={g.id} className="game-card">
                 <img
-                  src={g.background_image || "/images/no-image.png"}
+                  src={g.thumbnail || g.background_image || "/images/no-image.png"}
                   alt={g.name}
                 />
                 <div className="game-card-body">
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import api from "../api/axios.js";
+import { syncLibrary } from "../api/librarySync.js";
 
 export default function LibraryPage({ status }) {
   const [items, setItems] = useState([]);
@@ -16,9 +17,9 @@ export default function LibraryPage({ status }) {
       setLoading(true);
       setFeedback(null);
       try {
-        const res = await api.get("library/");
-        const filtered = res.data.filter((item) => item.status === status);
-        setItems(filtered);
+        // delta sync of the local library copy instead of downloading the whole list
+        const library = await syncLibrary();
+        setItems(library.filter((item) => item.status === status));
       } catch (err) {
         console.error("Failed to load library:", err);
         setFeedback({
@@ -91,7 +92,7 @@ export default function LibraryPage({ status }) {
                   className="game-card-link"
                 >
                   <img
-                    src={item.background_image || "/images/no-image.png"}
+                    src={item.thumbnail || item.background_image || "/images/no-image.png"}
                     alt={item.title || `Game #${item.game_id}`}
                   />
                   <div className="game-card-body">
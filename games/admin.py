@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import Game, Genre, Platform, CatalogImport
 
 # Register your models here.
+
+@admin.register(Game)
+class GameAdmin(admin.ModelAdmin):
+    list_display = ('name', 'rawg_id', 'released', 'rating', 'metacritic', 'synced_at')
+    search_fields = ('name', 'rawg_id')
+    list_filter = ('genres',)
+
+@admin.register(CatalogImport)
+class CatalogImportAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ordering', 'last_page', 'total_pages', 'games_imported', 'started_at', 'finished_at')
+
+admin.site.register(Genre)
+admin.site.register(Platform)
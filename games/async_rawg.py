@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+
+import httpx
+from django.conf import settings
+
+from .quota import is_upstream_failure, rawg_budget
+from .rawg import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+# Async counterpart of games.rawg.RawgClient for the ASGI views (games/async_views.py).
+# One pooled httpx.AsyncClient per event loop, same timeouts, retry policy and shared RAWG budget
+# as the sync client.
+
+
+class AsyncRawgClient:
+    def __init__(self, base_url=None, api_key=None, transport=None):
+        self.base_url = (base_url or settings.RAWG_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.RAWG_API_KEY
+        self.max_retries = settings.RAWG_MAX_RETRIES
+        self.backoff = settings.RAWG_RETRY_BACKOFF
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.RAWG_READ_TIMEOUT, connect=settings.RAWG_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.RAWG_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.RAWG_POOL_SIZE,
+            ),
+            transport=transport,
+        )
+
+    async def get(self, path, params=None):
+        # GET <base_url>/<path> and return the decoded JSON, raising httpx errors (or RawgUnavailable) on failure
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        params = {"key": self.api_key, **(params or {})}
+        start = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await rawg_budget.aacquire()
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TransportError:
+                await rawg_budget.arecord_usage()
+                await rawg_budget.arecord_failure()
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            await rawg_budget.arecord_usage()
+            if is_upstream_failure(response.status_code):
+                await rawg_budget.arecord_failure()
+            else:
+                await rawg_budget.arecord_success()
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                await asyncio.sleep(min(delay, settings.RAWG_MAX_RETRY_AFTER))
+                continue
+
+            response.raise_for_status()
+            logger.debug("RAWG async GET %s took %.1fms", path, (time.perf_counter() - start) * 1000)
+            return response.json()
+
+    async def game(self, game_id):
+        return await self.get(f"games/{game_id}")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# httpx clients are bound to the event loop that created them
+_clients = {}
+_closers = set()
+
+
+async def _close_with_loop(loop, client):
+    # pending until the loop shuts down: asyncio.run() (uvicorn, and asgiref's per-request loops
+    # under WSGI) cancels leftover tasks before closing the loop, so the client's connections are
+    # closed while the loop can still run that
+    try:
+        await loop.create_future()
+    finally:
+        if _clients.get(loop) is client:
+            del _clients[loop]
+        await client.aclose()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # loops closed without cancelling their tasks cannot close their client anymore
+        for old_loop in [l for l in _clients if l.is_closed()]:
+            del _clients[old_loop]
+        client = _clients[loop] = AsyncRawgClient()
+        closer = loop.create_task(_close_with_loop(loop, client))
+        _closers.add(closer)
+        closer.add_done_callback(_closers.discard)
+    return client
+
+
+def reset_async_clients():
+    _clients.clear()
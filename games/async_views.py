@@ -0,0 +1,143 @@
+import asyncio
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from .async_rawg import get_async_client
+from .cache import games_cache
+from .conditional import content_etag, entry_etag, etag_matches
+from .projection import parse_fields, project
+from .quota import RawgUnavailable
+from .responses import library_etag, private_response, search_page, wants_library
+from .services import (
+    MEDIA_PARTS,
+    SearchRequest,
+    local_detail,
+    local_search_page,
+    remember_detail,
+    remember_search_results,
+)
+from .singleflight import async_rawg_flight
+
+
+# Async versions of the games proxy views, for running under an ASGI server
+# (e.g. `gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker`).
+# While a view waits on RAWG the worker keeps serving other requests, so one process can
+# hold hundreds of concurrent upstream calls. Responses match the sync views in games/views.py.
+
+
+def error_response(e):
+    return JsonResponse({"error": str(e)}, status=500)
+
+
+def etag_response(request, etag, render):
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(render())
+    response["ETag"] = etag
+    return response
+
+
+def unavailable_response(e):
+    response = JsonResponse({"error": str(e)}, status=503)
+    if e.retry_after:
+        response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+async def authenticate(request):
+    # these are plain Django views, so run the DRF authenticators the sync views use
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = await sync_to_async(authentication_class().authenticate)(request)
+        if result is not None:
+            return result[0]
+    return AnonymousUser()
+
+
+@require_GET
+async def game_search(request):
+    search = SearchRequest.from_query_params(request.GET)
+
+    async def fetch():
+        data = await sync_to_async(local_search_page)(search, page_url=search.page_url)
+        if data is None:
+            data = await get_async_client().get("games", params=search.params)
+            await sync_to_async(remember_search_results)(data)
+        return data
+
+    try:
+        entry = await games_cache.aget_or_fetch_entry("search", search.cache_params, fetch)
+    except RawgUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return error_response(e)
+
+    fields = parse_fields(request.GET.get("fields"), default="card")
+    if not wants_library(request):
+        return etag_response(request, entry_etag(entry, fields), lambda: search_page(request, entry["data"], fields))
+
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"detail": str(e.detail)}, status=401)
+    etag = await sync_to_async(library_etag)(entry_etag(entry, fields), user)
+    if etag_matches(request, etag):
+        return private_response(etag_response(request, etag, None))
+    data = await sync_to_async(search_page)(request, entry["data"], fields, user)
+    return private_response(etag_response(request, etag, lambda: data))
+
+
+@require_GET
+async def game_detail(request, game_id):
+    async def fetch():
+        data = await sync_to_async(local_detail)(game_id)
+        if data is None:
+            data = await get_async_client().game(game_id)
+            await sync_to_async(remember_detail)(data)
+        return data
+
+    try:
+        entry = await games_cache.aget_or_fetch_entry("detail", {"id": game_id}, fetch)
+    except RawgUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return error_response(e)
+
+    fields = parse_fields(request.GET.get("fields"), default="detail")
+    return etag_response(request, entry_etag(entry, fields), lambda: project(entry["data"], fields))
+
+
+@require_GET
+async def game_media(request, game_id):
+    client = get_async_client()
+
+    async def fetch(path):
+        data = await async_rawg_flight.do(
+            f"media:{game_id}:{path}",
+            lambda: client.get(f"games/{game_id}/{path}"),
+        )
+        return data.get("results", [])
+
+    tasks = {name: asyncio.ensure_future(fetch(path)) for name, path in MEDIA_PARTS.items()}
+    await asyncio.wait(tasks.values(), timeout=settings.RAWG_MEDIA_DEADLINE)
+
+    # failed or timed out parts are returned as empty lists, timed out ones are listed in "missing"
+    response, missing = {}, []
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            missing.append(name)
+            response[name] = []
+        elif task.exception() is not None:
+            response[name] = []
+        else:
+            response[name] = task.result()
+    response["missing"] = missing
+    return etag_response(request, content_etag(response), lambda: response)
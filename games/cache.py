@@ -0,0 +1,369 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import connection
+
+from .conditional import content_hash
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+
+# Two-tier cache for RAWG responses:
+#   1. an in-process LRU (bounded by GAMES_CACHE_MAX_ENTRIES)
+#   2. the Django cache framework (shared between workers when CACHES points at redis)
+#
+# Entries are stored with a "fresh" TTL and an extra "stale" window. Stale entries are
+# still served immediately while a single worker refreshes them in the background
+# (stale-while-revalidate). Past the stale window entries are kept for GAMES_CACHE_ERROR_TTL
+# more seconds and only served when fetching a fresh copy fails (stale-if-error), e.g. while
+# the RAWG circuit breaker is open.
+#
+# Misses are coalesced: concurrent requests for the same key within a process share one
+# upstream call, and with GAMES_CACHE_CROSS_WORKER_LOCK a short-lived lock in the shared
+# cache makes other workers wait for that result instead of calling RAWG themselves.
+#
+# clear() must not flush CACHES, which also holds the RAWG budget, library versions and cached
+# users, and the cache API cannot list keys: it bumps a generation counter instead, and shared
+# entries stored under an older generation are treated as missing (and expire on their own).
+
+GENERATION_KEY = "games:generation"
+
+
+def make_key(endpoint, params):
+    # normalized params -> stable, backend-safe key
+    raw = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"games:{endpoint}:{digest}"
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    def __init__(self, max_entries=None):
+        self.local = LRUCache(max_entries or settings.GAMES_CACHE_MAX_ENTRIES)
+        self._counters = defaultdict(lambda: defaultdict(int))
+        self._counters_lock = threading.Lock()
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._refresh_tasks = set()
+        self.flight = SingleFlight()
+        self.aflight = AsyncSingleFlight()
+        self.generation = 0
+
+    # --- TTLs ---
+
+    def ttls(self, endpoint):
+        fresh = settings.GAMES_CACHE_TTL.get(endpoint, 300)
+        stale = settings.GAMES_CACHE_STALE_TTL.get(endpoint, 0)
+        return fresh, stale
+
+    def error_ttl(self, endpoint):
+        return settings.GAMES_CACHE_ERROR_TTL.get(endpoint, 0)
+
+    # --- counters ---
+
+    def _count(self, endpoint, name):
+        with self._counters_lock:
+            self._counters[endpoint][name] += 1
+
+    def stats(self):
+        with self._counters_lock:
+            endpoints = {name: dict(values) for name, values in self._counters.items()}
+        return {
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "local_evictions": self.local.evictions,
+            "single_flight": self.flight.stats(),
+            "async_single_flight": self.aflight.stats(),
+            "endpoints": endpoints,
+        }
+
+    # --- raw entry access ---
+
+    def lookup(self, endpoint, key):
+        # returns the stored entry (or None), checking the local tier first; a stale local copy
+        # is checked against the shared tier, where another worker may have refreshed it already
+        entry = self.local.get(key)
+        if entry is not None and time.time() < entry["fresh_until"]:
+            self._count(endpoint, "local_hits")
+            return entry
+        return self._newest(endpoint, key, entry, shared_cache.get_many([key, GENERATION_KEY]))
+
+    async def alookup(self, endpoint, key):
+        entry = self.local.get(key)
+        if entry is not None and time.time() < entry["fresh_until"]:
+            self._count(endpoint, "local_hits")
+            return entry
+        return self._newest(endpoint, key, entry, await shared_cache.aget_many([key, GENERATION_KEY]))
+
+    def _newest(self, endpoint, key, local, values):
+        # the shared entry when it is fresher than the (stale or missing) local one
+        shared = self._current(key, values)
+        if shared is not None and (local is None or shared["fresh_until"] > local["fresh_until"]):
+            self._count(endpoint, "shared_hits")
+            self.local.set(key, shared)
+            return shared
+        if local is not None:
+            self._count(endpoint, "local_hits")
+        return local
+
+    def _current(self, key, values):
+        # the shared entry from a get_many([key, GENERATION_KEY]), unless a clear() retired it
+        self.generation = values.get(GENERATION_KEY, 0)
+        entry = values.get(key)
+        if entry is not None and entry.get("generation", 0) == self.generation:
+            return entry
+        return None
+
+    def _entry(self, endpoint, data):
+        fresh, stale = self.ttls(endpoint)
+        now = time.time()
+        entry = {
+            "data": data,
+            "fresh_until": now + fresh,
+            "stale_until": now + fresh + stale,
+            "etag": content_hash(data),
+            "generation": self.generation,
+        }
+        return entry, fresh + stale + self.error_ttl(endpoint)
+
+    def store(self, endpoint, key, data):
+        self.generation = shared_cache.get(GENERATION_KEY, 0)
+        entry, timeout = self._entry(endpoint, data)
+        self.local.set(key, entry)
+        shared_cache.set(key, entry, timeout=timeout)
+        return entry
+
+    async def astore(self, endpoint, key, data):
+        self.generation = await shared_cache.aget(GENERATION_KEY, 0)
+        entry, timeout = self._entry(endpoint, data)
+        self.local.set(key, entry)
+        await shared_cache.aset(key, entry, timeout=timeout)
+        return entry
+
+    def delete(self, key):
+        self.local.delete(key)
+        shared_cache.delete(key)
+
+    def clear(self):
+        # every games entry, in this process and (through the generation) in the shared tier
+        self.local.clear()
+        shared_cache.add(GENERATION_KEY, 0, timeout=None)
+        try:
+            self.generation = shared_cache.incr(GENERATION_KEY)
+        except ValueError:
+            # evicted between add() and incr()
+            shared_cache.set(GENERATION_KEY, self.generation + 1, timeout=None)
+            self.generation += 1
+        with self._counters_lock:
+            self._counters.clear()
+
+    # --- main entry point ---
+
+    def get_or_fetch(self, endpoint, params, fetch, cacheable=None):
+        return self.get_or_fetch_entry(endpoint, params, fetch, cacheable)["data"]
+
+    def get_or_fetch_entry(self, endpoint, params, fetch, cacheable=None):
+        """
+        Return the cache entry ({"data", "etag", ...}) for (endpoint, params), calling ``fetch()`` on a miss.
+
+        Fetched data is only stored when ``cacheable(data)`` is true (if given), e.g. to skip
+        partial responses.
+
+        Exceptions raised by ``fetch`` propagate to the caller and nothing is cached, unless an
+        expired entry is still around, which is then returned instead.
+        """
+        key = make_key(endpoint, params)
+        now = time.time()
+        entry = self.lookup(endpoint, key)
+
+        if entry is not None and now < entry["stale_until"]:
+            if now < entry["fresh_until"]:
+                self._count(endpoint, "hits")
+            else:
+                self._count(endpoint, "stale_hits")
+                self._refresh_in_background(endpoint, key, fetch)
+            return entry
+
+        self._count(endpoint, "misses")
+        try:
+            return self.flight.do(key, lambda: self._fetch_and_store(endpoint, key, fetch, cacheable))
+        except Exception:
+            if entry is None:
+                raise
+            self._count(endpoint, "expired_hits")
+            return entry
+
+    def warm(self, endpoint, params, fetch, min_ttl=0):
+        """
+        Fetch and store (endpoint, params) unless the cached entry stays fresh for ``min_ttl``
+        more seconds. Returns the data and whether it was fetched.
+        """
+        key = make_key(endpoint, params)
+        entry = self.lookup(endpoint, key)
+        if entry is not None and entry["fresh_until"] > time.time() + min_ttl:
+            return entry["data"], False
+
+        entry = self.flight.do(key, lambda: self._fetch_and_store(endpoint, key, fetch))
+        self._count(endpoint, "warmed")
+        return entry["data"], True
+
+    def _fetch_and_store(self, endpoint, key, fetch, cacheable=None):
+        lock_key = f"{key}:lock"
+        locked = False
+        if settings.GAMES_CACHE_CROSS_WORKER_LOCK:
+            locked = shared_cache.add(lock_key, 1, timeout=settings.GAMES_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                entry = self._wait_for_other_worker(key, lock_key)
+                if entry is not None:
+                    self._count(endpoint, "coalesced_remote")
+                    return entry
+                # the other worker failed or took too long: fetch ourselves
+
+        try:
+            data = fetch()
+            if cacheable is None or cacheable(data):
+                return self.store(endpoint, key, data)
+            return self._entry(endpoint, data)[0]
+        finally:
+            if locked:
+                shared_cache.delete(lock_key)
+
+    def _wait_for_other_worker(self, key, lock_key):
+        deadline = time.monotonic() + settings.GAMES_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self._current(key, shared_cache.get_many([key, GENERATION_KEY]))
+            if entry is not None:
+                self.local.set(key, entry)
+                return entry
+            if shared_cache.get(lock_key) is None:
+                return None
+        return None
+
+    async def aget_or_fetch(self, endpoint, params, fetch):
+        return (await self.aget_or_fetch_entry(endpoint, params, fetch))["data"]
+
+    async def aget_or_fetch_entry(self, endpoint, params, fetch):
+        """
+        Async version of get_or_fetch_entry for the ASGI views; ``fetch`` is a coroutine function.
+        """
+        key = make_key(endpoint, params)
+        now = time.time()
+        entry = await self.alookup(endpoint, key)
+
+        if entry is not None and now < entry["stale_until"]:
+            if now < entry["fresh_until"]:
+                self._count(endpoint, "hits")
+            else:
+                self._count(endpoint, "stale_hits")
+                await self._arefresh_in_background(endpoint, key, fetch)
+            return entry
+
+        self._count(endpoint, "misses")
+
+        async def fetch_and_store():
+            return await self.astore(endpoint, key, await fetch())
+
+        try:
+            return await self.aflight.do(key, fetch_and_store)
+        except Exception:
+            if entry is None:
+                raise
+            self._count(endpoint, "expired_hits")
+            return entry
+
+    async def _arefresh_in_background(self, endpoint, key, fetch):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        fresh, _ = self.ttls(endpoint)
+        if not await shared_cache.aadd(f"{key}:refresh", 1, timeout=max(fresh, 30)):
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+            return
+
+        async def run():
+            try:
+                await self.astore(endpoint, key, await fetch())
+                self._count(endpoint, "refreshes")
+            except Exception:
+                self._count(endpoint, "refresh_errors")
+            finally:
+                await shared_cache.adelete(f"{key}:refresh")
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def _refresh_in_background(self, endpoint, key, fetch):
+        # only one thread per process, and one worker across processes, refreshes a key
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        fresh, _ = self.ttls(endpoint)
+        if not shared_cache.add(f"{key}:refresh", 1, timeout=max(fresh, 30)):
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+            return
+
+        def run():
+            try:
+                self.store(endpoint, key, fetch())
+                self._count(endpoint, "refreshes")
+            except Exception:
+                self._count(endpoint, "refresh_errors")
+            finally:
+                # fetch() may have touched the database from this thread
+                connection.close()
+                shared_cache.delete(f"{key}:refresh")
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+games_cache = TieredCache()
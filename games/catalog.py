@@ -0,0 +1,189 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CatalogImport, Game, Genre, Platform
+
+
+# Helpers for the local RAWG catalog mirror (see games.models.Game)
+
+GAME_FIELDS = ["slug", "name", "released", "background_image", "rating", "ratings_count", "metacritic", "added"]
+
+# RAWG ordering param -> local field
+LOCAL_ORDERING = {
+    "-rating": "rating",
+    "-released": "released",
+    "-metacritic": "metacritic",
+}
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _game_from_payload(payload):
+    return Game(
+        rawg_id=payload["id"],
+        slug=(payload.get("slug") or "")[:255],
+        name=(payload.get("name") or "")[:255],
+        released=_parse_date(payload.get("released")),
+        background_image=payload.get("background_image"),
+        rating=payload.get("rating"),
+        ratings_count=payload.get("ratings_count") or 0,
+        metacritic=payload.get("metacritic"),
+        added=payload.get("added") or 0,
+    )
+
+
+def _upsert_lookup(model, items):
+    # items: {rawg_id: {"name": ..., "slug": ...}} -> {rawg_id: pk}
+    if not items:
+        return {}
+    model.objects.bulk_create(
+        [model(rawg_id=rawg_id, name=(i.get("name") or "")[:100], slug=(i.get("slug") or "")[:120])
+         for rawg_id, i in items.items()],
+        update_conflicts=True,
+        unique_fields=["rawg_id"],
+        update_fields=["name", "slug"],
+    )
+    return dict(model.objects.filter(rawg_id__in=items).values_list("rawg_id", "id"))
+
+
+def upsert_games(payloads, batch_size=1000):
+    """
+    Insert or update RAWG game payloads (list or detail shape) in a few bulk queries.
+
+    Returns the number of games written.
+    """
+    games = {p["id"]: p for p in payloads if p.get("id") and p.get("name")}
+    if not games:
+        return 0
+
+    genres, platforms = {}, {}
+    for payload in games.values():
+        for genre in payload.get("genres") or []:
+            genres[genre["id"]] = genre
+        for entry in payload.get("platforms") or []:
+            platform = entry.get("platform") or entry
+            platforms[platform["id"]] = platform
+
+    with transaction.atomic():
+        genre_ids = _upsert_lookup(Genre, genres)
+        platform_ids = _upsert_lookup(Platform, platforms)
+
+        Game.objects.bulk_create(
+            [_game_from_payload(p) for p in games.values()],
+            update_conflicts=True,
+            unique_fields=["rawg_id"],
+            update_fields=GAME_FIELDS + ["synced_at"],
+            batch_size=batch_size,
+        )
+        game_ids = dict(Game.objects.filter(rawg_id__in=games).values_list("rawg_id", "id"))
+
+        # replace genre/platform links of the written games
+        GenreLink = Game.genres.through
+        PlatformLink = Game.platforms.through
+        GenreLink.objects.filter(game_id__in=game_ids.values()).delete()
+        PlatformLink.objects.filter(game_id__in=game_ids.values()).delete()
+
+        genre_links, platform_links = [], []
+        for rawg_id, payload in games.items():
+            for genre in payload.get("genres") or []:
+                genre_links.append(GenreLink(game_id=game_ids[rawg_id], genre_id=genre_ids[genre["id"]]))
+            for entry in payload.get("platforms") or []:
+                platform = entry.get("platform") or entry
+                platform_links.append(
+                    PlatformLink(game_id=game_ids[rawg_id], platform_id=platform_ids[platform["id"]])
+                )
+        GenreLink.objects.bulk_create(genre_links, ignore_conflicts=True, batch_size=batch_size)
+        PlatformLink.objects.bulk_create(platform_links, ignore_conflicts=True, batch_size=batch_size)
+
+    return len(games)
+
+
+def save_detail(payload):
+    # store a RAWG detail payload so GameDetailView can serve it locally next time
+    upsert_games([payload])
+    Game.objects.filter(rawg_id=payload["id"]).update(detail=payload, detail_synced_at=timezone.now())
+
+
+def game_to_rawg(game):
+    # local Game -> the RAWG list item shape the frontend expects
+    return {
+        "id": game.rawg_id,
+        "slug": game.slug,
+        "name": game.name,
+        "released": game.released.isoformat() if game.released else None,
+        "background_image": game.background_image,
+        "rating": game.rating,
+        "ratings_count": game.ratings_count,
+        "metacritic": game.metacritic,
+        "added": game.added,
+        "genres": [{"id": g.rawg_id, "name": g.name, "slug": g.slug} for g in game.genres.all()],
+        "platforms": [
+            {"platform": {"id": p.rawg_id, "name": p.name, "slug": p.slug}} for p in game.platforms.all()
+        ],
+    }
+
+
+def game_cards(rawg_ids):
+    # {rawg_id: RAWG list item} for the games found in the local catalog, in three queries
+    games = Game.objects.filter(rawg_id__in=rawg_ids).prefetch_related("genres", "platforms")
+    return {game.rawg_id: game_to_rawg(game) for game in games}
+
+
+def mirror_is_fresh():
+    # True when a complete catalog import finished within GAMES_CATALOG_MAX_AGE (checked at most every 60s);
+    # a --max-pages run only holds part of the catalog and would shrink category pages and search
+    if not settings.GAMES_MIRROR_ENABLED:
+        return False
+    fresh = cache.get("games:mirror:fresh")
+    if fresh is None:
+        cutoff = timezone.now() - timedelta(seconds=settings.GAMES_CATALOG_MAX_AGE)
+        fresh = CatalogImport.objects.filter(complete=True, finished_at__gte=cutoff).exists()
+        cache.set("games:mirror:fresh", fresh, timeout=60)
+    return fresh
+
+
+def local_games_count(field):
+    count = cache.get(f"games:mirror:count:{field}")
+    if count is None:
+        count = Game.objects.filter(**{f"{field}__isnull": False}).count()
+        cache.set(f"games:mirror:count:{field}", count, timeout=300)
+    return count
+
+
+def local_game_list(ordering, page, page_size, page_url=None):
+    # one page of the mirror in RAWG's list response shape (page_url(n) builds next/previous links)
+    # games without a value for the ordering field are skipped so the (-field, id) index is used
+    field = LOCAL_ORDERING.get(ordering, "rating")
+    offset = (page - 1) * page_size
+    games = (
+        Game.objects.filter(**{f"{field}__isnull": False})
+        .order_by(f"-{field}", "id")
+        .prefetch_related("genres", "platforms")[offset:offset + page_size]
+    )
+    count = local_games_count(field)
+    page_url = page_url or (lambda n: None)
+    return {
+        "count": count,
+        "next": page_url(page + 1) if offset + page_size < count else None,
+        "previous": page_url(page - 1) if page > 1 else None,
+        "results": [game_to_rawg(game) for game in games],
+    }
+
+
+def local_game_detail(game_id):
+    # stored RAWG detail payload, or None when it is missing or older than the mirror max age
+    cutoff = timezone.now() - timedelta(seconds=settings.GAMES_MIRROR_MAX_AGE)
+    return (
+        Game.objects.filter(rawg_id=game_id, detail__isnull=False, detail_synced_at__gte=cutoff)
+        .values_list("detail", flat=True)
+        .first()
+    )
@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+from django.utils.http import parse_etags
+
+
+# Strong ETags for the games endpoints. Cache entries carry a hash of their data, computed once
+# when they are stored, so a matching If-None-Match is answered with a 304 straight from the
+# cached entry: no projection, no JSON rendering, and no RAWG call while the entry is cached.
+
+
+def content_hash(data):
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def content_etag(data):
+    return '"%s"' % content_hash(data)
+
+
+def entry_etag(entry, fields=None):
+    # the response is a projection of the entry data, so (entry hash, fields) identifies it
+    data_hash = entry.get("etag") or content_hash(entry["data"])  # entries stored before ETags
+    variant = ",".join(fields) if fields is not None else "all"
+    return '"%s"' % hashlib.sha1(f"{data_hash}:{variant}".encode("utf-8")).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison
+    etags = [e.removeprefix("W/") for e in parse_etags(header)]
+    return "*" in etags or etag in etags
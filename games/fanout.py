@@ -0,0 +1,61 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection
+
+
+# Shared thread pool for issuing independent upstream calls concurrently.
+# Created lazily (and re-created after a fork) so gunicorn workers never share threads.
+# Calls may use the database (local catalog lookups); their connection is closed when they finish.
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.GAMES_FANOUT_WORKERS,
+                thread_name_prefix="games-fanout",
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _closing_connection(fn):
+    def run():
+        try:
+            return fn()
+        finally:
+            connection.close()
+
+    return run
+
+
+def fan_out(calls, timeout=None):
+    """
+    Run each callable in ``calls`` ({name: fn}) concurrently and wait at most ``timeout`` seconds.
+
+    Returns ``(results, errors, missing)``: values of the calls that finished, exceptions of the
+    calls that failed, and the names of calls still running when the deadline passed.
+    """
+    executor = get_executor()
+    futures = {name: executor.submit(_closing_connection(fn)) for name, fn in calls.items()}
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    results, errors, missing = {}, {}, []
+    for name, future in futures.items():
+        if future not in done:
+            future.cancel()
+            missing.append(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+    return results, errors, missing
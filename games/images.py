@@ -0,0 +1,227 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from .singleflight import SingleFlight
+
+
+# Resizing proxy for RAWG artwork (GET /api/games/image/<rendition>.<format>?url=...).
+# The first request for an image downloads it once and writes every rendition in every format
+# to an on-disk store; later requests are a file read. The store is bounded by
+# GAMES_IMAGE_CACHE_MAX_MB and evicts the least recently used files (mtime is bumped on reads).
+# The endpoint is public, so source urls are normalized (no query strings to dodge the store),
+# redirects are not followed and at most GAMES_IMAGE_MAX_RENDERS renders run at once per process.
+
+# name -> bounding box, aspect ratio is kept and images are never upscaled
+RENDITIONS = {
+    "thumb": (320, 180),
+    "card": (640, 360),
+    "hero": (1280, 720),
+}
+
+# extension -> (Pillow format, content type, save options)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class ImageStore:
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def path(self, url, rendition, fmt):
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}-{rendition}.{fmt}"
+
+    def get(self, path):
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file first so readers never see a partial image
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _files(self):
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.glob("*/*") if p.is_file() and p.suffix != ".tmp"]
+
+    def trim(self):
+        """
+        Evict least recently used files once the store is over its budget, down to 90% of it.
+
+        The size is read from disk every time: every worker writes to the same store, so a size
+        kept in one process would miss what the others added. Returns the bytes left on disk.
+        """
+        files = []
+        for p in self._files():
+            try:
+                stat = p.stat()
+            except FileNotFoundError:  # evicted by another worker
+                continue
+            files.append((stat.st_mtime, stat.st_size, p))
+
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return total
+
+        files.sort()
+        target = self.max_bytes * 0.9
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+class ImageError(Exception):
+    pass
+
+
+class ImageBusy(ImageError):
+    # every render slot of this process is taken
+    pass
+
+
+def normalize_source(url):
+    """
+    Canonical https url of an artwork: query and fragment dropped, so every spelling of an image
+    maps to one set of stored renditions. Raises ValueError for other hosts or paths.
+    """
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or parsed.hostname not in settings.GAMES_IMAGE_HOSTS:
+        raise ValueError("url must point at an allowed image host")
+    if not parsed.path.startswith(settings.GAMES_IMAGE_PATH_PREFIX) or "/../" in parsed.path:
+        raise ValueError("url must point at an allowed image path")
+    return f"https://{parsed.hostname}{parsed.path}"
+
+
+_session = requests.Session()
+_flight = SingleFlight()
+_store = None
+_store_lock = threading.Lock()
+_renders = None
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore(settings.GAMES_IMAGE_CACHE_DIR, settings.GAMES_IMAGE_CACHE_MAX_MB * 1024 * 1024)
+        return _store
+
+
+def reset_store():
+    global _store, _renders
+    with _store_lock:
+        _store = None
+        _renders = None
+
+
+def render_slots():
+    global _renders
+    with _store_lock:
+        if _renders is None:
+            _renders = threading.BoundedSemaphore(settings.GAMES_IMAGE_MAX_RENDERS)
+        return _renders
+
+
+def download(url):
+    max_bytes = settings.GAMES_IMAGE_MAX_SOURCE_MB * 1024 * 1024
+    try:
+        with _session.get(
+            url,
+            stream=True,
+            allow_redirects=False,
+            timeout=(settings.RAWG_CONNECT_TIMEOUT, settings.RAWG_READ_TIMEOUT),
+        ) as r:
+            r.raise_for_status()
+            if r.status_code != 200:  # redirects could point anywhere
+                raise ImageError(f"source image answered {r.status_code}")
+            data = io.BytesIO()
+            for chunk in r.iter_content(64 * 1024):
+                data.write(chunk)
+                if data.tell() > max_bytes:
+                    raise ImageError("source image is too large")
+    except requests.exceptions.RequestException as e:
+        raise ImageError(f"could not fetch source image: {e}")
+    return data.getvalue()
+
+
+def render_all(url):
+    # one download -> every rendition in every format, in one of GAMES_IMAGE_MAX_RENDERS slots
+    slots = render_slots()
+    if not slots.acquire(timeout=settings.GAMES_IMAGE_RENDER_WAIT):
+        raise ImageBusy("too many images are being resized, try again shortly")
+    try:
+        store = get_store()
+        try:
+            image = Image.open(io.BytesIO(download(url)))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ImageError(f"could not decode source image: {e}")
+
+        for rendition, size in RENDITIONS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            for fmt, (pil_format, _, options) in FORMATS.items():
+                out = io.BytesIO()
+                resized.save(out, pil_format, **options)
+                store.put(store.path(url, rendition, fmt), out.getvalue())
+    finally:
+        slots.release()
+    store.trim()
+
+
+def get_rendition(url, rendition, fmt):
+    """
+    Path of the stored rendition of ``url``, creating all renditions on first use.
+
+    Raises ValueError for urls outside GAMES_IMAGE_HOSTS / GAMES_IMAGE_PATH_PREFIX, ImageBusy when
+    no render slot frees up and ImageError when the source cannot be fetched or decoded.
+    """
+    url = normalize_source(url)
+    store = get_store()
+    path = store.path(url, rendition, fmt)
+    if store.get(path):
+        return path
+
+    # concurrent requests for any rendition of the same image share one download
+    _flight.do(url, lambda: render_all(url))
+    if not store.get(path):
+        raise ImageError("rendition was evicted right away, GAMES_IMAGE_CACHE_MAX_MB is too small")
+    return path
+
+
+def thumbnail_url(request, url, rendition="card", fmt="webp"):
+    # absolute proxy URL for an artwork url, or None when the proxy is off or the host is not allowed
+    if not url or not settings.GAMES_IMAGE_PROXY:
+        return None
+    try:
+        url = normalize_source(url)
+    except ValueError:
+        return None
+    path = reverse("game_image", kwargs={"rendition": rendition, "fmt": fmt})
+    return request.build_absolute_uri(f"{path}?{urlencode({'url': url})}")
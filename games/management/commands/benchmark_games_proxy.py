@@ -0,0 +1,132 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+from games.async_rawg import reset_async_clients
+from games.cache import games_cache
+from games.rawg import reset_client
+
+
+# Compares the sync (WSGI-style, one blocked thread per request) and async (ASGI) game detail
+# views against a local fake RAWG server with a fixed latency. Every request asks for a
+# different game id so nothing is served from the cache.
+
+
+def fake_rawg_server(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            game_id = self.path.split("?")[0].rstrip("/").split("/")[-1]
+            body = json.dumps({"id": int(game_id) if game_id.isdigit() else 0, "name": "Fake game"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # the default listen backlog of 5 drops connections under the async run
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = "Benchmark sync (WSGI) vs async (ASGI) games proxy throughput against a local fake RAWG."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400, help="Requests per mode")
+        parser.add_argument("--latency", type=float, default=0.2, help="Fake RAWG latency in seconds")
+        parser.add_argument("--workers", type=int, default=8, help="Sync worker threads (like gunicorn workers)")
+        parser.add_argument("--concurrency", type=int, default=200, help="Concurrent requests for the async view")
+
+    def handle(self, *args, **options):
+        server = fake_rawg_server(options["latency"])
+        host, port = server.server_address
+        overrides = override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            RAWG_BASE_URL=f"http://{host}:{port}/api",
+            RAWG_MAX_RETRIES=0,
+            RAWG_RATE_LIMIT=0,
+            RAWG_MONTHLY_QUOTA=0,
+            RAWG_POOL_SIZE=max(options["workers"], 10),
+            RAWG_ASYNC_MAX_CONNECTIONS=options["concurrency"],
+            GAMES_MIRROR_ENABLED=False,
+        )
+
+        self.stdout.write(
+            f"{options['requests']} requests per mode, fake RAWG latency {options['latency'] * 1000:.0f}ms\n"
+        )
+        try:
+            with overrides:
+                reset_client()
+                reset_async_clients()
+                games_cache.clear()
+                self.report(f"sync  ({options['workers']} workers)", self.run_sync(options))
+                games_cache.clear()
+                self.report(f"async (concurrency {options['concurrency']})", self.run_async(options))
+        finally:
+            reset_client()
+            reset_async_clients()
+            games_cache.clear()
+            server.shutdown()
+
+    def run_sync(self, options):
+        local = threading.local()
+
+        def one(game_id):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            start = time.perf_counter()
+            response = local.client.get(f"/api/games/{game_id}/")
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            latencies = list(pool.map(one, range(1, options["requests"] + 1)))
+        return time.perf_counter() - start, latencies
+
+    def run_async(self, options):
+        async def main():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(options["concurrency"])
+            offset = options["requests"]  # different ids than the sync run
+
+            async def one(game_id):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(f"/api/games/async/{offset + game_id}/")
+                    assert response.status_code == 200, response.content
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one(i) for i in range(1, options["requests"] + 1)))
+            return time.perf_counter() - start, latencies
+
+        return asyncio.run(main())
+
+    def report(self, label, result):
+        elapsed, latencies = result
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:<28} {len(latencies) / elapsed:8.1f} req/s   "
+            f"p50 {statistics.median(latencies) * 1000:7.1f}ms   p95 {p95 * 1000:7.1f}ms   "
+            f"total {elapsed:6.2f}s"
+        )
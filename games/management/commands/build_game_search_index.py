@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from games.models import Game
+from games.search import create_search_index
+
+
+class Command(BaseCommand):
+    help = "(Re)build the full-text / trigram title index over the local game catalog."
+
+    def handle(self, *args, **options):
+        create_search_index(connection, rebuild=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Search index rebuilt for {Game.objects.count()} games ({connection.vendor})"
+        ))
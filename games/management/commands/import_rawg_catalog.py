@@ -0,0 +1,109 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from games.catalog import upsert_games
+from games.models import CatalogImport
+from games.rawg import get_client
+
+
+class Command(BaseCommand):
+    help = "Bulk import RAWG catalog pages into the local Game mirror (resumable)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default="default", help="Checkpoint name, one per import job")
+        parser.add_argument("--ordering", default="-added", help="RAWG ordering used to walk the catalog")
+        parser.add_argument("--page-size", type=int, default=40, help="Games per RAWG page (RAWG max is 40)")
+        parser.add_argument("--max-pages", type=int, default=None, help="Stop after this page")
+        parser.add_argument(
+            "--pages", type=int, default=None,
+            help="Import at most this many pages in this run, the next run continues (keeps within the RAWG quota)",
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Pages fetched in parallel")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Games per bulk upsert")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from page 1")
+
+    def handle(self, *args, **options):
+        client = get_client()
+        page_size = options["page_size"]
+        workers = max(options["workers"], 1)
+
+        checkpoint, _ = CatalogImport.objects.get_or_create(name=options["name"])
+        if options["restart"] or checkpoint.finished_at or checkpoint.ordering != options["ordering"]:
+            checkpoint.last_page = 0
+            checkpoint.games_imported = 0
+            checkpoint.finished_at = None
+            checkpoint.complete = False
+        checkpoint.ordering = options["ordering"]
+        checkpoint.page_size = page_size
+
+        def fetch_page(page):
+            return client.get(
+                "games",
+                params={"ordering": options["ordering"], "page_size": page_size, "page": page},
+            )
+
+        try:
+            first = fetch_page(checkpoint.last_page + 1)
+        except requests.exceptions.RequestException as e:
+            raise CommandError(f"RAWG request failed: {e}")
+
+        catalog_pages = math.ceil((first.get("count") or 0) / page_size)
+        total_pages = catalog_pages
+        if options["max_pages"]:
+            total_pages = min(total_pages, options["max_pages"])
+        checkpoint.total_pages = total_pages
+        checkpoint.save()
+        # this run's share of the pages, the checkpoint stays open for the next run
+        stop_page = total_pages
+        if options["pages"]:
+            stop_page = min(total_pages, checkpoint.last_page + options["pages"])
+
+        self.stdout.write(f"Importing pages {checkpoint.last_page + 1}-{stop_page} of {total_pages} with {workers} workers")
+
+        buffer = first.get("results", []) if checkpoint.last_page < stop_page else []
+        next_page = checkpoint.last_page + 2
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # fetch the next window of pages in parallel; map() keeps page order
+                window = list(range(next_page, min(next_page + workers, stop_page + 1)))
+                try:
+                    for data in pool.map(fetch_page, window):
+                        buffer.extend(data.get("results", []))
+                except requests.exceptions.RequestException as e:
+                    # everything before this window is already saved in the checkpoint
+                    self._flush(checkpoint, buffer, options["batch_size"], next_page - 1)
+                    raise CommandError(f"RAWG request failed, resume from page {checkpoint.last_page + 1}: {e}")
+
+                last_page = window[-1] if window else next_page - 1
+                if len(buffer) >= options["batch_size"] or not window:
+                    self._flush(checkpoint, buffer, options["batch_size"], last_page)
+                    buffer = []
+                    self.stdout.write(f"  page {checkpoint.last_page}/{total_pages}, {checkpoint.games_imported} games")
+
+                if not window:
+                    break
+                next_page = last_page + 1
+
+        if checkpoint.last_page < total_pages:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {checkpoint.games_imported} games so far, run again to continue from page {checkpoint.last_page + 1}"
+            ))
+            return
+
+        checkpoint.finished_at = timezone.now()
+        # only a run over every page makes the mirror usable for category pages and search
+        checkpoint.complete = checkpoint.last_page >= catalog_pages
+        checkpoint.save(update_fields=["finished_at", "complete"])
+        cache.delete("games:mirror:fresh")
+        self.stdout.write(self.style.SUCCESS(f"Imported {checkpoint.games_imported} games"))
+
+    def _flush(self, checkpoint, buffer, batch_size, last_page):
+        checkpoint.games_imported += upsert_games(buffer, batch_size=batch_size)
+        checkpoint.last_page = last_page
+        checkpoint.save(update_fields=["games_imported", "last_page"])
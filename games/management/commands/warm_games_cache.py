@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from games.services import ORDERING_MAP
+from games.warmer import warm_games_cache
+
+
+class Command(BaseCommand):
+    help = "Pre-fetch category landing pages and top game details into the games cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--categories",
+            default=",".join(settings.GAMES_WARM_CATEGORIES),
+            help=f"Comma separated categories ({', '.join(ORDERING_MAP)})",
+        )
+        parser.add_argument("--pages", type=int, default=settings.GAMES_WARM_PAGES, help="Pages per category")
+        parser.add_argument("--top", type=int, default=settings.GAMES_WARM_TOP, help="Top rated game details to warm")
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and re-warm every N seconds (entries that would expire before the next run)",
+        )
+
+    def handle(self, *args, **options):
+        categories = [c.strip() for c in options["categories"].split(",") if c.strip()]
+        interval = options["interval"]
+
+        while True:
+            start = time.monotonic()
+            summary = warm_games_cache(categories, options["pages"], options["top"], min_ttl=interval)
+            self.stdout.write(
+                f"Warmed in {time.monotonic() - start:.1f}s: "
+                f"{summary['fetched']} fetched, {summary['fresh']} already fresh"
+            )
+            for name, error in summary["errors"].items():
+                self.stderr.write(f"  {name}: {error}")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('ordering', models.CharField(blank=True, max_length=30)),
+                ('page_size', models.IntegerField(default=40)),
+                ('last_page', models.IntegerField(default=0, help_text='Last page imported without gaps')),
+                ('total_pages', models.IntegerField(blank=True, null=True)),
+                ('games_imported', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rawg_id', models.IntegerField(help_text='RAWG genre ID', unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(blank=True, max_length=120)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Platform',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rawg_id', models.IntegerField(help_text='RAWG platform ID', unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(blank=True, max_length=120)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rawg_id', models.IntegerField(help_text='RAWG game ID', unique=True)),
+                ('slug', models.SlugField(blank=True, max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('released', models.DateField(blank=True, null=True)),
+                ('background_image', models.URLField(blank=True, max_length=500, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('ratings_count', models.IntegerField(default=0)),
+                ('metacritic', models.IntegerField(blank=True, null=True)),
+                ('added', models.IntegerField(default=0)),
+                ('detail', models.JSONField(blank=True, null=True)),
+                ('detail_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('genres', models.ManyToManyField(blank=True, related_name='games', to='games.genre')),
+                ('platforms', models.ManyToManyField(blank=True, related_name='games', to='games.platform')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rating', 'id'], name='game_rating_idx'), models.Index(fields=['-released', 'id'], name='game_released_idx'), models.Index(fields=['-metacritic', 'id'], name='game_metacritic_idx')],
+            },
+        ),
+    ]
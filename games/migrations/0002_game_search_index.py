@@ -0,0 +1,76 @@
+from django.db import DatabaseError, migrations, transaction
+
+
+# Full-text / trigram index on Game.name, see games/search.py
+# (vendor specific, so it is created with raw SQL instead of Meta.indexes; the statements are
+# copied here so later changes to games/search.py do not change this migration)
+
+POSTGRES_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS game_name_tsv_idx ON games_game USING gin (to_tsvector('simple', name))",
+]
+
+POSTGRES_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS game_name_trgm_idx ON games_game USING gin (name gin_trgm_ops)",
+]
+
+SQLITE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS games_game_fts USING fts5("
+    "name, content='games_game', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_ai AFTER INSERT ON games_game BEGIN "
+    "INSERT INTO games_game_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_ad AFTER DELETE ON games_game BEGIN "
+    "INSERT INTO games_game_fts(games_game_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_au AFTER UPDATE OF name ON games_game BEGIN "
+    "INSERT INTO games_game_fts(games_game_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO games_game_fts(rowid, name) VALUES (new.id, new.name); END",
+    "INSERT INTO games_game_fts(games_game_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS game_name_tsv_idx",
+    "DROP INDEX IF EXISTS game_name_trgm_idx",
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS games_game_fts_ai",
+    "DROP TRIGGER IF EXISTS games_game_fts_ad",
+    "DROP TRIGGER IF EXISTS games_game_fts_au",
+    "DROP TABLE IF EXISTS games_game_fts",
+]
+
+
+def create_index(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for sql in POSTGRES_INDEX_SQL:
+                cursor.execute(sql)
+            try:
+                with transaction.atomic(using=conn.alias):
+                    for sql in POSTGRES_TRIGRAM_SQL:
+                        cursor.execute(sql)
+            except DatabaseError:
+                pass  # no pg_trgm: search is not typo tolerant
+        elif conn.vendor == "sqlite":
+            for sql in SQLITE_INDEX_SQL:
+                cursor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    conn = schema_editor.connection
+    statements = {"postgresql": POSTGRES_DROP_SQL, "sqlite": SQLITE_DROP_SQL}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_game_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.IntegerField(help_text='RAWG game ID')),
+                ('similar_game_id', models.IntegerField(help_text='RAWG game ID')),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'verbose_name_plural': 'game similarities',
+                'unique_together': {('game_id', 'similar_game_id')},
+            },
+        ),
+    ]
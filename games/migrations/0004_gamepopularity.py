@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_gamesimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GamePopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.IntegerField(help_text='RAWG game ID', unique=True)),
+                ('favorite_count', models.IntegerField(default=0)),
+                ('wishlist_count', models.IntegerField(default=0)),
+                ('played_count', models.IntegerField(default=0)),
+                ('trend', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'game popularity',
+                'indexes': [models.Index(fields=['-trend'], name='game_popularity_trend_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_gamepopularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogimport',
+            name='complete',
+            field=models.BooleanField(default=False),
+        ),
+    ]
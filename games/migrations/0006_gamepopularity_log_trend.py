@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:21
+
+import math
+
+from django.db import migrations, models
+
+
+def trend_to_log(apps, schema_editor):
+    # the column now holds log2 of the old value; no activity is NULL instead of 0
+    GamePopularity = apps.get_model('games', 'GamePopularity')
+    for row in GamePopularity.objects.only('trend').iterator():
+        row.trend = math.log2(row.trend) if row.trend and row.trend > 0 else None
+        row.save(update_fields=['trend'])
+
+
+def trend_from_log(apps, schema_editor):
+    GamePopularity = apps.get_model('games', 'GamePopularity')
+    for row in GamePopularity.objects.only('trend').iterator():
+        row.trend = 2 ** row.trend if row.trend is not None else 0
+        row.save(update_fields=['trend'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_catalogimport_complete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamepopularity',
+            name='trend',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(trend_to_log, trend_from_log),
+    ]
@@ -1,3 +1,99 @@
 from django.db import models
 
 # Create your models here.
+
+# Local mirror of the RAWG catalog, filled by `manage.py import_rawg_catalog`
+# and by RAWG responses the app already fetches.
+
+class Genre(models.Model):
+    rawg_id = models.IntegerField(unique=True, help_text='RAWG genre ID')
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=120, blank=True)
+
+    def __str__(self):
+        return self.name
+
+class Platform(models.Model):
+    rawg_id = models.IntegerField(unique=True, help_text='RAWG platform ID')
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=120, blank=True)
+
+    def __str__(self):
+        return self.name
+
+class Game(models.Model):
+    rawg_id = models.IntegerField(unique=True, help_text='RAWG game ID')
+    slug = models.SlugField(max_length=255, blank=True)
+    name = models.CharField(max_length=255)
+    released = models.DateField(blank=True, null=True)
+    background_image = models.URLField(max_length=500, blank=True, null=True)
+    rating = models.FloatField(blank=True, null=True)
+    ratings_count = models.IntegerField(default=0)
+    metacritic = models.IntegerField(blank=True, null=True)
+    added = models.IntegerField(default=0)
+    genres = models.ManyToManyField(Genre, blank=True, related_name='games')
+    platforms = models.ManyToManyField(Platform, blank=True, related_name='games')
+    # full RAWG detail payload, stored the first time the detail endpoint fetches it
+    detail = models.JSONField(blank=True, null=True)
+    detail_synced_at = models.DateTimeField(blank=True, null=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # one index per category ordering used by GameSearchView
+        indexes = [
+            models.Index(fields=['-rating', 'id'], name='game_rating_idx'),
+            models.Index(fields=['-released', 'id'], name='game_released_idx'),
+            models.Index(fields=['-metacritic', 'id'], name='game_metacritic_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.rawg_id})"
+
+class GameSimilarity(models.Model):
+    # top-K games found in the same libraries as game_id (cosine similarity over library items),
+    # precomputed by `manage.py build_game_similarities`; both ids are RAWG ids
+    game_id = models.IntegerField(help_text='RAWG game ID')
+    similar_game_id = models.IntegerField(help_text='RAWG game ID')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('game_id', 'similar_game_id')
+        verbose_name_plural = 'game similarities'
+
+    def __str__(self):
+        return f"{self.game_id} ~ {self.similar_game_id} ({self.score:.3f})"
+
+class GamePopularity(models.Model):
+    # per-game library counters, kept current by library signals (library/popularity.py) and
+    # corrected by `manage.py reconcile_game_popularity`; game_id is the RAWG id
+    game_id = models.IntegerField(unique=True, help_text='RAWG game ID')
+    favorite_count = models.IntegerField(default=0)
+    wishlist_count = models.IntegerField(default=0)
+    played_count = models.IntegerField(default=0)
+    # log2 of the time-decayed activity scaled to a fixed epoch, NULL without any activity
+    trend = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trend'], name='game_popularity_trend_idx'),
+        ]
+        verbose_name_plural = 'game popularity'
+
+    def __str__(self):
+        return f"{self.game_id}: {self.favorite_count}/{self.wishlist_count}/{self.played_count}"
+
+class CatalogImport(models.Model):
+    # resumable checkpoint for a catalog import run
+    name = models.CharField(max_length=50, unique=True)
+    ordering = models.CharField(max_length=30, blank=True)
+    page_size = models.IntegerField(default=40)
+    last_page = models.IntegerField(default=0, help_text='Last page imported without gaps')
+    total_pages = models.IntegerField(blank=True, null=True)
+    games_imported = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # every catalog page was imported (not a --max-pages run), only then is the mirror used
+    complete = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.name}: page {self.last_page}/{self.total_pages or '?'}"
@@ -0,0 +1,66 @@
+# Server-side field projection for RAWG payloads.
+#
+# RAWG returns far more than the frontend renders (descriptions in two formats, ratings
+# breakdowns, stores, tags, platform requirements...). Responses are reduced to a profile
+# by default; clients can ask for other keys with ?fields=a,b,c or for everything with ?fields=all.
+
+CARD_FIELDS = ("id", "slug", "name", "released", "background_image", "rating", "metacritic", "genres", "platforms")
+
+DETAIL_FIELDS = CARD_FIELDS + ("description_raw",)
+
+PROFILES = {
+    "card": CARD_FIELDS,
+    "detail": DETAIL_FIELDS,
+}
+
+LIST_KEYS = ("count", "next", "previous", "results")
+
+
+def _slim_named(item):
+    return {key: item.get(key) for key in ("id", "name", "slug")}
+
+
+def _slim_platform(entry):
+    # list/detail payloads wrap platforms as {"platform": {...}, "requirements": ..., ...}
+    return {"platform": _slim_named(entry.get("platform") or entry)}
+
+
+NESTED = {
+    "genres": lambda items: [_slim_named(g) for g in items or []],
+    "platforms": lambda items: [_slim_platform(p) for p in items or []],
+}
+
+
+def parse_fields(value, default):
+    """
+    ?fields= value -> tuple of keys, or None for the full payload.
+    Accepts a profile name ("card", "detail"), "all", or a comma separated key list.
+    """
+    value = (value or "").strip()
+    if not value:
+        return PROFILES[default]
+    if value == "all":
+        return None
+    if value in PROFILES:
+        return PROFILES[value]
+    return tuple(key.strip() for key in value.split(",") if key.strip())
+
+
+def project(game, fields):
+    if fields is None:
+        return game
+    projected = {}
+    for key in fields:
+        if key in game:
+            value = game[key]
+            projected[key] = NESTED[key](value) if key in NESTED else value
+    return projected
+
+
+def project_list(data, fields):
+    # RAWG list response -> only the paging keys, with every result projected
+    if fields is None:
+        return data
+    slim = {key: data[key] for key in LIST_KEYS if key in data}
+    slim["results"] = [project(game, fields) for game in data.get("results") or []]
+    return slim
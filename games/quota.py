@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.utils import timezone
+
+
+# Shared RAWG call budget, kept in the Django cache so every worker sees the same counters
+# (only truly shared when CACHES points at redis):
+#   - a per-second rate limit (one counter per one-second window, waiting up to
+#     RAWG_RATE_LIMIT_WAIT for a free slot)
+#   - the monthly quota of our API key (RAWG_MONTHLY_QUOTA calls per calendar month)
+#   - a circuit breaker: after RAWG_BREAKER_THRESHOLD consecutive failures RAWG is not called
+#     for RAWG_BREAKER_COOLDOWN seconds, then a single probe request decides whether to close it
+#
+# Calls that are refused raise RawgUnavailable, which the views turn into stale data or a 503.
+# The a* methods are the same checks for the async client, on the async cache API so the event
+# loop never blocks on a cache round trip.
+
+
+class RawgUnavailable(requests.exceptions.RequestException):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(status_code):
+    # what counts against the breaker: rate limiting and server errors, not 404s
+    return status_code == 429 or status_code in range(500, 600)
+
+
+class RawgBudget:
+    prefix = "rawg:budget"
+
+    def key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _incr(self, key, delta=1, timeout=None):
+        shared_cache.add(key, 0, timeout=timeout)
+        try:
+            return shared_cache.incr(key, delta)
+        except ValueError:
+            # expired between add() and incr()
+            shared_cache.set(key, delta, timeout=timeout)
+            return delta
+
+    async def _aincr(self, key, delta=1, timeout=None):
+        await shared_cache.aadd(key, 0, timeout=timeout)
+        try:
+            return await shared_cache.aincr(key, delta)
+        except ValueError:
+            await shared_cache.aset(key, delta, timeout=timeout)
+            return delta
+
+    # --- monthly quota ---
+
+    def quota_key(self):
+        return self.key(f"quota:{timezone.now():%Y-%m}")
+
+    def quota_used(self):
+        return shared_cache.get(self.quota_key(), 0)
+
+    def _check_quota(self):
+        quota = settings.RAWG_MONTHLY_QUOTA
+        if quota and self.quota_used() >= quota:
+            raise RawgUnavailable("RAWG monthly quota exhausted", retry_after=3600)
+
+    async def _acheck_quota(self):
+        quota = settings.RAWG_MONTHLY_QUOTA
+        if quota and await shared_cache.aget(self.quota_key(), 0) >= quota:
+            raise RawgUnavailable("RAWG monthly quota exhausted", retry_after=3600)
+
+    def record_usage(self, calls=1):
+        # retries are real RAWG calls too, callers pass the number of attempts
+        self._incr(self.quota_key(), calls, timeout=60 * 60 * 24 * 32)
+
+    async def arecord_usage(self, calls=1):
+        await self._aincr(self.quota_key(), calls, timeout=60 * 60 * 24 * 32)
+
+    # --- per-second rate limit ---
+
+    def _take_slot(self):
+        # returns 0 when the call may go ahead, otherwise seconds until the next window
+        limit = settings.RAWG_RATE_LIMIT
+        if not limit:
+            return 0
+        now = time.time()
+        window = int(now)
+        if self._incr(self.key(f"rate:{window}"), timeout=2) <= limit:
+            return 0
+        return window + 1 - now
+
+    async def _atake_slot(self):
+        limit = settings.RAWG_RATE_LIMIT
+        if not limit:
+            return 0
+        now = time.time()
+        window = int(now)
+        if await self._aincr(self.key(f"rate:{window}"), timeout=2) <= limit:
+            return 0
+        return window + 1 - now
+
+    # --- circuit breaker ---
+
+    def breaker_state(self):
+        if shared_cache.get(self.key("breaker:open")) is not None:
+            return "open"
+        if shared_cache.get(self.key("breaker:failures"), 0) >= settings.RAWG_BREAKER_THRESHOLD:
+            return "half_open"
+        return "closed"
+
+    def _check_breaker(self):
+        opened_until = shared_cache.get(self.key("breaker:open"))
+        if opened_until is not None:
+            raise RawgUnavailable("RAWG circuit breaker is open", retry_after=max(int(opened_until - time.time()), 1))
+        if self.breaker_state() == "half_open":
+            # after the cooldown only one request (across all workers) tries RAWG again
+            if not shared_cache.add(self.key("breaker:probe"), 1, timeout=settings.RAWG_READ_TIMEOUT + 5):
+                raise RawgUnavailable("RAWG circuit breaker is half open", retry_after=1)
+
+    async def _acheck_breaker(self):
+        values = await shared_cache.aget_many([self.key("breaker:open"), self.key("breaker:failures")])
+        opened_until = values.get(self.key("breaker:open"))
+        if opened_until is not None:
+            raise RawgUnavailable("RAWG circuit breaker is open", retry_after=max(int(opened_until - time.time()), 1))
+        if values.get(self.key("breaker:failures"), 0) >= settings.RAWG_BREAKER_THRESHOLD:
+            if not await shared_cache.aadd(self.key("breaker:probe"), 1, timeout=settings.RAWG_READ_TIMEOUT + 5):
+                raise RawgUnavailable("RAWG circuit breaker is half open", retry_after=1)
+
+    def record_success(self):
+        if shared_cache.get(self.key("breaker:failures")):
+            shared_cache.set(self.key("breaker:failures"), 0, timeout=None)
+        shared_cache.delete(self.key("breaker:probe"))
+
+    async def arecord_success(self):
+        if await shared_cache.aget(self.key("breaker:failures")):
+            await shared_cache.aset(self.key("breaker:failures"), 0, timeout=None)
+        await shared_cache.adelete(self.key("breaker:probe"))
+
+    def record_failure(self):
+        failures = self._incr(self.key("breaker:failures"))
+        if failures >= settings.RAWG_BREAKER_THRESHOLD:
+            cooldown = settings.RAWG_BREAKER_COOLDOWN
+            shared_cache.set(self.key("breaker:open"), time.time() + cooldown, timeout=cooldown)
+        shared_cache.delete(self.key("breaker:probe"))
+
+    async def arecord_failure(self):
+        failures = await self._aincr(self.key("breaker:failures"))
+        if failures >= settings.RAWG_BREAKER_THRESHOLD:
+            cooldown = settings.RAWG_BREAKER_COOLDOWN
+            await shared_cache.aset(self.key("breaker:open"), time.time() + cooldown, timeout=cooldown)
+        await shared_cache.adelete(self.key("breaker:probe"))
+
+    # --- entry points for the clients ---
+
+    def acquire(self):
+        # call before every RAWG request; raises RawgUnavailable instead of calling RAWG
+        self._check_breaker()
+        self._check_quota()
+        deadline = time.monotonic() + settings.RAWG_RATE_LIMIT_WAIT
+        while True:
+            wait = self._take_slot()
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RawgUnavailable("RAWG rate limit reached", retry_after=1)
+            time.sleep(wait)
+
+    async def aacquire(self):
+        # same as acquire() for the async client, sleeping without blocking the event loop
+        await self._acheck_breaker()
+        await self._acheck_quota()
+        deadline = time.monotonic() + settings.RAWG_RATE_LIMIT_WAIT
+        while True:
+            wait = await self._atake_slot()
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RawgUnavailable("RAWG rate limit reached", retry_after=1)
+            await asyncio.sleep(wait)
+
+    def status(self):
+        opened_until = shared_cache.get(self.key("breaker:open"))
+        return {
+            "quota": {
+                "month": f"{timezone.now():%Y-%m}",
+                "used": self.quota_used(),
+                "limit": settings.RAWG_MONTHLY_QUOTA or None,
+            },
+            "rate_limit": {
+                "per_second": settings.RAWG_RATE_LIMIT or None,
+                "current_second": shared_cache.get(self.key(f"rate:{int(time.time())}"), 0),
+            },
+            "breaker": {
+                "state": self.breaker_state(),
+                "consecutive_failures": shared_cache.get(self.key("breaker:failures"), 0),
+                "threshold": settings.RAWG_BREAKER_THRESHOLD,
+                "open_for": max(int(opened_until - time.time()), 0) if opened_until else 0,
+            },
+        }
+
+
+rawg_budget = RawgBudget()
@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .quota import is_upstream_failure, rawg_budget
+
+logger = logging.getLogger(__name__)
+
+
+# Single entry point for every RAWG call.
+# Each process owns one pooled requests.Session (keep-alive connections are reused between
+# requests), with connect/read timeouts and bounded retries with backoff on 429/5xx.
+# Every call first goes through the shared rate limit / quota / circuit breaker (games/quota.py).
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CappedRetry(Retry):
+    # honour Retry-After, but never hold the worker longer than RAWG_MAX_RETRY_AFTER seconds
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, settings.RAWG_MAX_RETRY_AFTER)
+
+
+class RawgClient:
+    def __init__(
+        self,
+        base_url=None,
+        api_key=None,
+        pool_size=None,
+        connect_timeout=None,
+        read_timeout=None,
+        max_retries=None,
+        backoff=None,
+    ):
+        self.base_url = (base_url or settings.RAWG_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.RAWG_API_KEY
+        self.timeout = (
+            connect_timeout or settings.RAWG_CONNECT_TIMEOUT,
+            read_timeout or settings.RAWG_READ_TIMEOUT,
+        )
+        pool_size = pool_size or settings.RAWG_POOL_SIZE
+        max_retries = settings.RAWG_MAX_RETRIES if max_retries is None else max_retries
+
+        retry = CappedRetry(
+            total=max_retries,
+            backoff_factor=settings.RAWG_RETRY_BACKOFF if backoff is None else backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # hand the last response back so raise_for_status() reports it
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def get(self, path, params=None):
+        # GET <base_url>/<path> and return the decoded JSON, raising requests exceptions on failure
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        rawg_budget.acquire()
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = self.session.get(
+                url,
+                params={"key": self.api_key, **(params or {})},
+                timeout=self.timeout,
+            )
+            retries = getattr(response.raw, "retries", None)
+            rawg_budget.record_usage(1 + len(retries.history) if retries is not None else 1)
+            if is_upstream_failure(response.status_code):
+                rawg_budget.record_failure()
+            else:
+                rawg_budget.record_success()
+            response.raise_for_status()
+            return response.json()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            failed = True
+            rawg_budget.record_usage()
+            rawg_budget.record_failure()
+            raise
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(elapsed_ms, failed)
+            logger.debug("RAWG GET %s took %.1fms%s", path, elapsed_ms, " (failed)" if failed else "")
+
+    def game(self, game_id):
+        return self.get(f"games/{game_id}")
+
+    def _record(self, elapsed_ms, failed):
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["errors"] += int(failed)
+            self._stats["total_ms"] += elapsed_ms
+            self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # one client per process; a forked worker builds its own session instead of sharing sockets
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = RawgClient()
+            _client_pid = os.getpid()
+        return _client
+
+
+def reset_client():
+    # drop the per-process client, e.g. after changing RAWG settings in tests or benchmarks
+    global _client
+    with _client_lock:
+        _client = None
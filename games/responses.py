@@ -0,0 +1,75 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .catalog import game_cards
+from .images import thumbnail_url
+from .projection import project, project_list
+
+
+# Response building shared by the sync views (games/views.py), the async views
+# (games/async_views.py) and library's views, so every server returns the same payloads.
+
+
+def with_thumbnail(request, game):
+    # proxied, resized copy of the artwork for cards (see games/images.py)
+    if "background_image" not in game:
+        return game
+    return {**game, "thumbnail": thumbnail_url(request, game["background_image"])}
+
+
+def scored_cards(request, scored, fields):
+    # [(rawg_id, score)] -> cards with a "score", for games in the local catalog
+    cards = game_cards([game_id for game_id, _ in scored])
+    return [
+        {**with_thumbnail(request, project(cards[game_id], fields)), "score": round(score, 4)}
+        for game_id, score in scored
+        if game_id in cards
+    ]
+
+
+def wants_library(request):
+    return request.GET.get("with_library") in ("true", "1")
+
+
+def library_etag(etag, user):
+    # the annotated response also changes with the user's library (its version bumps on every write)
+    from library.cache import library_version  # library depends on games, not the other way round
+
+    if not user.is_authenticated:
+        return etag
+    raw = f"{etag}:{user.pk}:{library_version(user.pk)}"
+    return '"%s"' % hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def with_library(user, data):
+    # ?with_library=true: add the user's statuses to every result, one indexed query for the page
+    from library.models import library_statuses
+
+    if not user.is_authenticated:
+        return data
+    results = data.get("results") or []
+    statuses = library_statuses(user, [game["id"] for game in results if "id" in game])
+    return {**data, "results": [{**game, "library": statuses.get(game.get("id"))} for game in results]}
+
+
+def private_response(response):
+    # per-user responses: browsers revalidate, shared caches must not store them
+    patch_vary_headers(response, ["Authorization"])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def parse_limit(request, default, maximum):
+    try:
+        return max(1, min(int(request.GET.get("limit", default)), maximum))
+    except ValueError:
+        return default
+
+
+def search_page(request, data, fields, user=None):
+    # a cached search page as the views return it: projected, with card thumbnails and, for
+    # ?with_library=true (``user`` given), the user's statuses; with_library queries the database
+    data = project_list(data, fields)
+    data = {**data, "results": [with_thumbnail(request, game) for game in data.get("results") or []]}
+    return with_library(user, data) if user is not None else data
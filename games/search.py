@@ -0,0 +1,211 @@
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .catalog import LOCAL_ORDERING, game_to_rawg
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+
+# Title search over the local catalog (games.Game)
+#   - PostgreSQL: to_tsvector('simple', name) GIN index for full-text matches, plus a pg_trgm
+#     GIN index for typo tolerance (word similarity)
+#   - SQLite (dev/tests): an external-content FTS5 table with the trigram tokenizer, candidates
+#     are re-ranked by trigram word similarity in Python
+# The index structures are created by migration 0002 and can be rebuilt with
+# `manage.py build_game_search_index`.
+
+TSVECTOR = "to_tsvector('simple', \"games_game\".\"name\")"
+
+POSTGRES_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS game_name_tsv_idx ON games_game USING gin (to_tsvector('simple', name))",
+]
+
+POSTGRES_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS game_name_trgm_idx ON games_game USING gin (name gin_trgm_ops)",
+]
+
+SQLITE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS games_game_fts USING fts5("
+    "name, content='games_game', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_ai AFTER INSERT ON games_game BEGIN "
+    "INSERT INTO games_game_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_ad AFTER DELETE ON games_game BEGIN "
+    "INSERT INTO games_game_fts(games_game_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS games_game_fts_au AFTER UPDATE OF name ON games_game BEGIN "
+    "INSERT INTO games_game_fts(games_game_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO games_game_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS games_game_fts_ai",
+    "DROP TRIGGER IF EXISTS games_game_fts_ad",
+    "DROP TRIGGER IF EXISTS games_game_fts_au",
+    "DROP TABLE IF EXISTS games_game_fts",
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS game_name_tsv_idx",
+    "DROP INDEX IF EXISTS game_name_trgm_idx",
+]
+
+# max candidates re-ranked in Python on SQLite
+SQLITE_CANDIDATES = 200
+
+
+def create_search_index(conn, rebuild=False):
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for sql in POSTGRES_INDEX_SQL:
+                cursor.execute(sql)
+            try:
+                with transaction.atomic(using=conn.alias):
+                    for sql in POSTGRES_TRIGRAM_SQL:
+                        cursor.execute(sql)
+            except DatabaseError:
+                logger.warning("pg_trgm is not available, game search will not be typo tolerant")
+            if rebuild:
+                cursor.execute("REINDEX TABLE games_game")
+        elif conn.vendor == "sqlite":
+            if rebuild:
+                for sql in SQLITE_DROP_SQL:
+                    cursor.execute(sql)
+            for sql in SQLITE_INDEX_SQL:
+                cursor.execute(sql)
+            cursor.execute("INSERT INTO games_game_fts(games_game_fts) VALUES ('rebuild')")
+
+
+def drop_search_index(conn):
+    statements = {"postgresql": POSTGRES_DROP_SQL, "sqlite": SQLITE_DROP_SQL}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def normalize(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def trigrams(text):
+    # pg_trgm style trigrams: each word padded with two spaces in front and one behind
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query, name):
+    # share of the query trigrams found in the title (like pg_trgm word_similarity)
+    query_grams = trigrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & trigrams(name)) / len(query_grams)
+
+
+def has_trigram(conn):
+    if not hasattr(conn, "_games_has_pg_trgm"):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            conn._games_has_pg_trgm = cursor.fetchone() is not None
+    return conn._games_has_pg_trgm
+
+
+def _order_fields(ordering):
+    # explicit category ordering first, relevance breaks ties
+    field = LOCAL_ORDERING.get(ordering)
+    return [F(field).desc(nulls_last=True)] if field else []
+
+
+def _prefix_tsquery(query):
+    # every word must match, the words typed so far may be prefixes ("zel bre" -> zel:* & bre:*)
+    return " & ".join(f"{word}:*" for word in normalize(query).split())
+
+
+def _postgres_search(query, ordering):
+    tsquery = _prefix_tsquery(query)
+    rank = RawSQL(f"ts_rank({TSVECTOR}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField())
+    matches = Q(RawSQL(f"{TSVECTOR} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()))
+
+    qs = Game.objects.annotate(rank=rank)
+    if has_trigram(connection):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        min_similarity = settings.GAMES_SEARCH_MIN_SIMILARITY
+        # %> (indexed) only matches above pg_trgm's own threshold, 0.6 unless configured
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(min_similarity)])
+        qs = qs.annotate(similarity=TrigramWordSimilarity(query, "name"))
+        matches |= Q(name__trigram_word_similar=query, similarity__gte=min_similarity)
+        relevance = [F("rank").desc(), F("similarity").desc()]
+    else:
+        relevance = [F("rank").desc()]
+
+    qs = qs.filter(matches).order_by(*_order_fields(ordering), *relevance, F("added").desc(), "id")
+    return qs.count(), qs
+
+
+def _sqlite_search(query, ordering):
+    grams = sorted(g.strip() for g in trigrams(query) if len(g.strip()) == 3)
+    with connection.cursor() as cursor:
+        if grams:
+            match = " OR ".join(f'"{g}"' for g in grams)
+            cursor.execute(
+                "SELECT rowid FROM games_game_fts WHERE games_game_fts MATCH %s ORDER BY bm25(games_game_fts) LIMIT %s",
+                [match, SQLITE_CANDIDATES],
+            )
+        else:
+            # words shorter than a trigram: prefix match on the title
+            term = normalize(query)
+            cursor.execute(
+                "SELECT id FROM games_game WHERE name LIKE %s OR name LIKE %s LIMIT %s",
+                [f"{term}%", f"% {term}%", SQLITE_CANDIDATES],
+            )
+        candidate_ids = [row[0] for row in cursor.fetchall()]
+
+    candidates = Game.objects.filter(id__in=candidate_ids).values("id", "name", "added", *LOCAL_ORDERING.values())
+    scored = []
+    for game in candidates:
+        similarity = word_similarity(query, game["name"])
+        if similarity >= settings.GAMES_SEARCH_MIN_SIMILARITY:
+            scored.append((similarity, game))
+
+    scored.sort(key=lambda s: (s[0], s[1]["added"]), reverse=True)
+    field = LOCAL_ORDERING.get(ordering)
+    if field:
+        # category ordering with missing values last, relevance breaks ties (sort is stable)
+        with_value = [s for s in scored if s[1][field] is not None]
+        with_value.sort(key=lambda s: s[1][field], reverse=True)
+        scored = with_value + [s for s in scored if s[1][field] is None]
+
+    ids = [game["id"] for _, game in scored]
+    return len(ids), ids
+
+
+def search_games(query, ordering=None, page=1, page_size=10, page_url=None):
+    """
+    Search local game titles; returns a RAWG shaped page ({count, next, previous, results}).
+    """
+    offset = (page - 1) * page_size
+    if connection.vendor == "postgresql":
+        count, qs = _postgres_search(query, ordering)
+        games = list(qs.prefetch_related("genres", "platforms")[offset:offset + page_size])
+    else:
+        count, ids = _sqlite_search(query, ordering)
+        page_ids = ids[offset:offset + page_size]
+        by_id = Game.objects.prefetch_related("genres", "platforms").in_bulk(page_ids)
+        games = [by_id[i] for i in page_ids if i in by_id]
+
+    page_url = page_url or (lambda n: None)
+    return {
+        "count": count,
+        "next": page_url(page + 1) if offset + page_size < count else None,
+        "previous": page_url(page - 1) if page > 1 else None,
+        "results": [game_to_rawg(game) for game in games],
+    }
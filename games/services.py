@@ -0,0 +1,199 @@
+import time
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+
+from .cache import games_cache
+from .catalog import local_game_detail, local_game_list, mirror_is_fresh, save_detail, upsert_games
+from .fanout import fan_out
+from .rawg import get_client
+from .search import search_games
+from .singleflight import rawg_flight
+
+
+# Request normalization and local catalog lookups shared by the sync views, the async views
+# and the cache warmer (games/warmer.py), so every code path builds the same RAWG params and cache keys.
+
+SEARCH_PAGE_SIZE = 10
+
+# Map category names to RAWG ordering
+ORDERING_MAP = {
+    "popular": "-rating",      # Most Popular
+    "new": "-released",        # New Releases
+    "average": "-metacritic",  # Average rating
+}
+
+# response key -> RAWG sub resource
+MEDIA_PARTS = {
+    "screenshots": "screenshots",
+    "trailers": "movies",
+    "youtube": "youtube",
+}
+
+
+class SearchRequest:
+    def __init__(self, query="", page=1, category=""):
+        self.query = " ".join((query or "").split())
+        category = (category or "").strip().lower()
+        try:
+            self.page = max(int(page), 1)
+        except (TypeError, ValueError):
+            self.page = 1
+
+        self.params = {
+            "page_size": SEARCH_PAGE_SIZE,
+            "page": self.page,
+        }
+
+        # Use RAWG search when user types a query
+        if self.query:
+            self.params["search"] = self.query
+
+        self.ordering = ORDERING_MAP.get(category)
+
+        # Default to popular if no query or ordering is specified
+        if not self.query and not self.ordering:
+            self.ordering = "-rating"
+
+        if self.ordering:
+            self.params["ordering"] = self.ordering
+        # the category name of the ordering actually used (the default is "popular")
+        self.category = next((name for name, value in ORDERING_MAP.items() if value == self.ordering), "")
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        return cls(
+            query=query_params.get("query", ""),
+            page=query_params.get("page", 1),
+            category=query_params.get("category", ""),
+        )
+
+    def page_url(self, n):
+        # next/previous links of local pages; built from the normalized request only, because the
+        # page is cached under cache_params and served to every request (and warmer run) mapping to it
+        params = {"query": self.query, "category": self.category, "page": n}
+        return f"{reverse('game_search')}?{urlencode({k: v for k, v in params.items() if v})}"
+
+    @property
+    def cache_params(self):
+        # cache key is the normalized params (case-insensitive query), never the API key
+        if self.query:
+            return {**self.params, "search": self.query.lower()}
+        return self.params
+
+
+def local_search_page(search, page_url=None):
+    # category pages and title searches come from the local catalog mirror while it is fresh
+    if not mirror_is_fresh():
+        return None
+    if not search.query:
+        return local_game_list(search.ordering, search.page, SEARCH_PAGE_SIZE, page_url=page_url)
+    if settings.GAMES_LOCAL_SEARCH:
+        return search_games(search.query, search.ordering, search.page, SEARCH_PAGE_SIZE, page_url=page_url)
+    return None
+
+
+def local_detail(game_id):
+    # stored details carry their own sync time (GAMES_MIRROR_MAX_AGE), no catalog import needed
+    if not settings.GAMES_MIRROR_ENABLED:
+        return None
+    return local_game_detail(game_id)
+
+
+def remember_search_results(data):
+    # remember every game RAWG shows us so the local search index keeps growing
+    if settings.GAMES_MIRROR_ENABLED:
+        upsert_games(data.get("results") or [])
+
+
+def remember_detail(data):
+    if settings.GAMES_MIRROR_ENABLED:
+        save_detail(data)
+
+
+def fetch_search(search, page_url=None):
+    # a search page from the local catalog when possible, otherwise from RAWG
+    data = local_search_page(search, page_url=page_url)
+    if data is None:
+        data = get_client().get("games", params=search.params)
+        remember_search_results(data)
+    return data
+
+
+def fetch_detail(game_id):
+    data = local_detail(game_id)
+    if data is None:
+        data = get_client().game(game_id)
+        remember_detail(data)
+    return data
+
+
+def fetch_media(game_id, path):
+    # identical media calls in flight in this process share one RAWG request
+    return rawg_flight.do(
+        f"media:{game_id}:{path}",
+        lambda: get_client().get(f"games/{game_id}/{path}").get("results", []),
+    )
+
+
+def fetch_bundle(game_id):
+    # detail (through the detail cache) and every media part, concurrently;
+    # media parts that failed or missed RAWG_MEDIA_DEADLINE are empty and listed in "missing"
+    def fetch_game():
+        return games_cache.get_or_fetch("detail", {"id": game_id}, lambda: fetch_detail(game_id))
+
+    calls = {"game": fetch_game}
+    for name, path in MEDIA_PARTS.items():
+        calls[name] = lambda path=path: fetch_media(game_id, path)
+
+    results, errors, missing = fan_out(calls, timeout=settings.RAWG_MEDIA_DEADLINE)
+    if "game" in errors:
+        raise errors["game"]
+    if "game" in missing:
+        # the detail is not held to the media deadline: like GET /api/games/<id>/ it is only
+        # bounded by the RAWG timeouts (and joins the call still running through single flight)
+        results["game"] = fetch_game()
+
+    bundle = {"game": results["game"]}
+    for name in MEDIA_PARTS:
+        bundle[name] = results.get(name, [])
+    bundle["missing"] = [name for name in MEDIA_PARTS if name not in results]
+    return bundle
+
+
+def fetch_details(game_ids, workers=None, deadline=None):
+    """
+    Detail cache entries for many games: ``({id: entry}, {str(id): error message})``.
+
+    Ids are spread over at most ``workers`` fan-out pool threads (GAMES_BATCH_WORKERS) so one
+    batch cannot take over the shared pool; ids not done after ``deadline`` seconds are errors.
+    """
+    if not game_ids:
+        return {}, {}
+    workers = min(workers or settings.GAMES_BATCH_WORKERS, len(game_ids))
+    stop_at = time.monotonic() + (deadline or settings.GAMES_BATCH_DEADLINE)
+    entries, errors = {}, {}
+
+    def lane(lane_ids):
+        def run():
+            for game_id in lane_ids:
+                if time.monotonic() > stop_at:
+                    return
+                try:
+                    # bind game_id: a stale hit refreshes later, on another thread
+                    entries[game_id] = games_cache.get_or_fetch_entry(
+                        "detail", {"id": game_id}, lambda game_id=game_id: fetch_detail(game_id)
+                    )
+                except requests.exceptions.RequestException as e:
+                    errors[str(game_id)] = str(e)
+
+        return run
+
+    fan_out({n: lane(game_ids[n::workers]) for n in range(workers)}, timeout=stop_at - time.monotonic())
+    entries, errors = dict(entries), dict(errors)
+    for game_id in game_ids:
+        if game_id not in entries and str(game_id) not in errors:
+            errors[str(game_id)] = "timed out"
+    return entries, errors
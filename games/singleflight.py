@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+
+# Request coalescing: concurrent calls with the same key share one in-flight execution.
+# The first caller (leader) runs the function, everyone arriving while it runs waits for
+# and receives the same result (or exception).
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
+
+
+class AsyncSingleFlight:
+    # same idea for coroutines: followers await the leader's task (one task per event loop and key)
+    def __init__(self):
+        self._tasks = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, fn):
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = self._tasks[task_key] = loop.create_task(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        # a cancelled follower must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"in_flight": len(self._tasks), "leaders": self.leaders, "followers": self.followers}
+
+
+# shared by code paths that call RAWG without going through the response cache
+rawg_flight = SingleFlight()
+async_rawg_flight = AsyncSingleFlight()
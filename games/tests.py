@@ -1,15 +1,42 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+from django.test import override_settings
+from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from .cache import games_cache, make_key, LRUCache, TieredCache
+from .singleflight import SingleFlight
+from .catalog import upsert_games
+from .search import search_games, has_trigram
+from django.db import connection
+from .models import CatalogImport, Game
+from django.core.management import call_command
+from django.utils import timezone
+from io import StringIO
+from .rawg import RawgClient, reset_client
+from .quota import RawgBudget, RawgUnavailable, rawg_budget
+from .warmer import warm_games_cache
+from .images import ImageStore, reset_store
+from django.contrib.auth import get_user_model
+from .async_rawg import AsyncRawgClient
+import httpx
+from asgiref.sync import sync_to_async
+import time
+import os
+import shutil
+import tempfile
+from io import BytesIO
 
 # Create your tests here.
 
 class GameSearchTests(APITestCase):
     def setUp(self):
         self.search_url = reverse("game_search")  # /api/games/search/
+        games_cache.clear()
 
-    @patch("games.views.requests.get")
+    @patch("games.rawg.requests.Session.get")
     def test_search_games_returns_results(self, mock_get):
         # fake RAWG response
         mock_get.return_value.status_code = 200
@@ -26,8 +53,94 @@ class GameSearchTests(APITestCase):
         self.assertEqual(len(response.data["results"]), 2)
         self.assertEqual(response.data["results"][0]["name"], "Test Game 1")
 
+    @patch("games.rawg.requests.Session.get")
+    def test_search_is_served_from_cache(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [{"id": 1, "name": "Cached"}]}
+
+        self.client.get(self.search_url, {"query": "Mario", "page": 1})
+        response = self.client.get(self.search_url, {"query": "  mario ", "page": "1"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["name"], "Cached")
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(games_cache.stats()["endpoints"]["search"]["misses"], 1)
+
+    # the refresh runs on its own thread and connection, keep it away from the database
+    @override_settings(GAMES_MIRROR_ENABLED=False)
+    @patch("games.rawg.requests.Session.get")
+    def test_stale_entry_is_served_and_refreshed(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [{"id": 1, "name": "New"}]}
+
+        # pretend an old response is past its TTL but inside the stale window
+        params = {"page_size": 10, "page": 1, "ordering": "-rating"}
+        key = make_key("search", params)
+        entry = games_cache.store("search", key, {"results": [{"id": 1, "name": "Old"}]})
+        entry["fresh_until"] = time.time() - 1
+        cache.set(key, entry)  # stale in the shared tier too, or the local copy would adopt it
+
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.data["results"][0]["name"], "Old")
+
+        for _ in range(50):
+            if games_cache.stats()["endpoints"]["search"].get("refreshes"):
+                break
+            time.sleep(0.02)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(GAMES_MIRROR_ENABLED=False)
+    @patch("games.rawg.requests.Session.get")
+    def test_with_library_annotates_results_per_user(self, mock_get):
+        from library.models import LibraryItem
+
+        cache.clear()
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [{"id": 1, "name": "Owned"}, {"id": 2, "name": "Other"}]}
+        user = get_user_model().objects.create_user(username="searcher", password="testPwd!")
+        Game.objects.create(rawg_id=1, name="Owned")
+        LibraryItem.objects.create(user=user, game_id=1, status="favorite")
+
+        anonymous = self.client.get(self.search_url, {"query": "owned", "with_library": "true"})
+        self.assertNotIn("library", anonymous.data["results"][0])
+        self.assertIn("Authorization", anonymous["Vary"])
+
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(2):  # library version, statuses of the page; the search itself is cached
+            response = self.client.get(self.search_url, {"query": "owned", "with_library": "true"})
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(response.data["results"][0]["library"], {"favorite": True, "wishlist": False, "played": False})
+        self.assertFalse(any(response.data["results"][1]["library"].values()))
+        self.assertNotEqual(response["ETag"], anonymous["ETag"])
+
+        # the ETag follows the user's library
+        again = self.client.get(self.search_url, {"query": "owned", "with_library": "true"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        LibraryItem.objects.create(user=user, game_id=1, status="played")
+        changed = self.client.get(self.search_url, {"query": "owned", "with_library": "true"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertTrue(changed.data["results"][0]["library"]["played"])
+
+        plain = self.client.get(self.search_url, {"query": "owned"})
+        self.assertNotIn("library", plain.data["results"][0])
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class LRUCacheTests(APITestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.evictions, 1)
+
+
 class GameMediaTests(APITestCase):
-    @patch("games.views.requests.get")
+    @patch("games.rawg.requests.Session.get")
     def test_media_endpoint_ok(self, mock_get):
         # Fake RAWG response
         mock_get.return_value.status_code = 200
@@ -40,4 +153,892 @@ class GameMediaTests(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertIn("screenshots", resp.data)
         self.assertIn("trailers", resp.data)
-        self.assertIn("youtube", resp.data)
\ No newline at end of file
+        self.assertIn("youtube", resp.data)
+        self.assertEqual(resp.data["missing"], [])
+
+    @patch("games.rawg.requests.Session.get")
+    def test_media_failing_part_is_empty(self, mock_get):
+        import requests
+
+        def fake_get(url, params=None, timeout=None):
+            if url.endswith("/movies"):
+                raise requests.exceptions.ConnectionError("boom")
+            resp = MagicMock()
+            resp.json.return_value = {"results": [{"id": 7}]}
+            return resp
+
+        mock_get.side_effect = fake_get
+
+        resp = self.client.get(reverse("game_media", kwargs={"game_id": 1}))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["trailers"], [])
+        self.assertEqual(resp.data["screenshots"], [{"id": 7}])
+        self.assertEqual(resp.data["youtube"], [{"id": 7}])
+
+    @override_settings(RAWG_MEDIA_DEADLINE=0.1)
+    @patch("games.rawg.requests.Session.get")
+    def test_media_slow_part_is_marked_missing(self, mock_get):
+        def fake_get(url, params=None, timeout=None):
+            if url.endswith("/youtube"):
+                time.sleep(0.5)
+            resp = MagicMock()
+            resp.json.return_value = {"results": [{"id": 7}]}
+            return resp
+
+        mock_get.side_effect = fake_get
+
+        resp = self.client.get(reverse("game_media", kwargs={"game_id": 1}))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["youtube"], [])
+        self.assertEqual(resp.data["missing"], ["youtube"])
+
+
+class RawgClientTests(APITestCase):
+    def setUp(self):
+        cache.clear() # RAWG budget and breaker state
+
+    @override_settings(RAWG_API_KEY="secret", RAWG_BASE_URL="https://rawg.test/api")
+    @patch("games.rawg.requests.Session.get")
+    def test_get_adds_key_timeout_and_records_timing(self, mock_get):
+        mock_get.return_value.json.return_value = {"id": 3}
+
+        client = RawgClient()
+        self.assertEqual(client.game(3), {"id": 3})
+
+        args, kwargs = mock_get.call_args
+        self.assertEqual(args[0], "https://rawg.test/api/games/3")
+        self.assertEqual(kwargs["params"], {"key": "secret"})
+        self.assertEqual(kwargs["timeout"], client.timeout)
+        self.assertEqual(client.stats()["calls"], 1)
+
+    def test_session_retries_on_rate_limit_and_server_errors(self):
+        adapter = RawgClient().session.get_adapter("https://api.rawg.io/api")
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+    @override_settings(RAWG_MAX_RETRY_AFTER=5)
+    def test_retry_after_is_capped(self):
+        retry = RawgClient().session.get_adapter("https://api.rawg.io/api").max_retries
+        response = MagicMock(headers={"Retry-After": "3600"})
+        self.assertEqual(retry.get_retry_after(response), 5)
+        response.headers = {"Retry-After": "2"}
+        self.assertEqual(retry.get_retry_after(response), 2)
+
+
+class SingleFlightTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(1)
+            return {"id": 1}
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "games/1", slow) for _ in range(5)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r == {"id": 1} for r in results))
+
+    @override_settings(GAMES_CACHE_CROSS_WORKER_LOCK=True, GAMES_CACHE_LOCK_TIMEOUT=2)
+    def test_waits_for_result_from_other_worker(self):
+        key = make_key("detail", {"id": 5})
+        # another worker holds the lock and stores its result shortly after
+        cache.add(f"{key}:lock", 1, timeout=2)
+        other_worker = TieredCache()
+        threading.Timer(0.1, other_worker.store, args=("detail", key, {"id": 5, "name": "Remote"})).start()
+
+        fetch = MagicMock()
+        data = TieredCache().get_or_fetch("detail", {"id": 5}, fetch)
+
+        self.assertEqual(data["name"], "Remote")
+        fetch.assert_not_called()
+
+    def test_stale_local_copy_adopts_another_workers_refresh(self):
+        key = make_key("detail", {"id": 7})
+        worker_a, worker_b = TieredCache(), TieredCache()
+        now = time.time()
+        stale = {"data": {"name": "Old"}, "fresh_until": now - 1, "stale_until": now + 60, "etag": '"old"'}
+        worker_a.local.set(key, stale)
+        worker_b.local.set(key, stale)
+
+        # worker A refreshed the key and wrote the fresh copy to the shared tier
+        worker_a.store("detail", key, {"name": "New"})
+
+        fetch = MagicMock()
+        data = worker_b.get_or_fetch("detail", {"id": 7}, fetch)
+
+        self.assertEqual(data["name"], "New")
+        fetch.assert_not_called()
+        self.assertEqual(worker_b.stats()["endpoints"]["detail"].get("stale_hits", 0), 0)
+        self.assertIsNone(cache.get(f"{key}:refresh"))
+
+    def test_clear_only_retires_games_entries(self):
+        cache.set("rawg:budget:breaker:failures", 3)
+        other_worker = TieredCache()
+        other_worker.get_or_fetch("detail", {"id": 5}, lambda: {"id": 5, "name": "Old"})
+
+        games_cache.clear()
+
+        self.assertEqual(cache.get("rawg:budget:breaker:failures"), 3)
+        # the shared copy is gone for every worker, even though the key itself is still stored
+        data = TieredCache().get_or_fetch("detail", {"id": 5}, lambda: {"id": 5, "name": "New"})
+        self.assertEqual(data["name"], "New")
+
+
+RAWG_GAME = {
+    "id": 3498,
+    "slug": "grand-theft-auto-v",
+    "name": "Grand Theft Auto V",
+    "released": "2013-09-17",
+    "background_image": "https://media.rawg.io/media/games/gta.jpg",
+    "rating": 4.47,
+    "metacritic": 92,
+    "genres": [{"id": 4, "name": "Action", "slug": "action"}],
+    "platforms": [{"platform": {"id": 187, "name": "PlayStation 5", "slug": "playstation5"}}],
+}
+
+
+class CatalogMirrorTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    def test_upsert_games_inserts_then_updates(self):
+        upsert_games([RAWG_GAME])
+        upsert_games([{**RAWG_GAME, "rating": 4.5}])
+
+        game = Game.objects.get(rawg_id=3498)
+        self.assertEqual(Game.objects.count(), 1)
+        self.assertEqual(game.rating, 4.5)
+        self.assertEqual(list(game.genres.values_list("name", flat=True)), ["Action"])
+        self.assertEqual(list(game.platforms.values_list("rawg_id", flat=True)), [187])
+
+    @patch("games.rawg.requests.Session.get")
+    def test_category_page_served_from_fresh_mirror(self, mock_get):
+        upsert_games([RAWG_GAME])
+        CatalogImport.objects.create(name="default", finished_at=timezone.now(), complete=True)
+
+        response = self.client.get(reverse("game_search"), {"category": "new"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["name"], "Grand Theft Auto V")
+        self.assertEqual(response.data["results"][0]["platforms"][0]["platform"]["name"], "PlayStation 5")
+        mock_get.assert_not_called()
+
+    @patch("games.rawg.requests.Session.get")
+    def test_local_page_links_do_not_depend_on_who_cached_the_page(self, mock_get):
+        upsert_games([{**RAWG_GAME, "id": n, "name": f"Game {n}"} for n in range(1, 12)])
+        CatalogImport.objects.create(name="default", finished_at=timezone.now(), complete=True)
+
+        def inline(calls, timeout=None):
+            # pool threads would not see the test transaction on Postgres
+            return {name: fn() for name, fn in calls.items()}, {}, []
+
+        with patch("games.warmer.fan_out", side_effect=inline):
+            warm_games_cache(["popular"], pages=1, top=0)
+        warmed = self.client.get(reverse("game_search"), {"page": 1, "fields": "all"}).data
+        games_cache.clear()
+        fetched = self.client.get(reverse("game_search"), {"fields": "all", "category": "Popular"}).data
+
+        self.assertEqual(warmed["next"], f"{reverse('game_search')}?category=popular&page=2")
+        self.assertEqual(fetched["next"], warmed["next"])
+        mock_get.assert_not_called()
+
+    @patch("games.rawg.requests.Session.get")
+    def test_import_command_is_resumable(self, mock_get):
+        def fake_get(url, params=None, timeout=None):
+            resp = MagicMock()
+            page = params["page"]
+            resp.json.return_value = {
+                "count": 3,
+                "results": [{**RAWG_GAME, "id": page, "name": f"Game {page}"}],
+            }
+            return resp
+
+        mock_get.side_effect = fake_get
+        CatalogImport.objects.create(name="default", ordering="-added", last_page=1, page_size=1)
+
+        call_command("import_rawg_catalog", "--page-size=1", "--workers=2", stdout=StringIO())
+
+        checkpoint = CatalogImport.objects.get(name="default")
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.last_page, 3)
+        # page 1 was already imported in the previous run
+        self.assertEqual(sorted(Game.objects.values_list("rawg_id", flat=True)), [2, 3])
+        self.assertTrue(checkpoint.complete)
+
+    @override_settings(GAMES_MIRROR_ENABLED=True)
+    @patch("games.rawg.requests.Session.get")
+    def test_partial_import_does_not_enable_the_mirror(self, mock_get):
+        from .catalog import mirror_is_fresh
+
+        mock_get.return_value.json.return_value = {"count": 3, "results": [RAWG_GAME]}
+        cache.delete("games:mirror:fresh")
+
+        call_command("import_rawg_catalog", "--page-size=1", "--max-pages=1", stdout=StringIO())
+
+        checkpoint = CatalogImport.objects.get(name="default")
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertFalse(checkpoint.complete)
+        self.assertFalse(mirror_is_fresh())
+
+    @override_settings(GAMES_MIRROR_ENABLED=True)
+    @patch("games.rawg.requests.Session.get")
+    def test_import_spread_over_runs_with_pages(self, mock_get):
+        from .catalog import mirror_is_fresh
+
+        def fake_get(url, params=None, timeout=None):
+            resp = MagicMock()
+            resp.json.return_value = {"count": 3, "results": [{**RAWG_GAME, "id": params["page"]}]}
+            return resp
+
+        mock_get.side_effect = fake_get
+        call_command("import_rawg_catalog", "--page-size=1", "--pages=2", stdout=StringIO())
+        checkpoint = CatalogImport.objects.get(name="default")
+        self.assertEqual(checkpoint.last_page, 2)
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertFalse(mirror_is_fresh())
+
+        # the next run continues where this one stopped
+        call_command("import_rawg_catalog", "--page-size=1", "--pages=2", stdout=StringIO())
+        checkpoint.refresh_from_db()
+        self.assertTrue(checkpoint.complete)
+        self.assertEqual(sorted(Game.objects.values_list("rawg_id", flat=True)), [1, 2, 3])
+        self.assertTrue(mirror_is_fresh())
+
+    @override_settings(GAMES_MIRROR_ENABLED=True)
+    @patch("games.rawg.requests.Session.get")
+    def test_stored_details_are_served_without_a_catalog_import(self, mock_get):
+        from .catalog import save_detail
+
+        save_detail({**RAWG_GAME, "description_raw": "Crime"})
+
+        response = self.client.get(reverse("game_detail", args=[3498]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["description_raw"], "Crime")
+        mock_get.assert_not_called()
+
+
+class LocalSearchTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+        upsert_games([
+            {**RAWG_GAME, "id": 1, "name": "The Legend of Zelda: Breath of the Wild", "released": "2017-03-03", "added": 50},
+            {**RAWG_GAME, "id": 2, "name": "Zelda II: The Adventure of Link", "released": "1987-01-14", "added": 10},
+            {**RAWG_GAME, "id": 3, "name": "Grand Theft Auto V", "released": "2013-09-17", "added": 90},
+        ])
+
+    def skip_without_trigram(self):
+        if connection.vendor == "postgresql" and not has_trigram(connection):
+            self.skipTest("pg_trgm is not installed")
+
+    def test_typo_tolerant_search(self):
+        self.skip_without_trigram()
+        page = search_games("zelda breth")
+        self.assertEqual(page["results"][0]["name"], "The Legend of Zelda: Breath of the Wild")
+        self.assertNotIn(3, [g["id"] for g in page["results"]])
+
+    def test_category_ordering_applies_to_matches(self):
+        page = search_games("zelda", ordering="-released")
+        self.assertEqual([g["id"] for g in page["results"]], [1, 2])
+        self.assertEqual(page["count"], 2)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_search_view_uses_local_index_when_mirror_is_fresh(self, mock_get):
+        CatalogImport.objects.create(name="default", finished_at=timezone.now(), complete=True)
+
+        response = self.client.get(reverse("game_search"), {"query": "grand theft"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], 3)
+        mock_get.assert_not_called()
+
+    @patch("games.rawg.requests.Session.get")
+    def test_rawg_results_are_added_to_local_catalog(self, mock_get):
+        self.skip_without_trigram()
+        mock_get.return_value.json.return_value = {"count": 1, "results": [{**RAWG_GAME, "id": 42, "name": "Hades"}]}
+
+        self.client.get(reverse("game_search"), {"query": "hades"})
+
+        self.assertEqual(search_games("hdes")["results"][0]["id"], 42)
+
+
+class ProjectionTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    @patch("games.rawg.requests.Session.get")
+    def test_detail_uses_compact_profile_by_default(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            **RAWG_GAME,
+            "description": "<p>html</p>",
+            "description_raw": "text",
+            "stores": [{"id": 1}],
+            "platforms": [{"platform": {"id": 187, "name": "PlayStation 5", "slug": "ps5"}, "requirements": {"minimum": "..."}}],
+        }
+        url = reverse("game_detail", kwargs={"game_id": 3498})
+
+        data = self.client.get(url).data
+        self.assertEqual(data["description_raw"], "text")
+        self.assertNotIn("description", data)
+        self.assertNotIn("stores", data)
+        self.assertEqual(data["platforms"], [{"platform": {"id": 187, "name": "PlayStation 5", "slug": "ps5"}}])
+
+        self.assertIn("stores", self.client.get(url, {"fields": "all"}).data)
+        self.assertEqual(self.client.get(url, {"fields": "id,name"}).data, {"id": 3498, "name": "Grand Theft Auto V"})
+
+    @patch("games.rawg.requests.Session.get")
+    def test_search_results_use_card_profile(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            "count": 1,
+            "seo_title": "All Games",
+            "results": [{**RAWG_GAME, "tags": [{"id": 1}], "short_screenshots": [{"id": 2}]}],
+        }
+
+        data = self.client.get(reverse("game_search"), {"query": "gta"}).data
+        self.assertNotIn("seo_title", data)
+        self.assertNotIn("tags", data["results"][0])
+        self.assertEqual(data["results"][0]["genres"], RAWG_GAME["genres"])
+
+
+def mock_async_client(handler):
+    return AsyncRawgClient(base_url="https://rawg.test/api", api_key="k", transport=httpx.MockTransport(handler))
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0)
+class AsyncGameViewsTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    async def test_async_detail_fetches_once_then_hits_cache(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"id": 3498, "name": "GTA V", "description_raw": "Crime"})
+
+        client = mock_async_client(handler)
+        with patch("games.async_views.get_async_client", return_value=client):
+            url = reverse("game_detail_async", args=[3498])
+            first = await self.async_client.get(url)
+            second = await self.async_client.get(url)
+        await client.aclose()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["name"], "GTA V")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(calls, ["/api/games/3498"])
+
+    async def test_async_search_matches_sync_payload(self):
+        client = mock_async_client(lambda request: httpx.Response(200, json={"results": [RAWG_GAME]}))
+        with patch("games.async_views.get_async_client", return_value=client):
+            response = await self.async_client.get(reverse("game_search_async"), {"query": "gta"})
+        await client.aclose()
+        # served from the cache the async view just filled
+        sync_response = await sync_to_async(self.client.get)(reverse("game_search"), {"query": "gta"})
+
+        self.assertTrue(response.json()["results"][0]["thumbnail"])
+        self.assertEqual(response.json(), sync_response.json())
+
+    async def test_async_client_keeps_budget_calls_off_the_event_loop(self):
+        blocking = ["_check_breaker", "_check_quota", "_take_slot", "record_usage", "record_success", "record_failure"]
+        client = mock_async_client(lambda request: httpx.Response(200, json={"id": 3}))
+        with patch.multiple(RawgBudget, **{name: MagicMock(side_effect=AssertionError(name)) for name in blocking}):
+            self.assertEqual(await client.game(3), {"id": 3})
+        await client.aclose()
+
+        self.assertEqual(await sync_to_async(rawg_budget.quota_used)(), 1)
+
+    def test_async_client_is_closed_with_its_loop(self):
+        import asyncio
+        from .async_rawg import get_async_client
+
+        async def use_client():
+            return get_async_client()
+
+        client = asyncio.run(use_client())
+        self.assertTrue(client.client.is_closed)
+
+    async def test_async_search_error_returns_500(self):
+        client = mock_async_client(lambda request: httpx.Response(502))
+        with patch("games.async_views.get_async_client", return_value=client):
+            response = await self.async_client.get(reverse("game_search_async"), {"query": "zelda"})
+        await client.aclose()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("error", response.json())
+
+    async def test_async_search_with_library_authenticates_bearer_token(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from library.models import LibraryItem
+
+        def setup():
+            user = get_user_model().objects.create_user(username="async-searcher", password="testPwd!")
+            Game.objects.create(rawg_id=7, name="Owned")
+            LibraryItem.objects.create(user=user, game_id=7, status="wishlist")
+            return str(AccessToken.for_user(user))
+
+        token = await sync_to_async(setup)()
+        client = mock_async_client(lambda request: httpx.Response(200, json={"results": [{"id": 7, "name": "Owned"}]}))
+        with patch("games.async_views.get_async_client", return_value=client):
+            url = reverse("game_search_async")
+            response = await self.async_client.get(
+                url, {"query": "owned", "with_library": "1"}, headers={"Authorization": f"Bearer {token}"}
+            )
+            invalid = await self.async_client.get(
+                url, {"query": "owned", "with_library": "1"}, headers={"Authorization": "Bearer nope"}
+            )
+        await client.aclose()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["results"][0]["library"]["wishlist"])
+        self.assertIn("Authorization", response["Vary"])
+        self.assertEqual(invalid.status_code, 401)
+
+    async def test_async_media_reports_failed_part_as_empty(self):
+        def handler(request):
+            if request.url.path.endswith("/movies"):
+                return httpx.Response(500)
+            return httpx.Response(200, json={"results": [{"id": 1}]})
+
+        client = mock_async_client(handler)
+        with patch("games.async_views.get_async_client", return_value=client):
+            response = await self.async_client.get(reverse("game_media_async", args=[3498]))
+        await client.aclose()
+
+        data = response.json()
+        self.assertEqual(data["screenshots"], [{"id": 1}])
+        self.assertEqual(data["trailers"], [])
+        self.assertEqual(data["missing"], [])
+
+
+@override_settings(RAWG_MAX_RETRIES=0, RAWG_BREAKER_THRESHOLD=2, RAWG_BREAKER_COOLDOWN=30, GAMES_MIRROR_ENABLED=False)
+class RawgBudgetTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+        reset_client()
+
+    def tearDown(self):
+        reset_client()
+
+    @patch("games.rawg.requests.Session.get")
+    def test_breaker_opens_after_consecutive_failures(self, mock_get):
+        import requests
+
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+
+        for game_id in (1, 2):
+            response = self.client.get(reverse("game_detail", args=[game_id]))
+            self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response = self.client.get(reverse("game_detail", args=[3]))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(rawg_budget.status()["breaker"]["state"], "open")
+
+    @patch("games.rawg.requests.Session.get")
+    def test_expired_entry_is_served_while_breaker_is_open(self, mock_get):
+        key = make_key("detail", {"id": 9})
+        entry = games_cache.store("detail", key, {"id": 9, "name": "Cached"})
+        entry["fresh_until"] = entry["stale_until"] = time.time() - 1
+        cache.set(key, entry)
+        rawg_budget.record_failure()
+        rawg_budget.record_failure()
+
+        response = self.client.get(reverse("game_detail", args=[9]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Cached")
+        mock_get.assert_not_called()
+        self.assertEqual(games_cache.stats()["endpoints"]["detail"]["expired_hits"], 1)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_breaker_closes_after_successful_probe(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"id": 4}
+        rawg_budget.record_failure()
+        rawg_budget.record_failure()
+        cache.delete(rawg_budget.key("breaker:open"))  # cooldown over
+        self.assertEqual(rawg_budget.breaker_state(), "half_open")
+
+        response = self.client.get(reverse("game_detail", args=[4]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(rawg_budget.breaker_state(), "closed")
+
+    @override_settings(RAWG_MONTHLY_QUOTA=3)
+    @patch("games.rawg.requests.Session.get")
+    def test_monthly_quota_exhausted_returns_503(self, mock_get):
+        rawg_budget.record_usage(3)
+
+        response = self.client.get(reverse("game_search"), {"query": "zelda"})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        mock_get.assert_not_called()
+
+    @override_settings(RAWG_RATE_LIMIT=2, RAWG_RATE_LIMIT_WAIT=0)
+    def test_rate_limit_is_shared_per_second(self):
+        with patch("games.quota.time.time", return_value=1000.5):
+            rawg_budget.acquire()
+            RawgBudget().acquire()  # another worker, same counters
+            with self.assertRaises(RawgUnavailable):
+                rawg_budget.acquire()
+
+    def test_status_is_staff_only(self):
+        User = get_user_model()
+        url = reverse("rawg_status")
+        self.client.force_authenticate(User.objects.create_user(username="u", password="p"))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(User.objects.create_user(username="admin", password="p", is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["breaker"]["state"], "closed")
+        self.assertIn("used", response.data["quota"])
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0)
+class CacheWarmerTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    def fake_rawg(self):
+        calls = []
+
+        def fake_get(url, params=None, timeout=None):
+            calls.append(url)
+            resp = MagicMock()
+            resp.status_code = 200
+            if url.endswith("/games"):
+                page = params["page"]
+                resp.json.return_value = {"results": [{"id": page * 10 + i, "name": "G"} for i in range(3)]}
+            else:
+                resp.json.return_value = {"id": int(url.rsplit("/", 1)[-1]), "name": "Detail"}
+            return resp
+
+        return calls, fake_get
+
+    @patch("games.rawg.requests.Session.get")
+    def test_warms_category_pages_and_top_details(self, mock_get):
+        calls, mock_get.side_effect = self.fake_rawg()
+
+        summary = warm_games_cache(["popular", "new"], pages=2, top=4)
+
+        self.assertEqual(summary["errors"], {})
+        self.assertEqual(summary["fetched"], 2 * 2 + 4)
+        self.assertEqual(len(calls), 8)
+
+        # landing page and a top game are now served without calling RAWG
+        self.client.get(reverse("game_search"), {"page": 2})
+        self.client.get(reverse("game_detail", args=[11]))
+        self.assertEqual(len(calls), 8)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_fresh_entries_are_skipped_unless_expiring_before_next_run(self, mock_get):
+        calls, mock_get.side_effect = self.fake_rawg()
+        warm_games_cache(["popular"], pages=1, top=1)
+
+        summary = warm_games_cache(["popular"], pages=1, top=1)
+        self.assertEqual((summary["fetched"], summary["fresh"]), (0, 2))
+
+        summary = warm_games_cache(["popular"], pages=1, top=1, min_ttl=10 ** 6)
+        self.assertEqual((summary["fetched"], summary["fresh"]), (2, 0))
+        self.assertEqual(len(calls), 4)
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0)
+class GameBundleTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+        self.url = reverse("game_bundle", args=[3498])
+
+    def fake_get(self, fail_movies=False):
+        import requests
+
+        def fake_get(url, params=None, timeout=None):
+            if fail_movies and url.endswith("/movies"):
+                raise requests.exceptions.ConnectionError("boom")
+            resp = MagicMock()
+            resp.status_code = 200
+            if url.endswith("/games/3498"):
+                resp.json.return_value = {**RAWG_GAME, "description_raw": "Crime"}
+            else:
+                resp.json.return_value = {"results": [{"id": url.rsplit("/", 1)[-1]}]}
+            return resp
+
+        return fake_get
+
+    @patch("games.rawg.requests.Session.get")
+    def test_bundle_combines_detail_and_media_and_is_cached(self, mock_get):
+        mock_get.side_effect = self.fake_get()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["game"]["name"], "Grand Theft Auto V")
+        self.assertEqual(response.data["screenshots"], [{"id": "screenshots"}])
+        self.assertEqual(response.data["trailers"], [{"id": "movies"}])
+        self.assertEqual(response.data["missing"], [])
+        self.assertEqual(mock_get.call_count, 4)
+
+        self.client.get(self.url)
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_bundle_etag_answers_304(self, mock_get):
+        mock_get.side_effect = self.fake_get()
+
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        # another projection is another representation
+        self.assertNotEqual(self.client.get(self.url, {"fields": "id,name"})["ETag"], etag)
+
+    @override_settings(RAWG_MEDIA_DEADLINE=0.05)
+    @patch("games.rawg.requests.Session.get")
+    def test_slow_detail_is_not_held_to_the_media_deadline(self, mock_get):
+        fake_get = self.fake_get()
+
+        def slow_detail(url, params=None, timeout=None):
+            if url.endswith("/games/3498"):
+                time.sleep(0.2)
+            return fake_get(url, params, timeout)
+
+        mock_get.side_effect = slow_detail
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["game"]["name"], "Grand Theft Auto V")
+        # joined the detail call already running instead of starting another one
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_incomplete_bundle_is_not_cached(self, mock_get):
+        mock_get.side_effect = self.fake_get(fail_movies=True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["trailers"], [])
+        self.assertEqual(response.data["missing"], ["trailers"])
+
+        mock_get.side_effect = self.fake_get()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["missing"], [])
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False)
+class GameConditionalGetTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+
+    @patch("games.views.project")
+    @patch("games.rawg.requests.Session.get")
+    def test_detail_304_from_cache_without_rawg_or_projection(self, mock_get, mock_project):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = RAWG_GAME
+        mock_project.side_effect = lambda data, fields: data
+        url = reverse("game_detail", args=[3498])
+
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}")
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_project.call_count, 1)
+
+    @patch("games.rawg.requests.Session.get")
+    def test_search_etag_follows_cached_data(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [{"id": 1, "name": "Old"}]}
+        etag = self.client.get(reverse("game_search"))["ETag"]
+
+        games_cache.clear()
+        mock_get.return_value.json.return_value = {"results": [{"id": 1, "name": "New"}]}
+        response = self.client.get(reverse("game_search"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0, GAMES_BATCH_MAX_IDS=5, GAMES_BATCH_WORKERS=2)
+class GameBatchTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+        self.url = reverse("game_batch")
+
+    @patch("games.rawg.requests.Session.get")
+    def test_batch_dedupes_uses_cache_and_reports_errors(self, mock_get):
+        import requests
+
+        def fake_get(url, params=None, timeout=None):
+            game_id = int(url.rsplit("/", 1)[-1])
+            if game_id == 404:
+                raise requests.exceptions.HTTPError("404 Not Found")
+            resp = MagicMock()
+            resp.status_code = 200
+            resp.json.return_value = {"id": game_id, "name": f"Game {game_id}", "description_raw": "long"}
+            return resp
+
+        mock_get.side_effect = fake_get
+        games_cache.store("detail", make_key("detail", {"id": 1}), {"id": 1, "name": "Cached"})
+
+        response = self.client.get(self.url, {"ids": "1,2,2,3,404"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"]["1"]["name"], "Cached")
+        self.assertEqual(sorted(response.data["results"]), ["1", "2", "3"])
+        self.assertNotIn("description_raw", response.data["results"]["2"])
+        self.assertIn("404", response.data["errors"])
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_stale_ids_in_one_lane_refresh_their_own_game(self):
+        from .services import fetch_details
+
+        for game_id in (1, 2):
+            key = make_key("detail", {"id": game_id})
+            entry = games_cache.store("detail", key, {"id": game_id, "name": "Old"})
+            entry["fresh_until"] = time.time() - 1
+            cache.set(key, entry)
+
+        # the refreshes run after the lane has moved on, like a slow background fetch
+        refreshes = []
+        with patch.object(games_cache, "_refresh_in_background", lambda endpoint, key, fetch: refreshes.append((key, fetch))), \
+                patch("games.services.fetch_detail", side_effect=lambda game_id: {"id": game_id, "name": "New"}):
+            fetch_details([1, 2], workers=1)
+            refreshed = {key: fetch() for key, fetch in refreshes}
+
+        self.assertEqual(refreshed[make_key("detail", {"id": 1})]["id"], 1)
+        self.assertEqual(refreshed[make_key("detail", {"id": 2})]["id"], 2)
+
+    def test_batch_validates_ids(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"ids": "1,x"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"ids": "1,2,3,4,5,6"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def png_bytes(size=(1600, 900)):
+    from PIL import Image
+
+    out = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+class GameImageProxyTests(APITestCase):
+    SOURCE = "https://media.rawg.io/media/games/gta.jpg"
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.settings_override = override_settings(GAMES_IMAGE_CACHE_DIR=self.tmp)
+        self.settings_override.enable()
+        reset_store()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        reset_store()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def fake_download(self, mock_get):
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.iter_content.return_value = [png_bytes()]
+        mock_get.return_value.__enter__.return_value = resp
+        return resp
+
+    @patch("games.images._session.get")
+    def test_renditions_are_made_once_and_served_immutable(self, mock_get):
+        from PIL import Image
+
+        self.fake_download(mock_get)
+
+        response = self.client.get(reverse("game_image", args=["card", "webp"]), {"url": self.SOURCE})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        image = Image.open(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(image.size, (640, 360))
+
+        response = self.client.get(reverse("game_image", args=["thumb", "jpg"]), {"url": self.SOURCE})
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        response.close()
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_only_allowed_hosts_are_proxied(self):
+        response = self.client.get(reverse("game_image", args=["card", "webp"]), {"url": "http://169.254.169.254/x.png"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("game_image", args=["card", "webp"]), {"url": "https://media.rawg.io/api/x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("games.images._session.get")
+    def test_query_strings_do_not_bypass_the_store(self, mock_get):
+        self.fake_download(mock_get)
+        url = reverse("game_image", args=["card", "webp"])
+        for source in [self.SOURCE, self.SOURCE + "?v=1", self.SOURCE + "?v=2#x", self.SOURCE.replace("https", "http")]:
+            response = self.client.get(url, {"url": source})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response.close()
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.args[0], self.SOURCE)
+        self.assertFalse(mock_get.call_args.kwargs["allow_redirects"])
+
+    @patch("games.images._session.get")
+    def test_redirects_and_busy_renderers_are_refused(self, mock_get):
+        self.fake_download(mock_get).status_code = 302
+        response = self.client.get(reverse("game_image", args=["card", "webp"]), {"url": self.SOURCE})
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+        with override_settings(GAMES_IMAGE_MAX_RENDERS=0, GAMES_IMAGE_RENDER_WAIT=0):
+            reset_store()
+            response = self.client.get(reverse("game_image", args=["card", "webp"]), {"url": self.SOURCE})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(mock_get.call_count, 1)
+        response = self.client.get(reverse("game_image", args=["huge", "webp"]), {"url": self.SOURCE})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_store_evicts_least_recently_used(self):
+        store = ImageStore(self.tmp, max_bytes=250)
+        paths = [store.path(f"https://media.rawg.io/{n}.jpg", "card", "webp") for n in range(3)]
+        for n, path in enumerate(paths[:2]):
+            store.put(path, b"x" * 100)
+            os.utime(path, (n, n))
+        store.get(paths[0])  # recently used again
+
+        store.put(paths[2], b"x" * 100)
+        self.assertEqual(store.trim(), 200)
+
+        self.assertTrue(paths[0].exists())
+        self.assertFalse(paths[1].exists())
+        self.assertTrue(paths[2].exists())
+
+    @override_settings(GAMES_MIRROR_ENABLED=False)
+    @patch("games.rawg.requests.Session.get")
+    def test_search_results_link_thumbnails(self, mock_get):
+        games_cache.clear()
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [RAWG_GAME, {"id": 2, "background_image": None}]}
+
+        results = self.client.get(reverse("game_search"), {"query": "gta"}).data["results"]
+
+        self.assertTrue(results[0]["thumbnail"].startswith("http://testserver/api/games/image/card.webp?url="))
+        self.assertIsNone(results[1]["thumbnail"])
@@ -1,8 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import GameSearchView, GameDetailView, GameMediaView
+from . import async_views
+from .views import GameSearchView, GameDetailView, GameMediaView, GameBundleView, GameBatchView, GameSimilarView, GameImageView, GamesCacheStatsView, RawgStatusView
 
 urlpatterns = [
     path("search/", GameSearchView.as_view(), name="game_search"),
     path("<int:game_id>/", GameDetailView.as_view(), name="game_detail"),
     path("<int:game_id>/media/", GameMediaView.as_view(), name="game_media"),
-]
\ No newline at end of file
+    path("<int:game_id>/bundle/", GameBundleView.as_view(), name="game_bundle"),
+    path("<int:game_id>/similar/", GameSimilarView.as_view(), name="game_similar"),
+    path("batch/", GameBatchView.as_view(), name="game_batch"),
+    path("image/<slug:rendition>.<slug:fmt>", GameImageView.as_view(), name="game_image"),
+    path("cache/stats/", GamesCacheStatsView.as_view(), name="games_cache_stats"),
+    path("rawg/status/", RawgStatusView.as_view(), name="rawg_status"),
+
+    # async versions (use under an ASGI server)
+    path("async/search/", async_views.game_search, name="game_search_async"),
+    path("async/<int:game_id>/", async_views.game_detail, name="game_detail_async"),
+    path("async/<int:game_id>/media/", async_views.game_media, name="game_media_async"),
+]
+
+# serve the main proxy endpoints with the async views when deployed on ASGI
+if settings.GAMES_ASYNC_VIEWS:
+    urlpatterns[:3] = [
+        path("search/", async_views.game_search, name="game_search"),
+        path("<int:game_id>/", async_views.game_detail, name="game_detail"),
+        path("<int:game_id>/media/", async_views.game_media, name="game_media"),
+    ]
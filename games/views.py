@@ -1,120 +1,230 @@
 import requests
 from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, permissions
+from .cache import games_cache
+from .conditional import content_etag, entry_etag, etag_matches
+from .fanout import fan_out
+from .images import FORMATS, RENDITIONS, ImageBusy, ImageError, get_rendition
+from .models import GameSimilarity
+from .projection import parse_fields, project
+from .quota import RawgUnavailable, rawg_budget
+from .rawg import get_client
+from .responses import (
+    library_etag,
+    parse_limit,
+    private_response,
+    scored_cards,
+    search_page,
+    wants_library,
+    with_thumbnail,
+)
+from .services import MEDIA_PARTS, SearchRequest, fetch_bundle, fetch_detail, fetch_details, fetch_media, fetch_search
+
+
+def unavailable_response(e):
+    # RAWG is rate limited, out of quota or failing and nothing is cached: fail fast
+    response = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if e.retry_after:
+        response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def etag_response(request, etag, render):
+    # 304 when the client already has this representation, render() only runs for a 200
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(render(), status=status.HTTP_200_OK, headers={"ETag": etag})
 
 
 class GameSearchView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        query = request.GET.get("query", "").strip()
-        page = request.GET.get("page", 1)
-        category = request.GET.get("category", "").strip().lower()
-
-        url = f"{settings.RAWG_BASE_URL}/games"
-        params = {
-            "key": settings.RAWG_API_KEY,
-            "page_size": 10,
-            "page": page,
-        }
-
-        # Use RAWG search when user types a query
-        if query:
-            params["search"] = query
-
-        # Map category names to RAWG ordering
-        ordering_map = {
-            "popular": "-rating",      # Most Popular
-            "new": "-released",        # New Releases
-            "average": "-metacritic",  # Average rating
-        }
-        ordering = ordering_map.get(category)
-
-        # Default to popular if no query or ordering is specified
-        if not query and not ordering:
-            ordering = "-rating"
-
-        if ordering:
-            params["ordering"] = ordering
-
+        search = SearchRequest.from_query_params(request.GET)
         try:
-            rawg_response = requests.get(url, params=params)
-            rawg_response.raise_for_status()
+            entry = games_cache.get_or_fetch_entry(
+                "search", search.cache_params, lambda: fetch_search(search, search.page_url)
+            )
+        except RawgUnavailable as e:
+            return unavailable_response(e)
         except requests.exceptions.RequestException as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        data = rawg_response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        # strip keys the frontend never renders (?fields=all for the full RAWG payload)
+        fields = parse_fields(request.GET.get("fields"), default="card")
+        def render():
+            return search_page(request, entry["data"], fields, request.user if wants_library(request) else None)
+
+        if not wants_library(request):
+            return etag_response(request, entry_etag(entry, fields), render)
+        return private_response(etag_response(request, library_etag(entry_etag(entry, fields), request.user), render))
 
 
 class GameDetailView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, game_id):
-        url = f"{settings.RAWG_BASE_URL}/games/{game_id}"
-        params = {"key": settings.RAWG_API_KEY}
-
         try:
-            rawg_response = requests.get(url, params=params)
-            rawg_response.raise_for_status()
+            entry = games_cache.get_or_fetch_entry("detail", {"id": game_id}, lambda: fetch_detail(game_id))
+        except RawgUnavailable as e:
+            return unavailable_response(e)
         except requests.exceptions.RequestException as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        data = rawg_response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        fields = parse_fields(request.GET.get("fields"), default="detail")
+        return etag_response(request, entry_etag(entry, fields), lambda: project(entry["data"], fields))
 
 class GameMediaView(APIView):
 # Return screenshots, trailers and youtube videos for a game - GET /api/games/<game_id>/media/
+# The three RAWG calls run concurrently; parts not finished by RAWG_MEDIA_DEADLINE are listed in "missing"
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, game_id):
-        base_url = settings.RAWG_BASE_URL
-        params = {"key": settings.RAWG_API_KEY}
+        results, _, missing = fan_out(
+            {name: lambda path=path: fetch_media(game_id, path) for name, path in MEDIA_PARTS.items()},
+            timeout=settings.RAWG_MEDIA_DEADLINE,
+        )
+
+        # failed or timed out parts are returned as empty lists
+        data = {
+            "screenshots": results.get("screenshots", []),
+            "trailers": results.get("trailers", []),
+            "youtube": results.get("youtube", []),
+            "missing": missing,
+        }
+        return etag_response(request, content_etag(data), lambda: data)
 
-        screenshots = []
-        trailers = []
-        youtube_videos = []
 
-        # Screenshots
-        try:
-            s_resp = requests.get(
-                f"{base_url}/games/{game_id}/screenshots",
-                params=params
-            )
-            s_resp.raise_for_status()
-            screenshots = s_resp.json().get("results", [])
-        except requests.exceptions.RequestException:
-            screenshots = []
+class GameBundleView(APIView):
+# Detail, screenshots, trailers and youtube videos in one response - GET /api/games/<game_id>/bundle/
+# The four parts are fetched concurrently and complete bundles are cached for GAMES_CACHE_TTL["bundle"]
+    permission_classes = [permissions.AllowAny]
 
-        # Trailers / movies
+    def get(self, request, game_id):
         try:
-            t_resp = requests.get(
-                f"{base_url}/games/{game_id}/movies",
-                params=params
+            entry = games_cache.get_or_fetch_entry(
+                "bundle",
+                {"id": game_id},
+                lambda: fetch_bundle(game_id),
+                cacheable=lambda bundle: not bundle["missing"],
             )
-            t_resp.raise_for_status()
-            trailers = t_resp.json().get("results", [])
-        except requests.exceptions.RequestException:
-            trailers = []
+        except RawgUnavailable as e:
+            return unavailable_response(e)
+        except requests.exceptions.RequestException as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        fields = parse_fields(request.GET.get("fields"), default="detail")
+        bundle = entry["data"]
+        return etag_response(
+            request, entry_etag(entry, fields), lambda: {**bundle, "game": project(bundle["game"], fields)}
+        )
 
-        # YouTube videos
+
+class GameBatchView(APIView):
+# Details for many games at once - GET /api/games/batch/?ids=1,2,3
+# Ids are deduplicated, cached details are used as-is and misses are fetched concurrently on the
+# fan-out pool. Results are keyed by id; ids that failed or missed GAMES_BATCH_DEADLINE are in "errors".
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
         try:
-            y_resp = requests.get(
-                f"{base_url}/games/{game_id}/youtube",
-                params=params
+            ids = list(dict.fromkeys(int(i) for i in request.GET.get("ids", "").split(",") if i.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma separated list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"error": "ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.GAMES_BATCH_MAX_IDS:
+            return Response(
+                {"error": f"at most {settings.GAMES_BATCH_MAX_IDS} ids per request"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            y_resp.raise_for_status()
-            youtube_videos = y_resp.json().get("results", [])
-        except requests.exceptions.RequestException:
-            youtube_videos = []
-
-        return Response(
-            {
-                "screenshots": screenshots,
-                "trailers": trailers,
-                "youtube": youtube_videos,
-            },
-            status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+
+        entries, errors = fetch_details(ids)
+
+        fields = parse_fields(request.GET.get("fields"), default="card")
+        etag = content_etag({
+            "results": {str(game_id): entry_etag(entry, fields) for game_id, entry in entries.items()},
+            "errors": sorted(errors),
+        })
+
+        def render():
+            results = {
+                str(game_id): with_thumbnail(request, project(entries[game_id]["data"], fields))
+                for game_id in ids
+                if game_id in entries
+            }
+            return {"results": results, "errors": errors}
+
+        return etag_response(request, etag, render)
+
+
+class GameSimilarView(APIView):
+# Games found in the same libraries - GET /api/games/<game_id>/similar/?limit=10
+# Only reads the neighbours precomputed by `manage.py build_game_similarities`, never RAWG
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, game_id):
+        limit = parse_limit(request, 10, settings.SIMILAR_GAMES_TOP_K)
+        scored = list(
+            GameSimilarity.objects.filter(game_id=game_id)
+            .order_by("-score", "similar_game_id")
+            .values_list("similar_game_id", "score")[:limit]
+        )
+        fields = parse_fields(request.GET.get("fields"), default="card")
+        data = {"results": scored_cards(request, scored, fields)}
+        return etag_response(request, content_etag(data), lambda: data)
+
+
+class GameImageView(APIView):
+# Resized RAWG artwork - GET /api/games/image/<rendition>.<format>?url=<media.rawg.io url>
+# Renditions are immutable (RAWG media urls never change content), so browsers and CDNs keep them for a year
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, rendition, fmt):
+        if rendition not in RENDITIONS or fmt not in FORMATS:
+            return Response({"error": "unknown rendition or format"}, status=status.HTTP_404_NOT_FOUND)
+        url = request.GET.get("url", "")
+        # another worker may evict the file between get_rendition() and open(): render it again once
+        for attempt in range(2):
+            try:
+                path = get_rendition(url, rendition, fmt)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except ImageBusy as e:
+                return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+            except ImageError as e:
+                return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+            etag = f'"{path.stem}"'
+            if etag_matches(request, etag):
+                response = HttpResponseNotModified()
+                break
+            try:
+                response = FileResponse(open(path, "rb"), content_type=FORMATS[fmt][1])
+                break
+            except FileNotFoundError:
+                if attempt:
+                    return Response({"error": "rendition was evicted"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class GamesCacheStatsView(APIView):
+# Cache hit/miss counters for tuning TTLs - GET /api/games/cache/stats/ (staff only)
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(games_cache.stats(), status=status.HTTP_200_OK)
+
+
+class RawgStatusView(APIView):
+# RAWG quota usage, rate limit and circuit breaker state - GET /api/games/rawg/status/ (staff only)
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({**rawg_budget.status(), "client": get_client().stats()}, status=status.HTTP_200_OK)
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from .cache import games_cache
+from .fanout import fan_out
+from .services import ORDERING_MAP, SearchRequest, fetch_detail, fetch_search
+
+logger = logging.getLogger(__name__)
+
+
+# Pre-fetches the category landing pages (and the details of the top rated games on them) into
+# the games cache so the first visitors after a deploy, or after a TTL runs out, never wait on RAWG.
+# Run once with `manage.py warm_games_cache`, or periodically with GAMES_WARM_ON_BOOT.
+
+
+def warm_games_cache(categories=None, pages=None, top=None, min_ttl=0):
+    """
+    Warm ``pages`` pages of each category and the ``top`` best rated game details.
+
+    Entries still fresh for ``min_ttl`` seconds are left alone. Returns counters and errors.
+    """
+    categories = categories or settings.GAMES_WARM_CATEGORIES
+    pages = settings.GAMES_WARM_PAGES if pages is None else pages
+    top = settings.GAMES_WARM_TOP if top is None else top
+    summary = {"fetched": 0, "fresh": 0, "errors": {}}
+
+    def collect(results, errors):
+        for name, (_, fetched) in results.items():
+            summary["fetched" if fetched else "fresh"] += 1
+        summary["errors"].update({name: str(e) for name, e in errors.items()})
+
+    def warm_page(category, page):
+        search = SearchRequest(category=category, page=page)
+        return lambda: games_cache.warm(
+            "search", search.cache_params, lambda: fetch_search(search, search.page_url), min_ttl=min_ttl
+        )
+
+    calls = {
+        f"search:{category}:{page}": warm_page(category, page)
+        for category in categories
+        if category in ORDERING_MAP
+        for page in range(1, pages + 1)
+    }
+    results, errors, _ = fan_out(calls)
+    collect(results, errors)
+
+    # top rated games, in page order, from the popular pages just warmed
+    game_ids = []
+    for page in range(1, pages + 1):
+        data, _ = results.get(f"search:popular:{page}", (None, False))
+        game_ids += [game["id"] for game in (data or {}).get("results", []) if game.get("id")]
+    game_ids = list(dict.fromkeys(game_ids))[:top]
+
+    def warm_detail(game_id):
+        return lambda: games_cache.warm("detail", {"id": game_id}, lambda: fetch_detail(game_id), min_ttl=min_ttl)
+
+    results, errors, _ = fan_out({f"detail:{game_id}": warm_detail(game_id) for game_id in game_ids})
+    collect(results, errors)
+    return summary
+
+
+def _warm_and_log(**options):
+    start = time.monotonic()
+    try:
+        summary = warm_games_cache(**options)
+    except Exception:
+        logger.exception("Warming the games cache failed")
+        return
+    logger.info(
+        "Warmed games cache in %.1fs: %s fetched, %s fresh, %s errors",
+        time.monotonic() - start,
+        summary["fetched"],
+        summary["fresh"],
+        len(summary["errors"]),
+    )
+
+
+def run_periodically(interval, **options):
+    # warm now and then every `interval` seconds (0 = only once);
+    # with a shared cache only one worker warms per interval
+    if not interval:
+        _warm_and_log(**options)
+        return
+    while True:
+        if shared_cache.add("games:warm:lock", 1, timeout=max(int(interval) - 1, 1)):
+            # refresh everything that would go stale before the next run
+            _warm_and_log(min_ttl=interval, **options)
+        time.sleep(interval)
+
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def start_warmer():
+    # called from backend/wsgi.py and backend/asgi.py, so only processes serving requests warm
+    global _started
+    if not settings.GAMES_WARM_ON_BOOT:
+        return
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(
+        target=run_periodically,
+        args=(settings.GAMES_WARM_INTERVAL,),
+        name="games-cache-warmer",
+        daemon=True,
+    ).start()
@@ -5,6 +5,8 @@ from .models import LibraryItem
 
 @admin.register(LibraryItem)
 class LibraryItemAdmin(admin.ModelAdmin):
-    list_display = ('user', 'game_id', 'status', 'created_at')
+    list_display = ('user', 'game', 'status', 'created_at')
     list_filter = ('status', 'created_at')
-    search_fields = ('user__username', 'game_id')
\ No newline at end of file
+    list_select_related = ('user', 'game')
+    raw_id_fields = ('game',)
+    search_fields = ('user__username', 'game__name', '=game__rawg_id')
\ No newline at end of file
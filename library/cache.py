@@ -0,0 +1,90 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+
+# Per-user cache of serialized library responses (list pages, ?all=true), kept in CACHES.
+#
+# Every user has a library version: the time (ns) of the last change, bumped from the
+# LibraryItem post_save/post_delete signals and by hand after bulk_create/update paths that
+# skip signals. Cached payloads are keyed by version, so a write makes the old ones unreachable
+# at once, and the version doubles as the ETag / Last-Modified of the library endpoints.
+# Versions are bumped again when the transaction commits, so a read racing a write can never
+# leave a stale payload under the new version.
+#
+# This needs a CACHES shared by every worker (SHARED_CACHE). Without one, a write on one worker
+# would not bump the version another worker sees, so versions are kept in the database instead
+# (LibraryVersion, updated in the writing transaction) and payloads are not cached.
+
+
+def version_key(user_id):
+    return f"library:version:{user_id}"
+
+
+def library_version(user_id):
+    if not settings.SHARED_CACHE:
+        from .models import LibraryVersion  # models.py imports touch_library from here
+
+        version, _ = LibraryVersion.objects.get_or_create(user_id=user_id, defaults={"version": time.time_ns()})
+        return version.version
+
+    version = cache.get(version_key(user_id))
+    if version is None:
+        # unknown or expired: start a new version (payloads of the old one are unreachable)
+        version = time.time_ns()
+        if not cache.add(version_key(user_id), version, timeout=settings.LIBRARY_CACHE_TTL):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def version_datetime(version):
+    return datetime.fromtimestamp(version / 1_000_000_000, tz=timezone.utc)
+
+
+def _bump(user_ids):
+    version = time.time_ns()
+    cache.set_many({version_key(user_id): version for user_id in user_ids}, timeout=settings.LIBRARY_CACHE_TTL)
+
+
+def touch_library(*user_ids):
+    # call after any change to these users' library items (or the games they point at)
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    if not settings.SHARED_CACHE:
+        from .models import LibraryVersion
+
+        version = time.time_ns()
+        LibraryVersion.objects.bulk_create(
+            [LibraryVersion(user_id=user_id, version=version) for user_id in user_ids],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["version"],
+        )
+        return
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+def payload_key(user_id, version, request):
+    # responses contain absolute urls (pagination links, thumbnails), so the host is part of the key
+    query = sorted(request.GET.lists())
+    raw = json.dumps([request.get_host(), request.path, query], separators=(",", ":"))
+    return f"library:payload:{user_id}:{version}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_payload(key):
+    return cache.get(key) if settings.SHARED_CACHE else None
+
+
+def set_payload(key, data):
+    if not settings.SHARED_CACHE:
+        return
+    # store plain JSON types, not the serializer-bound ReturnList/ReturnDict
+    cache.set(key, json.loads(JSONRenderer().render(data)), timeout=settings.LIBRARY_CACHE_TTL)
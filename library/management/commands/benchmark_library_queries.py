@@ -0,0 +1,127 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from games.models import Game
+from library.models import LibraryItem
+from library.views import summarize_library
+
+
+# Fills the library with synthetic rows (1M by default) inside a transaction that is rolled back
+# at the end, then times the summary and status-filtered list queries of one user and prints
+# their query plans. With --compare (PostgreSQL, SQLite) the plans are printed again after dropping
+# library_user_status_idx inside the same transaction, to show what the index buys.
+
+
+class Command(BaseCommand):
+    help = "Benchmark library summary/list queries on synthetic data and print their query plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Library rows to generate")
+        parser.add_argument("--users", type=int, default=1000, help="Users to spread the rows over")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--compare", action="store_true", help="Also explain without library_user_status_idx")
+        parser.add_argument("--keep", action="store_true", help="Commit the synthetic rows instead of rolling back")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.generate(options["rows"], options["users"], options["batch_size"])
+            self.explain_all(user, "with library_user_status_idx")
+            if options["compare"]:
+                if not connection.features.can_rollback_ddl:
+                    self.stderr.write("--compare needs a database that can roll back DROP INDEX, skipped")
+                else:
+                    with connection.cursor() as cursor:
+                        cursor.execute("DROP INDEX library_user_status_idx")
+                    self.explain_all(user, "without library_user_status_idx")
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def generate(self, rows, users, batch_size):
+        start = time.monotonic()
+        per_user = max(rows // users, 1)
+        run = int(time.time())
+        User = get_user_model()
+        User.objects.bulk_create(
+            [User(username=f"bench-{run}-{n}") for n in range(users)], batch_size=batch_size
+        )
+        user_ids = list(User.objects.filter(username__startswith=f"bench-{run}-").values_list("id", flat=True))
+
+        # one game per library slot, so (user, game, status) stays unique
+        first_game = (Game.objects.aggregate(last=Max("rawg_id"))["last"] or 0) + 1
+        Game.objects.bulk_create(
+            [Game(rawg_id=first_game + n, name=f"Bench game {n}", rating=(n % 50) / 10) for n in range(per_user)],
+            batch_size=batch_size,
+        )
+
+        statuses = [name for name, _ in LibraryItem.STATUS_CHOICES]
+        now = timezone.now()
+        batch, written = [], 0
+        for user_id in user_ids:
+            for n in range(per_user):
+                batch.append(LibraryItem(
+                    user_id=user_id, game_id=first_game + n, status=statuses[(n + user_id) % len(statuses)],
+                ))
+                if len(batch) >= batch_size:
+                    written += self.insert(batch)
+                    batch = []
+        written += self.insert(batch)
+
+        # spread created_at (auto_now_add gave every row the same value)
+        with connection.cursor() as cursor:
+            table = connection.ops.quote_name(LibraryItem._meta.db_table)
+            cursor.execute(
+                f"UPDATE {table} SET created_at = %s, updated_at = %s WHERE user_id = ANY(%s)"
+                if connection.vendor == "postgresql" else
+                f"UPDATE {table} SET created_at = %s, updated_at = %s WHERE user_id IN ({','.join(['%s'] * len(user_ids))})",
+                [now, now, user_ids] if connection.vendor == "postgresql" else [now, now, *user_ids],
+            )
+            cursor.execute(
+                f"UPDATE {table} SET created_at = created_at - (id % 100000) * interval '1 minute'"
+                if connection.vendor == "postgresql" else
+                f"UPDATE {table} SET created_at = datetime(created_at, '-' || (id % 100000) || ' minutes')"
+            )
+            cursor.execute(f"ANALYZE {table}")
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Game._meta.db_table)}")
+
+        self.stdout.write(
+            f"Generated {written} rows for {len(user_ids)} users in {time.monotonic() - start:.1f}s "
+            f"({LibraryItem.objects.count()} library rows in total)"
+        )
+        return User.objects.get(pk=user_ids[len(user_ids) // 2])
+
+    def insert(self, batch):
+        LibraryItem.objects.bulk_create(batch)
+        return len(batch)
+
+    def explain_all(self, user, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+        self.explain("summary (aggregate + recent items)", lambda: summarize_library(user, 5))
+        self.explain(
+            "list ?status=played, first page",
+            lambda: list(
+                LibraryItem.objects.filter(user=user, status="played")
+                .select_related("game").order_by("-created_at", "id")[:50]
+            ),
+        )
+
+    def explain(self, name, run):
+        run()  # warm up
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            run()
+            elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f"\n{name}: {elapsed:.1f} ms, {len(queries)} queries"))
+
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if connection.vendor == "postgresql" else "EXPLAIN QUERY PLAN "
+        for query in queries.captured_queries:
+            self.stdout.write(f"  {query['sql']}")
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + query["sql"])
+                for row in cursor.fetchall():
+                    self.stdout.write("    " + " | ".join(str(col) for col in row))
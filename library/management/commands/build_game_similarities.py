@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from games.models import GameSimilarity
+from library.models import LibraryItem
+from library.similarity import STATUS_WEIGHTS, build_matrix, synthetic_library, top_k_similar
+
+
+class Command(BaseCommand):
+    help = "Precompute the top-K similar games of every game from library co-occurrence."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=settings.SIMILAR_GAMES_TOP_K, help="Neighbours kept per game")
+        parser.add_argument("--min-users", type=int, default=2, help="Skip games in fewer libraries than this")
+        parser.add_argument("--block-size", type=int, default=2048, help="Games per similarity block")
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            help="Time the build on N random library rows instead of the database (nothing is saved)",
+        )
+        parser.add_argument("--synthetic-users", type=int, default=100_000)
+        parser.add_argument("--synthetic-games", type=int, default=50_000)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        if options["synthetic"]:
+            user_ids, game_ids, weights = synthetic_library(
+                options["synthetic"], options["synthetic_users"], options["synthetic_games"]
+            )
+        else:
+            user_ids, game_ids, weights = self.load_library()
+        self.stdout.write(f"Loaded {len(user_ids)} library rows in {time.monotonic() - start:.1f}s")
+
+        step = time.monotonic()
+        matrix, games = build_matrix(user_ids, game_ids, weights, min_users=options["min_users"])
+        self.stdout.write(
+            f"Built {matrix.shape[0]} x {matrix.shape[1]} matrix ({matrix.nnz} entries) "
+            f"in {time.monotonic() - step:.1f}s"
+        )
+
+        step = time.monotonic()
+        pairs = []
+        for rows, cols, scores in top_k_similar(matrix, options["top_k"], options["block_size"]):
+            pairs.append((games[rows], games[cols], scores))
+        total = sum(len(rows) for rows, _, _ in pairs)
+        self.stdout.write(f"Computed {total} top-{options['top_k']} pairs in {time.monotonic() - step:.1f}s")
+
+        if options["synthetic"]:
+            self.stdout.write(f"Total {time.monotonic() - start:.1f}s (synthetic run, nothing saved)")
+            return
+
+        step = time.monotonic()
+        # replace the whole table in one transaction, readers keep seeing the old one until commit
+        with transaction.atomic():
+            GameSimilarity.objects.all().delete()
+            for game_ids, similar_ids, scores in pairs:
+                GameSimilarity.objects.bulk_create(
+                    [
+                        GameSimilarity(game_id=int(g), similar_game_id=int(s), score=round(float(score), 4))
+                        for g, s, score in zip(game_ids, similar_ids, scores)
+                    ],
+                    batch_size=5000,
+                )
+        self.stdout.write(f"Saved in {time.monotonic() - step:.1f}s, total {time.monotonic() - start:.1f}s")
+
+    def load_library(self):
+        queryset = LibraryItem.objects.values_list("user_id", "game_id", "status")
+        count = queryset.count()
+        user_ids = np.empty(count, dtype=np.int64)
+        game_ids = np.empty(count, dtype=np.int64)
+        weights = np.empty(count, dtype=np.float32)
+        n = 0
+        for user_id, game_id, status in queryset.iterator(chunk_size=20_000):
+            if n == count:  # rows added while loading wait for the next build
+                break
+            user_ids[n], game_ids[n], weights[n] = user_id, game_id, STATUS_WEIGHTS.get(status, 0)
+            n += 1
+        return user_ids[:n], game_ids[:n], weights[:n]
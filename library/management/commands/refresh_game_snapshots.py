@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from library.snapshots import refresh_stale_games
+
+
+class Command(BaseCommand):
+    help = "Re-fetch stale game metadata shared by library items from RAWG."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=settings.LIBRARY_SNAPSHOT_MAX_AGE,
+            help="Refresh games not synced for this many seconds",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=settings.LIBRARY_SNAPSHOT_REFRESH_LIMIT, help="Max games per run"
+        )
+        parser.add_argument(
+            "--interval", type=int, default=0, help="Keep running and refresh again every N seconds"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            refreshed, errors = refresh_stale_games(options["max_age"], options["limit"])
+            self.stdout.write(f"Refreshed {refreshed} games in {time.monotonic() - start:.1f}s")
+            for game_id, error in errors.items():
+                self.stderr.write(f"  {game_id}: {error}")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # existing rows were last modified when created, as far as we know
+    LibraryItem = apps.get_model('library', 'LibraryItem')
+    LibraryItem.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
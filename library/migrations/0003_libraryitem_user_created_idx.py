@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0002_libraryitem_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='library_user_created_idx'),
+        ),
+    ]
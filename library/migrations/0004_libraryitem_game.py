@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_missing_games(apps, schema_editor):
+    # every library row needs a shared games.Game row; seed missing ones from the per-row copies
+    Game = apps.get_model('games', 'Game')
+    LibraryItem = apps.get_model('library', 'LibraryItem')
+    known = set(Game.objects.values_list('rawg_id', flat=True))
+    games = {}
+    for item in LibraryItem.objects.order_by('-updated_at').iterator():
+        if item.game_id in known or item.game_id in games:
+            continue
+        games[item.game_id] = Game(
+            rawg_id=item.game_id,
+            name=(item.title or '')[:255],
+            background_image=item.background_image,
+            rating=item.rating,
+        )
+    Game.objects.bulk_create(games.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_game_search_index'),
+        ('library', '0003_libraryitem_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_games, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='libraryitem',
+            unique_together=set(),
+        ),
+        migrations.RenameField(
+            model_name='libraryitem',
+            old_name='game_id',
+            new_name='game',
+        ),
+        migrations.AlterField(
+            model_name='libraryitem',
+            name='game',
+            field=models.ForeignKey(db_column='game_id', help_text='RAWG game ID', on_delete=django.db.models.deletion.PROTECT, related_name='library_items', to='games.game', to_field='rawg_id'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='libraryitem',
+            unique_together={('user', 'game', 'status')},
+        ),
+        migrations.RemoveField(
+            model_name='libraryitem',
+            name='background_image',
+        ),
+        migrations.RemoveField(
+            model_name='libraryitem',
+            name='rating',
+        ),
+        migrations.RemoveField(
+            model_name='libraryitem',
+            name='title',
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_game_search_index'),
+        ('library', '0004_libraryitem_game'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['user', 'status', '-created_at', 'id'], name='library_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_game_search_index'),
+        ('library', '0005_libraryitem_user_status_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.BigIntegerField()),
+                ('game_id', models.IntegerField(help_text='RAWG game ID')),
+                ('status', models.CharField(choices=[('favorite', 'Favorite'), ('wishlist', 'Wishlist'), ('played', 'Played')], max_length=10)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['user', 'updated_at'], name='library_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='librarytombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='librarytombstone',
+            index=models.Index(fields=['user', 'deleted_at'], name='library_tombstone_user_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('library', '0006_librarytombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='library_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
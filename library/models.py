@@ -1,5 +1,16 @@
-from django.db import models
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from games.models import Game
+from . import popularity
+from .cache import touch_library
 
 # Create your models here.
 
@@ -13,16 +24,130 @@ class LibraryItem(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='library_items')
-    game_id = models.IntegerField(help_text='RAWG game ID')
+    # shared game metadata (title, artwork, rating); the column keeps the RAWG id, so game_id is still the RAWG id
+    game = models.ForeignKey(
+        'games.Game', to_field='rawg_id', db_column='game_id',
+        on_delete=models.PROTECT, related_name='library_items', help_text='RAWG game ID',
+    )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
-    title = models.CharField(max_length=255, blank=True)
-    background_image = models.URLField(blank=True, null=True)
-    rating = models.FloatField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('user', 'game_id', 'status') # user can't add the same game to the same status twice
+        unique_together = ('user', 'game', 'status') # user can't add the same game to the same status twice
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='library_user_created_idx'), # cursor pagination
+            models.Index(fields=['user', 'status', '-created_at', 'id'], name='library_user_status_idx'), # ?status= lists, summary
+            models.Index(fields=['user', 'updated_at'], name='library_user_updated_idx'), # changes feed
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.game_id} ({self.status})"
\ No newline at end of file
+        return f"{self.user.username} - {self.game_id} ({self.status})"
+
+def library_statuses(user, game_ids):
+    # {game_id: {"favorite": bool, "wishlist": bool, "played": bool}} for every id, in one query that
+    # only reads the (user, game, status) unique index
+    statuses = {game_id: {name: False for name, _ in LibraryItem.STATUS_CHOICES} for game_id in game_ids}
+    if statuses and user.is_authenticated:
+        items = LibraryItem.objects.filter(user=user, game_id__in=list(statuses)).values_list("game_id", "status")
+        for game_id, status in items:
+            statuses[game_id][status] = True
+    return statuses
+
+def bulk_add_items(user_id, items):
+    """
+    Insert unsaved LibraryItems of one user, skipping any a concurrent add already inserted, and
+    return the ones actually inserted (counted in popularity, library version bumped).
+    """
+    with transaction.atomic():
+        LibraryItem.objects.bulk_create(items, ignore_conflicts=True)
+        # ignore_conflicts sets no pks; our rows are the ones carrying our created_at
+        stamps = {(item.game_id, item.status): item.created_at for item in items}
+        inserted = {
+            (game_id, status)
+            for game_id, status, created_at in LibraryItem.objects.filter(
+                user_id=user_id, game_id__in={game_id for game_id, _ in stamps}
+            ).values_list('game_id', 'status', 'created_at')
+            if stamps.get((game_id, status)) == created_at
+        }
+        created = [item for item in items if (item.game_id, item.status) in inserted]
+        if created:
+            # bulk_create sends no post_save
+            touch_library(user_id)
+            popularity.record((item.game_id, item.status, item.created_at) for item in created)
+    return created
+
+class LibraryVersion(models.Model):
+    # time (ns) of the user's last library change, used instead of CACHES when it is not shared
+    # between workers (see library/cache.py)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='library_version')
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.user_id} - {self.version}"
+
+class LibraryTombstone(models.Model):
+    # left behind by a deleted LibraryItem so GET /api/library/changes/ can report the deletion;
+    # kept for LIBRARY_TOMBSTONE_TTL seconds, older sync cursors get a full resync instead
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='library_tombstones')
+    item_id = models.BigIntegerField()
+    game_id = models.IntegerField(help_text='RAWG game ID')
+    status = models.CharField(max_length=10, choices=LibraryItem.STATUS_CHOICES)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='library_tombstone_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.game_id} ({self.status}) deleted"
+
+def _library_delete(origin):
+    # deletes of library items themselves, not the cascade when the whole user is being deleted
+    return isinstance(origin, LibraryItem) or (isinstance(origin, QuerySet) and origin.model is LibraryItem)
+
+@receiver(post_delete, sender=LibraryItem)
+def leave_tombstone(sender, instance, origin=None, **kwargs):
+    if not _library_delete(origin):
+        return
+    LibraryTombstone.objects.create(
+        user_id=instance.user_id, item_id=instance.pk, game_id=instance.game_id, status=instance.status
+    )
+    LibraryTombstone.objects.filter(
+        user_id=instance.user_id, deleted_at__lt=timezone.now() - timedelta(seconds=settings.LIBRARY_TOMBSTONE_TTL)
+    ).delete()
+
+@receiver(post_save, sender=LibraryItem)
+@receiver(post_delete, sender=LibraryItem)
+def invalidate_library_cache(sender, instance, origin=None, **kwargs):
+    if origin is not None and not _library_delete(origin):
+        return  # the user is going away, with their LibraryVersion row
+    touch_library(instance.user_id)
+
+@receiver(post_save, sender=Game)
+def invalidate_game_owners(sender, instance, created, **kwargs):
+    # cached library pages embed the game's title, artwork and rating
+    if not created:
+        touch_library(*instance.library_items.values_list('user_id', flat=True).distinct())
+
+@receiver(pre_save, sender=LibraryItem)
+def remember_previous_status(sender, instance, **kwargs):
+    # status edits move the game between popularity counters
+    instance._previous_status = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+@receiver(post_save, sender=LibraryItem)
+def count_added_item(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_status', None)
+    if created:
+        popularity.record([(instance.game_id, instance.status, instance.created_at)])
+    elif previous and previous != instance.status:
+        popularity.record([(instance.game_id, previous, instance.created_at)], sign=-1)
+        popularity.record([(instance.game_id, instance.status, instance.created_at)])
+
+@receiver(post_delete, sender=LibraryItem)
+def count_removed_item(sender, instance, **kwargs):
+    popularity.record([(instance.game_id, instance.status, instance.created_at)], sign=-1)
@@ -0,0 +1,11 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class LibraryCursorPagination(CursorPagination):
+    # keyset pagination: each page is a range scan on the (user, -created_at, id) index,
+    # however deep the client pages
+    ordering = ("-created_at", "id")
+    page_size = settings.LIBRARY_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.LIBRARY_MAX_PAGE_SIZE
@@ -0,0 +1,129 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from games.models import GamePopularity
+
+
+# Per-game popularity counters (games.GamePopularity), updated incrementally as library items come
+# and go instead of a COUNT ... GROUP BY over the whole library.
+#
+# "trend" is a time-decayed activity score: an item added at time t is worth
+# weight * 2 ** ((t - EPOCH) / half_life). Every such sum is the decayed score times the same
+# factor 2 ** ((now - EPOCH) / half_life), so it ranks games by their current decayed score, but
+# it grows without bound and overflows a float within years. The stored column is its log2
+# instead (NULL for no activity): it orders the same way, only grows linearly with time, and
+# adding or removing an item is a log-sum under the game row's lock.
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+TRENDING_WEIGHTS = {
+    "favorite": 3.0,
+    "played": 2.0,
+    "wishlist": 1.0,
+}
+
+
+def _growth(moment):
+    # log2 of the growth factor at ``moment``
+    return (moment - EPOCH).total_seconds() / (settings.TRENDING_HALF_LIFE_DAYS * 86400)
+
+
+def contribution(status, created_at):
+    # log2 of the item's share of the trend, None if its status does not count
+    weight = TRENDING_WEIGHTS.get(status, 0)
+    return math.log2(weight) + _growth(created_at) if weight > 0 else None
+
+
+def log_add(total, term):
+    # log2(2 ** total + 2 ** term), with None standing for an empty sum
+    if total is None or term is None:
+        return term if total is None else total
+    high, low = max(total, term), min(total, term)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def log_sub(total, term):
+    # log2(2 ** total - 2 ** term); None once nothing (or only rounding error) is left
+    if total is None or term is None:
+        return total
+    rest = 1 - 2 ** (term - total) if term < total else 0
+    return total + math.log2(rest) if rest > 1e-9 else None
+
+
+def decayed(trend, now=None):
+    # stored trend -> decayed score at ``now``
+    if trend is None:
+        return 0.0
+    return 2 ** (trend - _growth(now or timezone.now()))
+
+
+def apply(deltas, trends, sign=1):
+    """
+    Apply ``{game_id: {"favorite_count": n, ...}}`` counter increments and add (sign=1) or remove
+    (sign=-1) the ``{game_id: log2 term}`` trend terms, creating missing rows.
+    """
+    if not deltas:
+        return
+    with transaction.atomic():
+        GamePopularity.objects.bulk_create(
+            [GamePopularity(game_id=game_id) for game_id in deltas], ignore_conflicts=True
+        )
+        stored = dict(
+            GamePopularity.objects.select_for_update()
+            .filter(game_id__in=list(deltas)).values_list("game_id", "trend")
+        )
+        combine = log_add if sign > 0 else log_sub
+        for game_id, fields in deltas.items():
+            GamePopularity.objects.filter(game_id=game_id).update(
+                trend=combine(stored.get(game_id), trends.get(game_id)),
+                **{name: F(name) + value for name, value in fields.items() if value},
+            )
+
+
+def record(items, sign=1):
+    # items: iterable of (game_id, status, created_at); sign=-1 for removed items
+    deltas, trends = defaultdict(lambda: defaultdict(int)), {}
+    for game_id, status, created_at in items:
+        deltas[game_id][f"{status}_count"] += sign
+        trends[game_id] = log_add(trends.get(game_id), contribution(status, created_at))
+    apply(deltas, trends, sign)
+
+
+def reconcile(items, chunk_size=1000):
+    """
+    Recompute every counter from ``items`` (an iterator of (game_id, status, created_at) over the
+    whole library) and return the number of games whose stored counts had drifted.
+    """
+    totals = defaultdict(lambda: {"favorite_count": 0, "wishlist_count": 0, "played_count": 0, "trend": None})
+    for game_id, status, created_at in items:
+        totals[game_id][f"{status}_count"] += 1
+        totals[game_id]["trend"] = log_add(totals[game_id]["trend"], contribution(status, created_at))
+
+    count_fields = ["favorite_count", "wishlist_count", "played_count"]
+    drifted, stored, orphans = 0, set(), []
+    for row in GamePopularity.objects.values("game_id", *count_fields).iterator(chunk_size=chunk_size):
+        stored.add(row["game_id"])
+        expected = totals.get(row["game_id"])
+        if expected is None:
+            orphans.append(row["game_id"])
+        if expected is None or any(row[name] != expected[name] for name in count_fields):
+            drifted += 1
+    drifted += len(set(totals) - stored)
+
+    with transaction.atomic():
+        for start in range(0, len(orphans), chunk_size):
+            GamePopularity.objects.filter(game_id__in=orphans[start:start + chunk_size]).delete()
+        GamePopularity.objects.bulk_create(
+            [GamePopularity(game_id=game_id, **fields) for game_id, fields in totals.items()],
+            update_conflicts=True,
+            unique_fields=["game_id"],
+            update_fields=count_fields + ["trend"],
+            batch_size=chunk_size,
+        )
+    return drifted
@@ -1,8 +1,32 @@
+import requests
 from rest_framework import serializers
 from .models import LibraryItem
+from .snapshots import ensure_game
+from games.images import thumbnail_url
 
 class LibraryItemSerializer(serializers.ModelSerializer):
+    game_id = serializers.IntegerField(help_text='RAWG game ID')
+    # game metadata lives once in the shared games.Game row (see library/snapshots.py)
+    title = serializers.CharField(source='game.name', read_only=True)
+    background_image = serializers.CharField(source='game.background_image', read_only=True)
+    rating = serializers.FloatField(source='game.rating', read_only=True)
+    thumbnail = serializers.SerializerMethodField() # resized copy of background_image (games image proxy)
+
     class Meta:
         model = LibraryItem
-        fields = ('id','user','game_id','status','title','background_image','rating','created_at')
-        read_only_fields = ('user','created_at')
\ No newline at end of file
+        fields = ('id','user','game_id','status','title','background_image','thumbnail','rating','created_at')
+        read_only_fields = ('user','created_at')
+
+    def get_thumbnail(self, obj):
+        request = self.context.get('request')
+        return thumbnail_url(request, obj.game.background_image) if request else None
+
+    def validate_game_id(self, value):
+        # unknown games are fetched once and stored for everyone
+        try:
+            game = ensure_game(value)
+        except requests.exceptions.RequestException as e:
+            raise serializers.ValidationError(f"could not load game: {e}")
+        if game is None:
+            raise serializers.ValidationError("Game not found")
+        return value
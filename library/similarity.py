@@ -0,0 +1,78 @@
+import numpy as np
+from scipy import sparse
+
+
+# Item-item similarities from library co-occurrence, used by `manage.py build_game_similarities`.
+# Only the build needs NumPy/SciPy; the API reads the precomputed games.GameSimilarity rows.
+#
+# Every library item becomes a weighted entry of a sparse user x game matrix (a game in several
+# lists of one user adds up). Columns are L2 normalized, so X.T @ X is the cosine similarity of
+# every pair of games. It is computed for a block of games at a time and only the top K
+# neighbours of each game are kept.
+
+STATUS_WEIGHTS = {
+    "favorite": 2.0,
+    "played": 1.0,
+    "wishlist": 0.5,
+}
+
+
+def build_matrix(user_ids, game_ids, weights, min_users=1):
+    """
+    Sparse user x game matrix from parallel arrays of library items.
+
+    Returns ``(matrix, games)`` where ``games[column]`` is the RAWG id of each column. Games in
+    fewer than ``min_users`` libraries are dropped, their neighbours would be noise.
+    """
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    games, game_index = np.unique(game_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), (user_index, game_index)),
+        shape=(len(users), len(games)),
+    )
+    matrix.sum_duplicates()
+
+    if min_users > 1:
+        keep = np.flatnonzero(np.diff(matrix.tocsc().indptr) >= min_users)
+        matrix, games = matrix[:, keep], games[keep]
+    return matrix, games
+
+
+def top_k_similar(matrix, k, block_size=2048):
+    """
+    Top ``k`` cosine neighbours of every column of ``matrix``.
+
+    Yields ``(rows, cols, scores)`` arrays (column indices, best first per row) one block at a time,
+    so memory is bounded by ``block_size`` rows of the similarity matrix.
+    """
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    normalized = sparse.csc_matrix(matrix.multiply(1 / norms).astype(np.float32))
+    normalized_t = normalized.T.tocsr()
+
+    n_games = matrix.shape[1]
+    for start in range(0, n_games, block_size):
+        stop = min(start + block_size, n_games)
+        block = (normalized_t[start:stop] @ normalized).tocoo()
+        rows, cols, scores = block.row + start, block.col, block.data
+
+        # a game is not its own neighbour
+        keep = (rows != cols) & (scores > 0)
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        # sort by row, best score first, then keep the first k of every row
+        order = np.lexsort((-scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        starts = np.searchsorted(rows, rows, side="left")
+        keep = np.arange(len(rows)) - starts < k
+        yield rows[keep], cols[keep], scores[keep]
+
+
+def synthetic_library(rows, users, games, seed=0):
+    # random library with a long-tail game popularity (a few hits, many rarely added games)
+    rng = np.random.default_rng(seed)
+    user_ids = rng.integers(0, users, size=rows)
+    popularity = 1 / np.arange(1, games + 1) ** 0.8
+    game_ids = rng.choice(games, size=rows, p=popularity / popularity.sum())
+    weights = rng.choice(list(STATUS_WEIGHTS.values()), size=rows)
+    return user_ids, game_ids, weights
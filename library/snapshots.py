@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from games.cache import games_cache
+from games.catalog import upsert_games
+from games.models import Game
+from games.fanout import fan_out
+from games.rawg import get_client
+from games.services import fetch_detail, fetch_details
+from .cache import touch_library
+from .models import LibraryItem
+
+
+# LibraryItem rows point at the shared games.Game row of their RAWG game (title, artwork, rating
+# are stored once, not per user). Rows are created the first time anyone adds a game and kept
+# current by `manage.py refresh_game_snapshots`.
+
+
+def ensure_game(game_id):
+    """
+    The Game row for a RAWG id, fetching and storing it if nobody has added the game yet.
+
+    Returns None when RAWG has no such game; RAWG errors (RawgUnavailable included) propagate.
+    """
+    game = Game.objects.filter(rawg_id=game_id).first()
+    if game is None:
+        upsert_games([games_cache.get_or_fetch("detail", {"id": game_id}, lambda: fetch_detail(game_id))])
+        game = Game.objects.filter(rawg_id=game_id).first()
+    return game
+
+
+def ensure_games(game_ids):
+    """
+    Make sure a Game row exists for every RAWG id: ``({rawg_id: Game}, {str(rawg_id): error})``.
+
+    Known games cost one query; unknown ones are fetched concurrently (games cache, local
+    catalog, RAWG) and stored in one bulk upsert.
+    """
+    game_ids = list(dict.fromkeys(game_ids))
+    games = {game.rawg_id: game for game in Game.objects.filter(rawg_id__in=game_ids)}
+    missing = [game_id for game_id in game_ids if game_id not in games]
+    if not missing:
+        return games, {}
+
+    entries, errors = fetch_details(missing)
+    upsert_games([entry["data"] for entry in entries.values()])
+    games.update({game.rawg_id: game for game in Game.objects.filter(rawg_id__in=entries)})
+    for game_id in missing:
+        if game_id not in games and str(game_id) not in errors:
+            errors[str(game_id)] = "not found"
+    return games, errors
+
+
+def refresh_stale_games(max_age=None, limit=None):
+    """
+    Re-fetch from RAWG the library games whose snapshot is older than ``max_age`` seconds
+    (LIBRARY_SNAPSHOT_MAX_AGE), oldest first. Returns ``(refreshed, {str(rawg_id): error})``.
+    """
+    max_age = settings.LIBRARY_SNAPSHOT_MAX_AGE if max_age is None else max_age
+    limit = limit or settings.LIBRARY_SNAPSHOT_REFRESH_LIMIT
+    game_ids = list(
+        Game.objects.filter(library_items__isnull=False, synced_at__lt=timezone.now() - timedelta(seconds=max_age))
+        .order_by("synced_at")
+        .values_list("rawg_id", flat=True)
+        .distinct()[:limit]
+    )
+    # straight from RAWG, not the games cache, so a refresh never stores an old copy again
+    client = get_client()
+    results, errors, missing = fan_out(
+        {game_id: lambda game_id=game_id: client.game(game_id) for game_id in game_ids},
+        timeout=settings.GAMES_BATCH_DEADLINE * 4,
+    )
+    refreshed = upsert_games(list(results.values()))
+    # bulk upserts send no post_save, drop the cached library pages showing these games
+    touch_library(*LibraryItem.objects.filter(game_id__in=results).values_list("user_id", flat=True).distinct())
+    errors = {str(game_id): str(e) for game_id, e in errors.items()}
+    errors.update({str(game_id): "timed out" for game_id in missing})
+    return refreshed, errors
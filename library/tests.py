@@ -2,8 +2,15 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import LibraryItem
-from unittest.mock import patch
+import io
+import time
+from .models import LibraryItem, LibraryTombstone
+from . import popularity
+from unittest.mock import MagicMock, patch
+from django.test import override_settings
+from games.cache import games_cache
+from django.core.cache import cache
+from games.models import Game, GamePopularity, GameSimilarity
 from django.conf import settings
 
 # Create your tests here.
@@ -12,6 +19,7 @@ User = get_user_model()
 
 class LibraryTests(APITestCase):
     def setUp(self):
+        cache.clear() # per-user library pages and versions
         self.user = User.objects.create_user(
             username="libuser",
             email="libuser@example.com",
@@ -33,10 +41,10 @@ class LibraryTests(APITestCase):
 
     def test_list_and_delete_library_items(self):
         # Create items for this user
+        game = Game.objects.create(rawg_id=1234, name="Test Game")
         item = LibraryItem.objects.create(
             user=self.user,
-            game_id=1234,
-            title="Test Game",
+            game=game,
             status="wishlist",
         )
 
@@ -46,8 +54,8 @@ class LibraryTests(APITestCase):
         # List
         list_res = self.client.get(self.list_url)
         self.assertEqual(list_res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(list_res.data), 1)
-        self.assertEqual(list_res.data[0]["title"], "Test Game")
+        self.assertEqual(len(list_res.data["results"]), 1)
+        self.assertEqual(list_res.data["results"][0]["title"], "Test Game")
 
         # Delete
         detail_url = reverse("library_detail", args=[item.id])
@@ -57,6 +65,7 @@ class LibraryTests(APITestCase):
 
 class AddFromRawgTests(APITestCase):
     def setUp(self):
+        cache.clear() # RAWG budget and breaker state
         self.user = User.objects.create_user(
             username="rawguser",
             email="rawg@example.com",
@@ -72,7 +81,7 @@ class AddFromRawgTests(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
         self.add_url = reverse("add-from-rawg")  # /api/library/add-from-rawg/
 
-    @patch("library.views.requests.get")
+    @patch("games.rawg.requests.Session.get")
     def test_add_from_rawg_creates_item(self, mock_get):
         # Mock RAWG response
         mock_get.return_value.status_code = 200
@@ -91,4 +100,561 @@ class AddFromRawgTests(APITestCase):
             LibraryItem.objects.filter(
                 user=self.user, game_id=999, status="wishlist"
             ).exists()
-        )
\ No newline at end of file
+        )
+        self.assertEqual(Game.objects.get(rawg_id=999).name, "Mock Game")
+
+    @patch("games.rawg.requests.Session.get")
+    def test_add_known_game_makes_no_rawg_call(self, mock_get):
+        Game.objects.create(rawg_id=999, name="Mock Game", rating=4.5)
+        other = User.objects.create_user(username="other", password="testPwd!")
+        LibraryItem.objects.create(user=other, game_id=999, status="played")
+
+        response = self.client.post(self.add_url, {"game_id": 999, "status": "wishlist"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_get.assert_not_called()
+        item = LibraryItem.objects.select_related("game").get(user=self.user, game_id=999)
+        self.assertEqual(item.game.name, "Mock Game")
+
+@override_settings(RAWG_MAX_RETRIES=0)
+class GameSnapshotRefreshTests(APITestCase):
+    def setUp(self):
+        cache.clear() # RAWG budget and breaker state
+
+    @patch("games.rawg.requests.Session.get")
+    def test_only_stale_library_games_are_refreshed(self, mock_get):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .snapshots import refresh_stale_games
+
+        user = User.objects.create_user(username="snap", password="testPwd!")
+        stale, fresh = Game.objects.create(rawg_id=1, name="Old"), Game.objects.create(rawg_id=2, name="New")
+        Game.objects.create(rawg_id=3, name="Not in any library")
+        Game.objects.filter(rawg_id__in=[1, 3]).update(synced_at=timezone.now() - timedelta(days=30))
+        LibraryItem.objects.create(user=user, game=stale, status="played")
+        LibraryItem.objects.create(user=user, game=fresh, status="played")
+
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"id": 1, "name": "Old (Remastered)", "rating": 4.2}
+        refreshed, errors = refresh_stale_games(max_age=60 * 60 * 24 * 7)
+
+        self.assertEqual((refreshed, errors), (1, {}))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(Game.objects.get(rawg_id=1).name, "Old (Remastered)")
+
+class LibraryConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear() # per-user library pages and versions
+        self.user = User.objects.create_user(username="etaguser", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.list_url = reverse("library_list_create")
+        Game.objects.bulk_create([Game(rawg_id=1, name="One"), Game(rawg_id=2, name="Two")])
+        self.item = LibraryItem.objects.create(user=self.user, game_id=1, status="wishlist")
+
+    def test_matching_etag_returns_304_without_list_query(self):
+        first = self.client.get(self.list_url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", first)
+        self.assertIn("Authorization", first["Vary"])
+
+        # only the library version lookup (one row without a shared cache), no list query
+        with self.assertNumQueries(1):
+            second = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_on_add_edit_and_delete(self):
+        etags = [self.client.get(self.list_url)["ETag"]]
+
+        other = LibraryItem.objects.create(user=self.user, game_id=2, status="played")
+        etags.append(self.client.get(self.list_url)["ETag"])
+
+        self.client.patch(reverse("library_detail", args=[self.item.id]), {"status": "favorite"})
+        etags.append(self.client.get(self.list_url)["ETag"])
+
+        other.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etags.append(response["ETag"])
+
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_etag_changes_when_game_snapshot_is_refreshed(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        game = Game.objects.get(rawg_id=1)
+        game.name = "One (Remastered)"
+        game.save()
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["title"], "One (Remastered)")
+
+
+@override_settings(SHARED_CACHE=True)
+class LibraryCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("library_list_create")
+        Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}") for n in range(1, 4)])
+        self.item = LibraryItem.objects.create(user=self.user, game_id=1, status="played")
+
+    def test_repeat_reads_skip_the_database_and_writes_show_up_at_once(self):
+        self.assertEqual(len(self.client.get(self.url).data["results"]), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(self.url).data["results"]), 1)
+
+        LibraryItem.objects.create(user=self.user, game_id=2, status="played")
+        self.assertEqual(len(self.client.get(self.url).data["results"]), 2)
+
+        self.item.delete()
+        self.assertEqual([i["game_id"] for i in self.client.get(self.url).data["results"]], [2])
+
+    def test_bulk_add_and_game_updates_invalidate(self):
+        self.client.get(self.url)
+        response = self.client.post(reverse("add-from-rawg-bulk"), {"items": [{"game_id": 3}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self.client.get(self.url).data["results"]), 2)
+
+        game = Game.objects.get(rawg_id=1)
+        game.name = "Renamed"
+        game.save()
+        titles = {i["title"] for i in self.client.get(self.url).data["results"]}
+        self.assertIn("Renamed", titles)
+
+    def test_users_do_not_share_pages(self):
+        self.client.get(self.url)
+        other = User.objects.create_user(username="other", password="testPwd!")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).data["results"], [])
+
+    @override_settings(SHARED_CACHE=False)
+    def test_versions_live_in_the_database_without_a_shared_cache(self):
+        from .cache import version_key
+        from .models import LibraryVersion
+
+        cache.clear()  # setUp ran with the shared cache
+        first = self.client.get(self.url)
+        # another worker's local cache would never see this write, so nothing is kept in CACHES
+        LibraryItem.objects.create(user=self.user, game_id=2, status="played")
+        self.assertIsNone(cache.get(version_key(self.user.pk)))
+        self.assertFalse([key for key in cache._cache if "library:" in key])
+
+        with self.assertNumQueries(2):  # version row, page
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.data["results"]), 2)
+        self.assertIn(str(LibraryVersion.objects.get(user=self.user).version), second["ETag"])
+
+
+class LibraryChangesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="syncer", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("library_changes")
+        Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}") for n in range(1, 4)])
+        self.first = LibraryItem.objects.create(user=self.user, game_id=1, status="played")
+        self.second = LibraryItem.objects.create(user=self.user, game_id=2, status="played")
+
+    @override_settings(LIBRARY_CHANGES_OVERLAP=0)
+    def test_delta_since_cursor(self):
+        full = self.client.get(self.url).data
+        self.assertTrue(full["reset"])
+        self.assertEqual({item["game_id"] for item in full["items"]}, {1, 2})
+
+        time.sleep(0.01)
+        self.client.patch(reverse("library_detail", args=[self.first.id]), {"status": "favorite"})
+        self.client.delete(reverse("library_detail", args=[self.second.id]))
+        LibraryItem.objects.create(user=self.user, game_id=3, status="wishlist")
+
+        delta = self.client.get(self.url, {"since": full["cursor"]}).data
+        self.assertFalse(delta["reset"])
+        self.assertEqual([(item["game_id"], item["status"]) for item in delta["items"]], [(1, "favorite"), (3, "wishlist")])
+        self.assertEqual(delta["deleted"], [self.second.id])
+
+        time.sleep(0.01)
+        empty = self.client.get(self.url, {"since": delta["cursor"]}).data
+        self.assertEqual((empty["items"], empty["deleted"]), ([], []))
+
+    @override_settings(LIBRARY_CHANGES_OVERLAP=0)
+    def test_refreshed_game_snapshots_are_sent_again(self):
+        from games.catalog import upsert_games
+
+        cursor = self.client.get(self.url).data["cursor"]
+        time.sleep(0.01)
+        upsert_games([{"id": 2, "name": "Game 2 (Remastered)"}])  # what refresh_game_snapshots does
+
+        delta = self.client.get(self.url, {"since": cursor}).data
+        self.assertEqual([(item["game_id"], item["title"]) for item in delta["items"]], [(2, "Game 2 (Remastered)")])
+
+    def test_expired_or_invalid_cursor(self):
+        with override_settings(LIBRARY_TOMBSTONE_TTL=0):
+            res = self.client.get(self.url, {"since": "1"})
+        self.assertTrue(res.data["reset"])
+        self.assertEqual(len(res.data["items"]), 2)
+        self.assertEqual(self.client.get(self.url, {"since": "soon"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_the_user_leaves_no_tombstones(self):
+        self.user.delete()
+        self.assertFalse(LibraryTombstone.objects.exists())
+
+
+class LibraryPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear() # per-user library pages and versions
+        self.user = User.objects.create_user(username="pager", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.list_url = reverse("library_list_create")
+        for game_id in range(1, 6):
+            game = Game.objects.create(rawg_id=game_id, name=f"Game {game_id}")
+            LibraryItem.objects.create(
+                user=self.user, game=game,
+                status="played" if game_id % 2 else "wishlist",
+            )
+
+    def test_cursor_pages_walk_whole_library_newest_first(self):
+        seen, url, params = [], self.list_url, {"page_size": 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            seen += [item["game_id"] for item in res.data["results"]]
+            url, params = res.data["next"], None
+
+        self.assertEqual(seen, [5, 4, 3, 2, 1])
+
+    def test_status_filter(self):
+        res = self.client.get(self.list_url, {"status": "wishlist"})
+        self.assertEqual([item["game_id"] for item in res.data["results"]], [4, 2])
+
+        res = self.client.get(self.list_url, {"status": "bogus"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_all_returns_plain_list(self):
+        res = self.client.get(self.list_url, {"all": "true"})
+        self.assertIsInstance(res.data, list)
+        self.assertEqual(len(res.data), 5)
+
+
+class LibrarySummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear() # per-user library pages and versions
+        self.user = User.objects.create_user(username="summary", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("library_summary")
+        games = Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}", rating=n) for n in range(1, 5)])
+        for game, status_value in zip(games, ["played", "played", "wishlist", "favorite"]):
+            LibraryItem.objects.create(user=self.user, game=game, status=status_value)
+        other = User.objects.create_user(username="someone", password="testPwd!")
+        LibraryItem.objects.create(user=other, game=games[0], status="favorite")
+
+    def test_counts_average_and_recent(self):
+        with self.assertNumQueries(3):  # library version (for the ETag), summary aggregate, recent items
+            res = self.client.get(self.url, {"recent": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["total"], 4)
+        self.assertEqual(res.data["counts"], {"favorite": 1, "wishlist": 1, "played": 2})
+        self.assertEqual(res.data["average_rating"], 2.5)
+        self.assertEqual([item["game_id"] for item in res.data["recent"]], [4, 3])
+
+        again = self.client.get(self.url, {"recent": 2}, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_empty_library(self):
+        LibraryItem.objects.filter(user=self.user).delete()
+        res = self.client.get(self.url)
+        self.assertEqual(res.data["total"], 0)
+        self.assertIsNone(res.data["average_rating"])
+        self.assertEqual(res.data["recent"], [])
+
+
+class LibraryStatusTests(APITestCase):
+    def setUp(self):
+        cache.clear() # per-user library versions
+        self.user = User.objects.create_user(username="status", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("library_status")
+        games = Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}") for n in range(1, 4)])
+        LibraryItem.objects.create(user=self.user, game=games[0], status="played")
+        LibraryItem.objects.create(user=self.user, game=games[0], status="favorite")
+        LibraryItem.objects.create(user=self.user, game=games[1], status="wishlist")
+        other = User.objects.create_user(username="someone", password="testPwd!")
+        LibraryItem.objects.create(user=other, game=games[2], status="favorite")
+
+    def test_statuses_for_requested_ids(self):
+        with self.assertNumQueries(2):  # library version, statuses
+            res = self.client.get(self.url, {"game_ids": "1,2,3,99,1"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Cache-Control"], "private, no-cache")
+        none = {"favorite": False, "wishlist": False, "played": False}
+        self.assertEqual(res.data["results"], {
+            "1": {"favorite": True, "wishlist": False, "played": True},
+            "2": {**none, "wishlist": True},
+            "3": none,
+            "99": none,
+        })
+
+        again = self.client.get(self.url, {"game_ids": "1,2,3,99,1"}, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        LibraryItem.objects.create(user=self.user, game_id=3, status="played")
+        changed = self.client.get(self.url, {"game_ids": "1,2,3,99,1"}, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertTrue(changed.data["results"]["3"]["played"])
+
+    @override_settings(LIBRARY_STATUS_MAX_IDS=2)
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"game_ids": "1,x"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"game_ids": "1,2,3"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(LIBRARY_EXPORT_CHUNK_SIZE=2, LIBRARY_IMPORT_BATCH_SIZE=2)
+class LibraryExportImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="mover", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        games = Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}", rating=4.0) for n in range(1, 4)])
+        for game in games:
+            LibraryItem.objects.create(user=self.user, game=game, status="played")
+
+    def export(self, output):
+        response = self.client.get(reverse("library_export"), {"output": output})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_export_ndjson_and_csv(self):
+        import json
+
+        rows = [json.loads(line) for line in self.export("ndjson").splitlines()]
+        self.assertEqual([row["game_id"] for row in rows], [1, 2, 3])
+        self.assertEqual(rows[0]["title"], "Game 1")
+
+        lines = self.export("csv").decode().splitlines()
+        self.assertEqual(lines[0], "game_id,status,title,background_image,rating,created_at")
+        self.assertEqual(len(lines), 4)
+
+        self.assertEqual(self.client.get(reverse("library_export"), {"output": "xml"}).status_code, 400)
+
+    # game 50 is fetched on the fan-out pool, keep those threads away from the database
+    @override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0)
+    @patch("games.rawg.requests.Session.get")
+    def test_import_round_trip_in_batches(self, mock_get):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"id": 50, "name": "Brand new", "rating": 4.5}
+        data = self.export("ndjson")
+        other = User.objects.create_user(username="newcomer", password="testPwd!")
+        self.client.force_authenticate(other)
+        upload = SimpleUploadedFile(
+            "library.ndjson",
+            data + b'{"game_id": 50, "status": "wishlist", "title": "Fake", "background_image": "https://evil.test/x.png"}\n'
+                   b'not json\n{"game_id": 1, "status": "played"}\n{"game_id": 2, "status": "owned"}\n'
+                   b'{"game_id": 3, "status": ["played"]}\n',
+        )
+        response = self.client.post(reverse("library_import"), {"file": upload})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 4)
+        self.assertEqual(response.data["skipped"], 1)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [5, 7, 8])
+        self.assertEqual(LibraryItem.objects.filter(user=other).count(), 4)
+        # the shared game row comes from RAWG, never from the uploaded file
+        game = Game.objects.get(rawg_id=50)
+        self.assertEqual((game.name, game.background_image), ("Brand new", None))
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_import_csv(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile("library.csv", b"game_id,status\n1,wishlist\n2,played\n")
+        response = self.client.post(reverse("library_import"), {"file": upload})
+        self.assertEqual((response.data["created"], response.data["skipped"]), (1, 1))
+
+
+@override_settings(GAMES_MIRROR_ENABLED=False, RAWG_MAX_RETRIES=0)
+class BulkAddFromRawgTests(APITestCase):
+    def setUp(self):
+        games_cache.clear()
+        cache.clear() # RAWG budget and breaker state
+        self.user = User.objects.create_user(username="bulkuser", password="testPwd!")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("add-from-rawg-bulk")
+
+    @patch("games.rawg.requests.Session.get")
+    def test_bulk_add_reports_per_item_outcomes(self, mock_get):
+        import requests
+
+        def fake_get(url, params=None, timeout=None):
+            game_id = int(url.rsplit("/", 1)[-1])
+            if game_id == 404:
+                raise requests.exceptions.HTTPError("404 Not Found")
+            resp = MagicMock()
+            resp.status_code = 200
+            resp.json.return_value = {"id": game_id, "name": f"Game {game_id}", "rating": 4.0}
+            return resp
+
+        mock_get.side_effect = fake_get
+        game = Game.objects.create(rawg_id=1, name="Game 1")
+        LibraryItem.objects.create(user=self.user, game=game, status="wishlist")
+
+        response = self.client.post(self.url, {"items": [
+            {"game_id": 1, "status": "wishlist"},   # already there
+            {"game_id": 1, "status": "played"},
+            {"game_id": 2},
+            {"game_id": 2, "status": "wishlist"},   # repeated in the request
+            {"game_id": 404, "status": "favorite"},
+            {"game_id": 3, "status": "owned"},
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            [item["result"] for item in response.data["items"]],
+            ["exists", "created", "created", "duplicate", "error", "invalid"],
+        )
+        self.assertEqual(LibraryItem.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(LibraryItem.objects.get(user=self.user, game_id=2).game.name, "Game 2")
+        # game 1 is already known, game 2 fetched once, 404 once
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_items_a_concurrent_add_inserted_are_not_reported_as_created(self):
+        from library.snapshots import ensure_games
+
+        Game.objects.bulk_create([Game(rawg_id=1, name="Game 1"), Game(rawg_id=2, name="Game 2")])
+
+        def racing_ensure_games(game_ids):
+            # another request adds game 2 between the duplicate check and the insert
+            LibraryItem.objects.create(user=self.user, game_id=2, status="wishlist")
+            return ensure_games(game_ids)
+
+        with patch("library.views.ensure_games", side_effect=racing_ensure_games):
+            response = self.client.post(self.url, {"items": [{"game_id": 1}, {"game_id": 2}]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([item["result"] for item in response.data["items"]], ["created", "exists"])
+        self.assertEqual(GamePopularity.objects.get(game_id=2).wishlist_count, 1)
+
+    def test_bulk_add_validates_payload(self):
+        self.assertEqual(self.client.post(self.url, {}, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"items": [{"game_id": 1, "status": ["wishlist"]}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["items"][0]["result"], "invalid")
+        with override_settings(LIBRARY_BULK_MAX_ITEMS=1):
+            response = self.client.post(self.url, {"items": [{"game_id": 1}, {"game_id": 2}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GameSimilarityTests(APITestCase):
+    def setUp(self):
+        from django.core.management import call_command
+
+        Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}") for n in range(1, 6)])
+        # games 1 and 2 are always together, 3 shows up with 1 once, 4 and 5 are a pair of their own
+        libraries = {"a": [1, 2, 3], "b": [1, 2], "c": [1, 2, 4], "d": [4, 5], "e": [4, 5]}
+        for name, game_ids in libraries.items():
+            user = User.objects.create_user(username=name, password="testPwd!")
+            for game_id in game_ids:
+                LibraryItem.objects.create(user=user, game_id=game_id, status="played")
+        self.reader = User.objects.get(username="b")
+        call_command("build_game_similarities", "--min-users", "1", "--top-k", "3", stdout=io.StringIO())
+
+    def test_build_keeps_top_k_per_game(self):
+        neighbours = list(
+            GameSimilarity.objects.filter(game_id=1).order_by("-score").values_list("similar_game_id", flat=True)
+        )
+        self.assertEqual(neighbours[0], 2)
+        self.assertNotIn(5, neighbours)
+        self.assertLessEqual(GameSimilarity.objects.filter(game_id=4).count(), 3)
+
+    def test_similar_endpoint(self):
+        res = self.client.get(reverse("game_similar", args=[4]), {"limit": 1})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([game["id"] for game in res.data["results"]], [5])
+        self.assertEqual(res.data["results"][0]["name"], "Game 5")
+
+    def test_recommendations_leave_out_owned_games(self):
+        self.client.force_authenticate(self.reader)
+        res = self.client.get(reverse("library_recommendations"))
+        ids = [game["id"] for game in res.data["results"]]
+        self.assertEqual(ids[:2], [3, 4])
+        self.assertFalse({1, 2} & set(ids))
+
+
+class GamePopularityTests(APITestCase):
+    def setUp(self):
+        Game.objects.bulk_create([Game(rawg_id=n, name=f"Game {n}") for n in range(1, 4)])
+        self.alice = User.objects.create_user(username="alice", password="testPwd!")
+        self.bob = User.objects.create_user(username="bob", password="testPwd!")
+
+    def counts(self, game_id):
+        row = GamePopularity.objects.get(game_id=game_id)
+        return row.favorite_count, row.wishlist_count, row.played_count
+
+    def test_counters_follow_adds_edits_and_deletes(self):
+        item = LibraryItem.objects.create(user=self.alice, game_id=1, status="wishlist")
+        LibraryItem.objects.create(user=self.bob, game_id=1, status="favorite")
+        self.assertEqual(self.counts(1), (1, 1, 0))
+
+        self.client.force_authenticate(self.alice)
+        self.client.patch(reverse("library_detail", args=[item.id]), {"status": "played"})
+        self.assertEqual(self.counts(1), (1, 0, 1))
+
+        self.client.post(reverse("add-from-rawg-bulk"), {"items": [{"game_id": 2, "status": "played"}]}, format="json")
+        self.assertEqual(self.counts(2), (0, 0, 1))
+
+        self.bob.delete()
+        self.assertEqual(self.counts(1), (0, 0, 1))
+
+    def test_trending_ranks_by_decayed_activity(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        LibraryItem.objects.create(user=self.alice, game_id=1, status="favorite")
+        LibraryItem.objects.create(user=self.bob, game_id=1, status="favorite")
+        LibraryItem.objects.create(user=self.alice, game_id=2, status="wishlist")
+        # much older activity on game 3 has mostly decayed away
+        old = LibraryItem.objects.create(user=self.bob, game_id=3, status="favorite")
+        LibraryItem.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=70))
+
+        from django.core.management import call_command
+        call_command("reconcile_game_popularity", stdout=io.StringIO())
+
+        res = self.client.get(reverse("library_trending"))
+        self.assertEqual([game["id"] for game in res.data["results"]], [1, 2, 3])
+        self.assertEqual(res.data["results"][0]["counts"], {"favorite": 2, "wishlist": 0, "played": 0})
+        self.assertAlmostEqual(res.data["results"][0]["score"], 6.0, places=2)
+
+    @override_settings(TRENDING_HALF_LIFE_DAYS=1)
+    def test_trend_does_not_overflow_far_from_the_epoch(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        # 2 ** (days since 2025 / half life) no longer fits a float here
+        later = timezone.now() + timedelta(days=3650)
+        popularity.record([(1, "favorite", later), (1, "played", later)])
+        popularity.record([(1, "played", later)], sign=-1)
+
+        trend = GamePopularity.objects.get(game_id=1).trend
+        self.assertAlmostEqual(popularity.decayed(trend, later), 3.0, places=6)
+        self.assertAlmostEqual(popularity.decayed(trend, later + timedelta(days=2)), 0.75, places=6)
+
+        popularity.record([(1, "favorite", later)], sign=-1)
+        self.assertIsNone(GamePopularity.objects.get(game_id=1).trend)
+
+    def test_reconcile_fixes_drift(self):
+        from django.core.management import call_command
+
+        LibraryItem.objects.create(user=self.alice, game_id=1, status="played")
+        GamePopularity.objects.filter(game_id=1).update(played_count=7)
+        GamePopularity.objects.create(game_id=3, favorite_count=2)
+
+        out = io.StringIO()
+        call_command("reconcile_game_popularity", stdout=out)
+
+        self.assertIn("2 games had drifted", out.getvalue())
+        self.assertEqual(self.counts(1), (0, 0, 1))
+        self.assertFalse(GamePopularity.objects.filter(game_id=3).exists())
@@ -0,0 +1,150 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+
+from .models import LibraryItem, bulk_add_items
+from .snapshots import ensure_games
+
+
+# Streaming export / import of a user's library (GET /api/library/export/, POST /api/library/import/).
+# Exports walk a server-side cursor and yield one line per item; imports read the upload line by
+# line and insert every LIBRARY_IMPORT_BATCH_SIZE rows, so memory use does not grow with the library.
+
+EXPORT_FIELDS = ["game_id", "status", "title", "background_image", "rating", "created_at"]
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_rows(user):
+    rows = (
+        LibraryItem.objects.filter(user=user)
+        .order_by("created_at", "id")
+        .values_list("game_id", "status", "game__name", "game__background_image", "game__rating", "created_at")
+        .iterator(chunk_size=settings.LIBRARY_EXPORT_CHUNK_SIZE)
+    )
+    for game_id, status, title, background_image, rating, created_at in rows:
+        yield {
+            "game_id": game_id,
+            "status": status,
+            "title": title,
+            "background_image": background_image,
+            "rating": rating,
+            "created_at": created_at.isoformat(),
+        }
+
+
+class _Echo:
+    # csv.writer target that hands back each formatted line instead of buffering it
+    def write(self, value):
+        return value
+
+
+def export_lines(user, output):
+    if output == "csv":
+        writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writeheader()
+        for row in export_rows(user):
+            yield writer.writerow(row)
+    else:
+        for row in export_rows(user):
+            yield json.dumps(row) + "\n"
+
+
+def parse_upload(upload, input_format):
+    # (line number, row dict or None, error) per record, read incrementally from the uploaded file
+    if input_format == "csv":
+        lines = codecs.iterdecode(upload, "utf-8-sig")
+        for number, row in enumerate(csv.DictReader(lines), start=2):
+            yield number, row, None
+        return
+
+    for number, line in enumerate(upload, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "expected an object"
+            continue
+        yield number, row, None
+
+
+def import_batch(user, rows):
+    """
+    Insert one batch of ``[(line, game_id, status)]``; returns (created, skipped, {line: error}).
+
+    Only the ids and statuses of the file are used: games.Game rows are shared by every user, so
+    unknown games are resolved through snapshots.ensure_games (cache, local catalog or RAWG) and the
+    title/artwork/rating in the file are ignored.
+    """
+    game_ids = {game_id for _, game_id, _ in rows}
+    games, fetch_errors = ensure_games(game_ids)
+
+    existing = set(
+        LibraryItem.objects.filter(user=user, game_id__in=game_ids).values_list("game_id", "status")
+    )
+    to_create, skipped, errors = [], 0, {}
+    for line, game_id, status in rows:
+        if game_id not in games:
+            errors[line] = fetch_errors.get(str(game_id), "game not found")
+        elif (game_id, status) in existing:
+            skipped += 1
+        else:
+            existing.add((game_id, status))
+            to_create.append(LibraryItem(user=user, game_id=game_id, status=status))
+
+    # items a concurrent add inserted first count as skipped
+    created = bulk_add_items(user.pk, to_create)
+    return len(created), skipped + len(to_create) - len(created), errors
+
+
+def import_library(user, upload, input_format):
+    """
+    Import an NDJSON or CSV upload (the export format, only game_id is required).
+
+    Returns ``{"created", "skipped", "errors"}``; at most 100 line errors are reported.
+    """
+    statuses = dict(LibraryItem.STATUS_CHOICES)
+    summary = {"created": 0, "skipped": 0, "errors": []}
+
+    def add_error(line, error):
+        if len(summary["errors"]) < 100:
+            summary["errors"].append({"line": line, "error": error})
+
+    def flush(batch):
+        created, skipped, errors = import_batch(user, batch)
+        summary["created"] += created
+        summary["skipped"] += skipped
+        for line, error in errors.items():
+            add_error(line, error)
+
+    batch = []
+    for line, row, error in parse_upload(upload, input_format):
+        if error:
+            add_error(line, error)
+            continue
+        try:
+            game_id = int(row.get("game_id"))
+        except (TypeError, ValueError):
+            add_error(line, "game_id is required")
+            continue
+        status = row.get("status") or "wishlist"
+        if not isinstance(status, str) or status not in statuses:
+            add_error(line, "unknown status")
+            continue
+        batch.append((line, game_id, status))
+        if len(batch) >= settings.LIBRARY_IMPORT_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
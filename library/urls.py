@@ -1,12 +1,28 @@
 from django.urls import path
 from .views import (
+    LibraryChangesView,
     LibraryItemListCreateView,
     LibraryItemRetrieveUpdateDestroyView,
-    add_from_rawg
+    LibraryRecommendationsView,
+    LibraryStatusView,
+    LibrarySummaryView,
+    TrendingGamesView,
+    add_from_rawg,
+    bulk_add_from_rawg,
+    export_library,
+    import_library_file,
     )
 
 urlpatterns = [
     path('', LibraryItemListCreateView.as_view(), name='library_list_create'),
+    path('changes/', LibraryChangesView.as_view(), name='library_changes'),
+    path('recommendations/', LibraryRecommendationsView.as_view(), name='library_recommendations'),
+    path('trending/', TrendingGamesView.as_view(), name='library_trending'),
+    path('summary/', LibrarySummaryView.as_view(), name='library_summary'),
+    path('status/', LibraryStatusView.as_view(), name='library_status'),
     path('<int:pk>/', LibraryItemRetrieveUpdateDestroyView.as_view(), name='library_detail'),
     path("add-from-rawg/", add_from_rawg, name="add-from-rawg"),
+    path("add-from-rawg/bulk/", bulk_add_from_rawg, name="add-from-rawg-bulk"),
+    path("export/", export_library, name="library_export"),
+    path("import/", import_library_file, name="library_import"),
 ]
\ No newline at end of file
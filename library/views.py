@@ -1,30 +1,253 @@
+import csv
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Avg, Count, Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import LibraryItem
+from rest_framework.views import APIView
+from . import popularity
+from .cache import get_payload, library_version, payload_key, set_payload, version_datetime
+from .models import LibraryItem, LibraryTombstone, bulk_add_items, library_statuses
+from .pagination import LibraryCursorPagination
 from .serializers import LibraryItemSerializer
+from .snapshots import ensure_game, ensure_games
+from .transfer import FORMATS, export_lines, import_library
 from rest_framework.decorators import api_view, permission_classes
 import requests
+from games.models import GamePopularity, GameSimilarity
+from games.quota import RawgUnavailable
+from games.projection import parse_fields
+from games.responses import parse_limit, scored_cards
 from django.conf import settings
 
 
 # Create your views here.
 
-class LibraryItemListCreateView(generics.ListCreateAPIView): # list all of the current user's items + add new items
+def request_library_version(request):
+    # looked up once per request (ETag, Last-Modified, payload key)
+    if not hasattr(request, "_library_version"):
+        request._library_version = library_version(request.user.pk)
+    return request._library_version
+
+
+def library_etag(request, *args, **kwargs):
+    # the library version changes on every write (library/cache.py), so checking it is one cache
+    # lookup (one indexed query without a shared cache)
+    return f'"{request.user.pk}-{request_library_version(request)}-{request.GET.urlencode()}"'
+
+
+def library_last_modified(request, *args, **kwargs):
+    return version_datetime(request_library_version(request))
+
+
+def summarize_library(user, recent):
+    # two queries, also run by `manage.py benchmark_library_queries`
+    items = LibraryItem.objects.filter(user=user)
+    statuses = dict(LibraryItem.STATUS_CHOICES)
+    totals = items.aggregate(
+        total=Count("id"),
+        average_rating=Avg("game__rating"),
+        **{name: Count("id", filter=Q(status=name)) for name in statuses},
+    )
+    return {
+        "total": totals["total"],
+        "counts": {name: totals[name] for name in statuses},
+        "average_rating": round(totals["average_rating"], 2) if totals["average_rating"] is not None else None,
+        "recent": list(items.select_related("game").order_by("-created_at", "id")[:max(recent, 0)]),
+    }
+
+
+class PrivateRevalidateMixin:
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method == "GET":
+            # per-user data: browsers may keep it but must revalidate, shared caches must not
+            patch_vary_headers(response, ["Authorization"])
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class LibraryItemListCreateView(PrivateRevalidateMixin, generics.ListCreateAPIView): # list the current user's items (cursor paginated) + add new items
     serializer_class = LibraryItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LibraryCursorPagination
 
     def get_queryset(self):
-        return LibraryItem.objects.filter(user=self.request.user)
+        queryset = LibraryItem.objects.filter(user=self.request.user).select_related("game")
+        status_value = self.request.query_params.get("status")
+        if status_value:
+            if status_value not in dict(LibraryItem.STATUS_CHOICES):
+                raise ValidationError({"status": f"must be one of {', '.join(dict(LibraryItem.STATUS_CHOICES))}"})
+            queryset = queryset.filter(status=status_value)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        # ?all=true returns the whole library as a plain list (the pre-pagination response)
+        if self.request.query_params.get("all") in ("true", "1"):
+            return None
+        return super().paginate_queryset(queryset)
+
+    # ETag / Last-Modified from the library version; a matching If-None-Match or If-Modified-Since
+    # gets a 304 without reading the library (and without any query when SHARED_CACHE is on)
+    @method_decorator(condition(etag_func=library_etag, last_modified_func=library_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        # with SHARED_CACHE, serialized pages are cached per user and library version, repeat reads skip the query
+        key = payload_key(request.user.pk, request_library_version(request), request)
+        data = get_payload(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            set_payload(key, data)
+        return Response(data)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+class LibrarySummaryView(PrivateRevalidateMixin, generics.GenericAPIView):
+# Counts per status, average rating and the most recent items - GET /api/library/summary/?recent=5
+# Counts and the average come from one aggregate over the (user, status, -created_at) index,
+# the recent items from one more indexed query.
+    serializer_class = LibraryItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @method_decorator(condition(etag_func=library_etag, last_modified_func=library_last_modified))
+    def get(self, request):
+        try:
+            recent = min(int(request.query_params.get("recent", settings.LIBRARY_SUMMARY_RECENT)), 50)
+        except ValueError:
+            raise ValidationError({"recent": "must be an integer"})
+
+        summary = summarize_library(request.user, recent)
+        summary["recent"] = self.get_serializer(summary["recent"], many=True).data
+        return Response(summary)
+
+
+class LibraryStatusView(PrivateRevalidateMixin, APIView):
+# Which of these games are in the library - GET /api/library/status/?game_ids=1,2,3
+# One game_id__in query over the (user, game, status) index instead of downloading the whole
+# library; every requested id is in "results", with all statuses false when not in the library.
+    permission_classes = [permissions.IsAuthenticated]
+
+    @method_decorator(condition(etag_func=library_etag, last_modified_func=library_last_modified))
+    def get(self, request):
+        try:
+            game_ids = list(dict.fromkeys(int(i) for i in request.GET.get("game_ids", "").split(",") if i.strip()))
+        except ValueError:
+            raise ValidationError({"game_ids": "must be a comma separated list of integers"})
+        if not game_ids:
+            raise ValidationError({"game_ids": "is required"})
+        if len(game_ids) > settings.LIBRARY_STATUS_MAX_IDS:
+            raise ValidationError({"game_ids": f"at most {settings.LIBRARY_STATUS_MAX_IDS} ids per request"})
+
+        statuses = library_statuses(request.user, game_ids)
+        return Response({"results": {str(game_id): value for game_id, value in statuses.items()}})
+
+
+def encode_sync_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_sync_cursor(cursor):
+    try:
+        return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise ValidationError({"since": "invalid cursor"})
+
+
+class LibraryChangesView(PrivateRevalidateMixin, generics.GenericAPIView):
+# Delta sync - GET /api/library/changes/?since=<cursor>
+# Returns items created or updated and ids of items deleted since the cursor, plus the cursor for the
+# next sync. Without a cursor, or with one older than LIBRARY_TOMBSTONE_TTL, the whole library is
+# returned with "reset": true and the client should replace its copy. Changes in the last
+# LIBRARY_CHANGES_OVERLAP seconds before the cursor are sent again, applying them is idempotent.
+# Items whose shared game snapshot was refreshed (title, artwork, rating) count as changed too.
+    serializer_class = LibraryItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        now = timezone.now()
+        since = request.query_params.get("since")
+        since = decode_sync_cursor(since) if since else None
+        reset = since is None or since < now - timedelta(seconds=settings.LIBRARY_TOMBSTONE_TTL)
+
+        items = LibraryItem.objects.filter(user=request.user).select_related("game").order_by("updated_at", "id")
+        deleted = []
+        if not reset:
+            since -= timedelta(seconds=settings.LIBRARY_CHANGES_OVERLAP)
+            items = items.filter(Q(updated_at__gt=since) | Q(game__synced_at__gt=since))
+            deleted = list(
+                LibraryTombstone.objects.filter(user=request.user, deleted_at__gt=since)
+                .order_by("deleted_at")
+                .values_list("item_id", flat=True)
+            )
+
+        return Response({
+            "cursor": encode_sync_cursor(now),
+            "reset": reset,
+            "items": self.get_serializer(items, many=True).data,
+            "deleted": deleted,
+        })
+
+
+class LibraryRecommendationsView(PrivateRevalidateMixin, generics.GenericAPIView):
+# Games the user may like - GET /api/library/recommendations/?limit=20
+# Sums the precomputed similarities (`manage.py build_game_similarities`) of every game in the
+# user's library and leaves out games already in it; one query plus the game cards.
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        limit = parse_limit(request, 20, 50)
+        owned = LibraryItem.objects.filter(user=request.user).values("game_id")
+        scored = list(
+            GameSimilarity.objects.filter(game_id__in=owned)
+            .exclude(similar_game_id__in=owned)
+            .values("similar_game_id")
+            .annotate(total=Sum("score"))
+            .order_by("-total", "similar_game_id")
+            .values_list("similar_game_id", "total")[:limit]
+        )
+        fields = parse_fields(request.GET.get("fields"), default="card")
+        return Response({"results": scored_cards(request, scored, fields)})
+
+
+class TrendingGamesView(APIView):
+# Trending on GamesHub - GET /api/library/trending/?limit=20
+# Ranks games by their time-decayed library activity (library/popularity.py), an indexed top-N
+# read of games.GamePopularity; "score" halves every TRENDING_HALF_LIFE_DAYS without new adds.
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        limit = parse_limit(request, 20, 100)
+        now = timezone.now()
+        rows = {
+            row.game_id: row
+            for row in GamePopularity.objects.filter(trend__isnull=False).order_by("-trend", "game_id")[:limit]
+        }
+        fields = parse_fields(request.GET.get("fields"), default="card")
+        scored = [(game_id, popularity.decayed(row.trend, now)) for game_id, row in rows.items()]
+        cards = scored_cards(request, scored, fields)
+        for card in cards:
+            row = rows[card["id"]]
+            card["counts"] = {name: getattr(row, f"{name}_count") for name in dict(LibraryItem.STATUS_CHOICES)}
+
+        response = Response({"results": cards})
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+
 class LibraryItemRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView): # view, update, delete a specific library item
     serializer_class = LibraryItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return LibraryItem.objects.filter(user=self.request.user)
+        return LibraryItem.objects.filter(user=self.request.user).select_related("game")
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -34,12 +257,20 @@ def add_from_rawg(request):
 
     if not game_id:
         return Response({"error": "game_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        game_id = int(game_id)
+    except (TypeError, ValueError):
+        return Response({"error": "game_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Fetch game details from RAWG
-    url = f"{settings.RAWG_BASE_URL}/games/{game_id}"
-    params = {"key": settings.RAWG_API_KEY}
-    rawg_response = requests.get(url, params=params)
-    game = rawg_response.json()
+    # Shared game snapshot, RAWG is only called the first time anyone adds this game
+    try:
+        game = ensure_game(game_id)
+    except RawgUnavailable as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except requests.exceptions.RequestException as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if game is None:
+        return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
 
     # Avoid duplicates
     exists = LibraryItem.objects.filter(
@@ -54,14 +285,116 @@ def add_from_rawg(request):
     # Create library item
     library_item = LibraryItem.objects.create(
         user=request.user,
-        game_id=game_id,
-        title=game.get("name"),
-        background_image=game.get("background_image"),
-        rating=game.get("rating"),
+        game=game,
         status=status_value,
     )
 
     return Response(
         {"message": "Game added", "item_id": library_item.id},
         status=status.HTTP_201_CREATED
-    )
\ No newline at end of file
+    )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_add_from_rawg(request):
+    # Add many RAWG games at once - POST /api/library/add-from-rawg/bulk/ with
+    # {"items": [{"game_id": 3498, "status": "wishlist"}, ...]}
+    # Duplicates are found with one query, games nobody has added yet are fetched concurrently
+    # (cache / local catalog / RAWG) and rows are inserted with a single bulk_create.
+    items = request.data.get("items")
+    if not isinstance(items, list) or not items:
+        return Response({"error": "items must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > settings.LIBRARY_BULK_MAX_ITEMS:
+        return Response(
+            {"error": f"at most {settings.LIBRARY_BULK_MAX_ITEMS} items per request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    statuses = dict(LibraryItem.STATUS_CHOICES)
+    results = [] # one outcome per requested item, in request order
+    wanted = {} # (game_id, status) -> result, first occurrence only
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        status_value = item.get("status", "wishlist")
+        try:
+            game_id = int(item.get("game_id"))
+        except (TypeError, ValueError):
+            results.append({"game_id": item.get("game_id"), "status": status_value, "result": "invalid", "error": "game_id is required"})
+            continue
+        if not isinstance(status_value, str) or status_value not in statuses:
+            results.append({"game_id": game_id, "status": status_value, "result": "invalid", "error": "unknown status"})
+            continue
+
+        result = {"game_id": game_id, "status": status_value}
+        if (game_id, status_value) in wanted:
+            result["result"] = "duplicate"
+        else:
+            wanted[(game_id, status_value)] = result
+        results.append(result)
+
+    # one query for everything the user already has
+    existing = set(
+        LibraryItem.objects.filter(user=request.user, game_id__in={game_id for game_id, _ in wanted})
+        .values_list("game_id", "status")
+    )
+    for key, result in wanted.items():
+        if key in existing:
+            result["result"] = "exists"
+
+    new_keys = [key for key, result in wanted.items() if "result" not in result]
+    games, errors = ensure_games([game_id for game_id, _ in new_keys])
+
+    to_create = []
+    for game_id, status_value in new_keys:
+        result = wanted[(game_id, status_value)]
+        if game_id not in games:
+            result["result"] = "error"
+            result["error"] = errors.get(str(game_id), "not found")
+            continue
+        to_create.append(LibraryItem(user=request.user, game=games[game_id], status=status_value))
+
+    # unique_together guards against a concurrent add of the same item, which then already exists
+    created = bulk_add_items(request.user.pk, to_create)
+    inserted = {(item.game_id, item.status) for item in created}
+    for item in to_create:
+        wanted[(item.game_id, item.status)]["result"] = "created" if (item.game_id, item.status) in inserted else "exists"
+
+    return Response(
+        {"created": len(created), "items": results},
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_library(request):
+    # Stream the whole library - GET /api/library/export/?output=ndjson|csv
+    # (not ?format=, DRF reserves it for renderer selection)
+    output = request.query_params.get("output", "ndjson")
+    if output not in FORMATS:
+        return Response({"error": f"output must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(export_lines(request.user, output), content_type=FORMATS[output])
+    response["Content-Disposition"] = f'attachment; filename="library.{output}"'
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_library_file(request):
+    # Import an export file - POST /api/library/import/ (multipart "file", .ndjson or .csv)
+    # Rows are read incrementally and inserted in batches; items already in the library are skipped.
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+    input_format = request.query_params.get("input") or ("csv" if upload.name.lower().endswith(".csv") else "ndjson")
+    if input_format not in FORMATS:
+        return Response({"error": f"input must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        summary = import_library(request.user, upload, input_format)
+    except UnicodeDecodeError:
+        return Response({"error": "file must be UTF-8"}, status=status.HTTP_400_BAD_REQUEST)
+    except csv.Error as e:
+        return Response({"error": f"invalid CSV: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(summary, status=status.HTTP_201_CREATED if summary["created"] else status.HTTP_200_OK)
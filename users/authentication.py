@@ -0,0 +1,42 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import cache_user, get_cached_user
+from .models import token_version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user together with the profile, reads both from a short-lived
+    cache when SHARED_CACHE is on, and rejects tokens issued before the user's tokens were revoked.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related("profile").get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache_user(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:  # the password is deferred on cached users: one query
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # tokens issued before the claim existed count as version 0
+        if validated_token.get("token_version", 0) != token_version(user):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return user
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+
+
+# Users (with their profile) cached in CACHES by id for the JWT authentication in
+# users/authentication.py, so authenticated requests do not load the user row every time.
+# Entries are dropped when the user or profile is saved or deleted (users/models.py); changes
+# that skip signals (queryset.update) show up after AUTH_USER_CACHE_TTL seconds.
+#
+# Only used with SHARED_CACHE: revoking tokens must reach every worker at once. Only the fields
+# authentication and the API need are stored (never the password hash); the rest of the user
+# is deferred, so reading it costs a query and save() leaves it alone.
+
+USER_FIELDS = {"id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser"}
+PROFILE_FIELDS = {"id", "user_id", "avatar", "token_version"}
+
+
+def user_key(user_id):
+    return f"users:user:{user_id}"
+
+
+def _fields(model, names):
+    # from_db() expects the values in concrete field order
+    return [field.attname for field in model._meta.concrete_fields if field.attname in names]
+
+
+def get_cached_user(user_id):
+    if not settings.SHARED_CACHE:
+        return None
+    data = cache.get(user_key(user_id))
+    if data is None:
+        return None
+
+    from .models import Profile  # models.py imports forget_user from here
+
+    User = get_user_model()
+    user = User.from_db(router.db_for_read(User), _fields(User, USER_FIELDS), data["user"])
+    profile = None
+    if data["profile"] is not None:
+        profile = Profile.from_db(router.db_for_read(Profile), _fields(Profile, PROFILE_FIELDS), data["profile"])
+        profile.user = user
+    user._state.fields_cache["profile"] = profile
+    return user
+
+
+def cache_user(user):
+    if not settings.SHARED_CACHE:
+        return
+    from .models import Profile
+
+    profile = getattr(user, "profile", None)
+    cache.set(
+        user_key(user.pk),
+        {
+            "user": [getattr(user, name) for name in _fields(type(user), USER_FIELDS)],
+            "profile": [getattr(profile, name) for name in _fields(Profile, PROFILE_FIELDS)] if profile else None,
+        },
+        timeout=settings.AUTH_USER_CACHE_TTL,
+    )
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
@@ -1,8 +1,11 @@
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .cache import forget_user
+
 # Create your models here.
 
 class Profile(models.Model):
@@ -13,6 +16,8 @@ class Profile(models.Model):
     )
     # store an avatar ID / filename (frontend will map this to images)
     avatar = models.CharField(max_length=100, blank=True)
+    # copied into the JWTs as the "token_version" claim, bumping it revokes every issued token
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Profile for {self.user.username}"
@@ -21,4 +26,27 @@ class Profile(models.Model):
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_profile_for_user(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+def token_version(user):
+    profile = getattr(user, "profile", None)
+    return profile.token_version if profile else 0
+
+
+def revoke_tokens(user):
+    # log the user out everywhere: access and refresh tokens with the old version are rejected
+    Profile.objects.filter(user=user).update(token_version=F("token_version") + 1)
+    forget_user(user.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    forget_user(instance.user_id)
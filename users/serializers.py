@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from .models import Profile
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .models import Profile, token_version
 
 User = get_user_model()
 
@@ -76,5 +79,26 @@ class UserProfileSerializer(serializers.ModelSerializer):
             profile, _ = Profile.objects.get_or_create(user=instance)
             profile.avatar = avatar
             profile.save()
+            instance.profile = profile  # the user may carry a select_related copy
 
-        return instance
\ No newline at end of file
+        return instance
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+# tokens carry the profile's token_version (users/authentication.py rejects older ones)
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["token_version"] = token_version(user)
+        return token
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+# refreshing a revoked token would hand out access tokens that fail on every request
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.select_related("profile").filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None and refresh.payload.get("token_version", 0) != token_version(user):
+            raise AuthenticationFailed("Token has been revoked", "token_revoked")
+        return super().validate(attrs)
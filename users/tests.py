@@ -3,6 +3,9 @@ from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.test import override_settings
+from .cache import user_key
 
 # Create your tests here.
 
@@ -95,4 +98,59 @@ class PasswordResetFlowTests(APITestCase):
             reverse("token_obtain_pair"),
             {"username": "resetuser", "password": "newpassword123"},
         )
-        self.assertEqual(login_resp2.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(login_resp2.status_code, status.HTTP_200_OK)
+
+
+@override_settings(SHARED_CACHE=True)
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear() # cached users
+        self.user = User.objects.create_user(username="cached", email="cached@example.com", password="testPwd!")
+        tokens = self.client.post(reverse("token_obtain_pair"), {"username": "cached", "password": "testPwd!"}).data
+        self.refresh = tokens["refresh"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.me_url = reverse("user_profile")
+
+    def test_repeat_requests_skip_the_user_query(self):
+        with self.assertNumQueries(1):  # user and profile in one join
+            self.client.get(self.me_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.me_url)
+        self.assertEqual(response.data["username"], "cached")
+
+        # saving the user or profile drops the cached copy
+        response = self.client.patch(self.me_url, {"avatar": "knight", "first_name": "Sir"}, format="json")
+        self.assertEqual(response.data["avatar"], "knight")
+        response = self.client.get(self.me_url)
+        self.assertEqual((response.data["avatar"], response.data["first_name"]), ("knight", "Sir"))
+        # the cached copy has no password hash and saving it keeps the password
+        self.assertNotIn(self.user.password, str(cache.get(user_key(self.user.pk))))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("testPwd!"))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_users_are_not_cached_per_worker(self):
+        # a revocation on one worker could not reach another worker's local cache
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.client.get(self.me_url)
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+
+    def test_password_reset_revokes_issued_tokens(self):
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+
+        reset = self.client.post(reverse("password_reset_confirm"), {
+            "uid": self.user.pk,
+            "token": default_token_generator.make_token(self.user),
+            "password": "newpassword123",
+        })
+        self.assertEqual(reset.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        refreshed = self.client.post(reverse("token_refresh"), {"refresh": self.refresh})
+        self.assertEqual(refreshed.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        tokens = self.client.post(reverse("token_obtain_pair"), {"username": "cached", "password": "newpassword123"}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
@@ -6,6 +6,7 @@ from django.conf import settings
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from .models import revoke_tokens
 from .serializers import RegisterSerializer, UserProfileSerializer
 
 # Create your views here.
@@ -22,6 +23,7 @@ class MeView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
 
     def get_object(self):
+        # loaded with select_related("profile") by users.authentication.CachedJWTAuthentication
         return self.request.user
 
 class PasswordResetRequestView(generics.GenericAPIView):
@@ -91,5 +93,7 @@ class PasswordResetConfirmView(generics.GenericAPIView):
 
         user.set_password(password)
         user.save()
+        # sessions opened with the old password end here
+        revoke_tokens(user)
 
         return Response({"message": "Password reset successful."})
\ No newline at end of file